@@ -4,12 +4,42 @@ from __future__ import annotations
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.const import Platform
+from homeassistant.const import CONF_NAME, Platform
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN
+from .const import CONF_FARM, DATA_METRICS, DATA_SPOOL_REGISTRY, DOMAIN
 from .coordinator import PrinterEnergyCoordinator
-
-PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BUTTON, Platform.NUMBER, Platform.TEXT]
+from .farm import FarmCoordinator
+from .metrics import async_setup_metrics
+from .services import async_setup_services
+from .spools import SpoolRegistry
+from .websocket_api import async_setup_websocket_api
+
+PLATFORMS: list[Platform] = [
+    Platform.SENSOR,
+    Platform.BINARY_SENSOR,
+    Platform.BUTTON,
+    Platform.NUMBER,
+    Platform.SELECT,
+    Platform.TEXT,
+]
+# Farm entries only have per-printer sensors
+FARM_PLATFORMS: list[Platform] = [Platform.SENSOR]
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Printer Energy integration (spool registry, services and websocket commands)."""
+    spool_registry = SpoolRegistry(hass)
+    await spool_registry.load()
+    hass.data[DATA_SPOOL_REGISTRY] = spool_registry
+
+    await async_setup_services(hass)
+    async_setup_websocket_api(hass)
+    hass.data[DATA_METRICS] = async_setup_metrics(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -20,7 +50,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         config.update(entry.options)
     
     hass.data.setdefault(DOMAIN, {})
-    
+
+    if entry.data.get(CONF_FARM):
+        return await _async_setup_farm_entry(hass, entry, config)
+
     # Check if coordinator already exists (on reload)
     existing_coordinator = hass.data.get(DOMAIN, {}).get(entry.entry_id)
     if existing_coordinator and isinstance(existing_coordinator, PrinterEnergyCoordinator):
@@ -38,6 +71,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         
         await coordinator.async_config_entry_first_refresh()
 
+    entry.async_on_unload(
+        hass.data[DATA_METRICS].async_track_coordinator(
+            entry.entry_id, entry.data.get(CONF_NAME, entry.title), coordinator
+        )
+    )
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
@@ -45,6 +84,21 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+async def _async_setup_farm_entry(hass: HomeAssistant, entry: ConfigEntry, config: dict) -> bool:
+    """Set up a farm entry: one coordinator and one device per printer."""
+    coordinator = FarmCoordinator(hass, config, entry.entry_id)
+    hass.data[DOMAIN][entry.entry_id] = coordinator
+
+    # Stored sessions are restored before any event reaches a printer
+    await coordinator.async_config_entry_first_refresh()
+    entry.async_on_unload(coordinator.async_setup_listeners())
+    entry.async_on_unload(hass.data[DATA_METRICS].async_track_farm(entry.entry_id, coordinator))
+
+    await hass.config_entries.async_forward_entry_setups(entry, FARM_PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    return True
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
     await async_unload_entry(hass, entry)
@@ -96,10 +150,11 @@ async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    coordinator: PrinterEnergyCoordinator = hass.data[DOMAIN][entry.entry_id]
+    coordinator: PrinterEnergyCoordinator | FarmCoordinator = hass.data[DOMAIN][entry.entry_id]
     await coordinator.async_shutdown()
 
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    platforms = FARM_PLATFORMS if entry.data.get(CONF_FARM) else PLATFORMS
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, platforms)
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
 
@@ -0,0 +1,182 @@
+"""Vectorized statistics and re-pricing over print history.
+
+These functions are CPU-bound and run in the executor. NumPy is imported
+lazily so importing this module never blocks the event loop.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Iterable
+
+from .const import STATISTICS_PERCENTILES
+
+# Epoch (1970-01-01) is a Thursday, weeks start on Monday 1970-01-05
+_WEEK_OFFSET = 4 * 86400
+_WEEK_SECONDS = 7 * 86400
+
+
+def records_to_columns(records: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    """Convert print records into NumPy column arrays."""
+    import numpy as np
+
+    records = [record for record in records if record.get("start") is not None]
+    count = len(records)
+
+    def column(key: str) -> Any:
+        return np.fromiter((record.get(key) or 0.0 for record in records), dtype=np.float64, count=count)
+
+    return {
+        "start": column("start"),
+        "end": column("end"),
+        "energy": column("energy"),
+        "material": column("material"),
+        "total_cost": column("total_cost"),
+    }
+
+
+def compute_statistics(columns: dict[str, Any]) -> dict[str, Any]:
+    """Compute distribution statistics and the weekly cost trend."""
+    import numpy as np
+
+    cost = columns["total_cost"]
+    count = int(cost.size)
+    result: dict[str, Any] = {"print_count": count}
+    if count == 0:
+        return result
+
+    hours = (columns["end"] - columns["start"]) / 3600.0
+    timed = hours > 0
+    energy_per_hour = columns["energy"][timed] / hours[timed]
+
+    result["cost_per_print"] = _distribution(np, cost)
+    result["energy_per_hour"] = _distribution(np, energy_per_hour)
+    result["material_per_print"] = _distribution(np, columns["material"])
+    result["weekly_cost"] = _weekly_trend(np, columns["start"], cost)
+    return result
+
+
+def _distribution(np: Any, values: Any) -> dict[str, Any]:
+    """Return mean, min, max and percentiles of an array."""
+    if values.size == 0:
+        return {}
+    percentiles = np.percentile(values, STATISTICS_PERCENTILES)
+    result = {
+        "mean": round(float(values.mean()), 4),
+        "min": round(float(values.min()), 4),
+        "max": round(float(values.max()), 4),
+    }
+    for percentile, value in zip(STATISTICS_PERCENTILES, percentiles):
+        result[f"p{percentile}"] = round(float(value), 4)
+    return result
+
+
+def _weekly_trend(np: Any, start: Any, cost: Any) -> dict[str, Any]:
+    """Group cost by ISO week (UTC) and fit a linear trend over weekly totals."""
+    week = np.floor_divide(start - _WEEK_OFFSET, _WEEK_SECONDS).astype(np.int64)
+    weeks, inverse = np.unique(week, return_inverse=True)
+    totals = np.bincount(inverse, weights=cost)
+    counts = np.bincount(inverse)
+
+    result: dict[str, Any] = {
+        "weeks": [
+            {
+                "week_start": datetime.fromtimestamp(
+                    int(index) * _WEEK_SECONDS + _WEEK_OFFSET, tz=timezone.utc
+                ).date().isoformat(),
+                "prints": int(prints),
+                "total_cost": round(float(total), 4),
+                "mean_cost": round(float(total / prints), 4),
+            }
+            for index, total, prints in zip(weeks, totals, counts)
+        ]
+    }
+    if weeks.size >= 2:
+        # Change in weekly total cost per week (weeks without prints count as gaps)
+        slope = np.polyfit(weeks.astype(np.float64), totals, 1)[0]
+        result["slope_per_week"] = round(float(slope), 4)
+    return result
+
+
+def reprice_records(
+    records: list[dict[str, Any]],
+    start: float | None,
+    end: float | None,
+    energy_price: float | None,
+    slots: list[tuple[float, float, float]],
+    cost_per_meter: float | None,
+    spool: int | None,
+) -> dict[str, Any]:
+    """Recompute the costs of the prints that started in [start, end).
+
+    Energy is priced at ``energy_price``, or at the time-weighted average of
+    the tariff ``slots`` (start, end, price) over prints the slots fully
+    cover. Material is priced at ``cost_per_meter``, only for prints of the
+    ``spool`` string index when given. Returns the indexes of the changed
+    records with their new energy and material costs, and the cost delta.
+    """
+    import numpy as np
+
+    count = len(records)
+
+    def column(key: str, missing: float = 0.0) -> Any:
+        return np.fromiter(
+            (missing if record.get(key) is None else record[key] for record in records),
+            dtype=np.float64,
+            count=count,
+        )
+
+    starts = column("start", np.nan)
+    ends = column("end", np.nan)
+    energy_cost = column("energy_cost")
+    material_cost = column("material_cost")
+    with np.errstate(invalid="ignore"):
+        selected = (starts >= (start if start is not None else -np.inf)) & (
+            starts < (end if end is not None else np.inf)
+        )
+
+    price = np.full(count, np.nan if energy_price is None else energy_price)
+    if slots:
+        slot_starts, slot_ends, slot_prices = (np.array(values, dtype=np.float64) for values in zip(*slots))
+        # Cumulative price-seconds and covered seconds at each slot boundary
+        points = np.column_stack((slot_starts, slot_ends)).ravel()
+        price_area = np.concatenate(([0.0], np.cumsum(slot_prices * (slot_ends - slot_starts))))
+        covered = np.concatenate(([0.0], np.cumsum(slot_ends - slot_starts)))
+        area_at = np.column_stack((price_area[:-1], price_area[1:])).ravel()
+        covered_at = np.column_stack((covered[:-1], covered[1:])).ravel()
+        duration = ends - starts
+        with np.errstate(invalid="ignore", divide="ignore"):
+            seconds = np.interp(ends, points, covered_at) - np.interp(starts, points, covered_at)
+            average = (np.interp(ends, points, area_at) - np.interp(starts, points, area_at)) / duration
+            inside = (duration > 0) & (starts >= points[0]) & (ends <= points[-1]) & (seconds >= duration - 1e-6)
+        price = np.where(inside, average, price)
+
+    new_energy_cost = energy_cost
+    energy_selected = selected & ~np.isnan(price)
+    if energy_selected.any():
+        new_energy_cost = np.where(energy_selected, column("energy") * np.nan_to_num(price), energy_cost)
+
+    new_material_cost = material_cost
+    material_selected = np.zeros(count, dtype=bool)
+    if cost_per_meter is not None:
+        material_selected = selected
+        if spool is not None:
+            material_selected = material_selected & (column("spool", -1.0) == spool)
+        new_material_cost = np.where(material_selected, column("material") / 1000.0 * cost_per_meter, material_cost)
+
+    changed = np.flatnonzero(
+        (np.abs(new_energy_cost - energy_cost) > 1e-12) | (np.abs(new_material_cost - material_cost) > 1e-12)
+    )
+    energy_delta = float((new_energy_cost - energy_cost).sum())
+    material_delta = float((new_material_cost - material_cost).sum())
+    return {
+        "prints": int((energy_selected | material_selected).sum()),
+        "indexes": changed.tolist(),
+        "energy_cost": new_energy_cost[changed].tolist(),
+        "material_cost": new_material_cost[changed].tolist(),
+        "delta": {
+            "energy_cost": energy_delta,
+            "material_cost": material_delta,
+            "total_cost": energy_delta + material_delta,
+        },
+    }
@@ -0,0 +1,212 @@
+"""Online anomaly detection on a print's energy and material use."""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Mapping
+
+from .const import (
+    ANOMALY_ENERGY_RATIO,
+    ANOMALY_ENERGY_SIGMAS,
+    ANOMALY_HIGH_ENERGY,
+    ANOMALY_MIN_PRINTS,
+    ANOMALY_MIN_STD_RATIO,
+    ANOMALY_NO_MATERIAL,
+    ANOMALY_PRINT_ALPHA,
+    ANOMALY_RATE_SECONDS,
+    ANOMALY_STALL_SECONDS,
+    ANOMALY_WARMUP_SECONDS,
+)
+
+# Baseline kinds, kept per printer and per printer and material type
+ENERGY_RATE = "energy_rate"  # kWh per hour of a finished print
+MATERIAL_RATE = "material_rate"  # mm per hour of a finished print
+
+
+class EwmaStats:
+    """Exponentially weighted mean and variance, updated in O(1)."""
+
+    __slots__ = ("mean", "variance", "count")
+
+    def __init__(self, mean: float = 0.0, variance: float = 0.0, count: int = 0) -> None:
+        """Initialize the statistics."""
+        self.mean = mean
+        self.variance = variance
+        self.count = count
+
+    @property
+    def std(self) -> float:
+        """Return the weighted standard deviation."""
+        return math.sqrt(max(self.variance, 0.0))
+
+    def update(self, value: float, alpha: float) -> None:
+        """Add a value with weight alpha (the first value sets the mean)."""
+        if self.count == 0:
+            self.mean = value
+            self.variance = 0.0
+        else:
+            diff = value - self.mean
+            increment = alpha * diff
+            self.mean += increment
+            self.variance = (1.0 - alpha) * (self.variance + diff * increment)
+        self.count += 1
+
+    def as_list(self) -> list[float]:
+        """Return the statistics for storage."""
+        return [self.mean, self.variance, self.count]
+
+
+class AnomalyDetector:
+    """Baselines of past prints and the checks of the running print.
+
+    Each finished print updates the energy rate (kWh/h) and material rate
+    (mm/h) baselines of the printer and of its material type. While
+    printing, every tick smooths the session's energy rate with a
+    time-aware EWMA and compares it with the baseline (the material's when
+    it has enough prints, else the printer's), and watches for a material
+    counter that stands still while the printer is printing, from the end
+    of the warm-up or from its first movement, whichever comes first. An
+    anomaly is raised once per session and stays active until the session
+    ends.
+    """
+
+    __slots__ = (
+        "baselines",
+        "material_type",
+        "session_start",
+        "rate",
+        "active",
+        "_last_time",
+        "_last_energy",
+        "_last_material",
+        "_material_moved",
+        "_stall_start",
+    )
+
+    def __init__(self) -> None:
+        """Initialize without baselines or session."""
+        self.baselines: dict[str, EwmaStats] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear the running session."""
+        self.material_type: str | None = None
+        self.session_start: float | None = None
+        self.rate: float | None = None
+        self.active: dict[str, dict[str, Any]] = {}
+        self._last_time: float | None = None
+        self._last_energy = 0.0
+        self._last_material: float | None = None
+        self._material_moved = False
+        self._stall_start: float | None = None
+
+    def add_print(self, hours: float, energy: float, material: float, material_type: str | None) -> None:
+        """Learn from a finished print."""
+        if hours <= 0:
+            return
+        rates = {ENERGY_RATE: energy / hours}
+        if material > 0:
+            rates[MATERIAL_RATE] = material / hours
+        for kind, value in rates.items():
+            keys = [kind, f"{kind}:{material_type.lower()}"] if material_type else [kind]
+            for key in keys:
+                self.baselines.setdefault(key, EwmaStats()).update(value, ANOMALY_PRINT_ALPHA)
+
+    def baseline(self, kind: str) -> EwmaStats | None:
+        """Return the material's baseline of a kind if usable, else the printer's."""
+        if self.material_type:
+            stats = self.baselines.get(f"{kind}:{self.material_type.lower()}")
+            if stats is not None and stats.count >= ANOMALY_MIN_PRINTS:
+                return stats
+        stats = self.baselines.get(kind)
+        return stats if stats is not None and stats.count >= ANOMALY_MIN_PRINTS else None
+
+    def start(self, timestamp: float, material_type: str | None) -> None:
+        """Open a session; the first tick sets the readings to compare against."""
+        self.reset()
+        self.session_start = timestamp
+        self.material_type = material_type
+
+    def tick(
+        self, timestamp: float, energy: float, material: float | None, printing: bool
+    ) -> list[dict[str, Any]]:
+        """Check the session's energy (kWh) and material (mm) so far.
+
+        ``printing`` is False during heat-up, cool-down and pauses, when the
+        material may stand still. Returns the anomalies raised by this tick.
+        """
+        if self.session_start is None:
+            return []
+        raised: list[dict[str, Any]] = []
+        if self._last_time is None:
+            self._last_time = timestamp
+            self._last_energy = energy
+        elif timestamp > self._last_time:
+            elapsed = timestamp - self._last_time
+            if energy >= self._last_energy:
+                rate = (energy - self._last_energy) / elapsed * 3600.0
+                weight = 1.0 - math.exp(-elapsed / ANOMALY_RATE_SECONDS)
+                self.rate = rate if self.rate is None else self.rate + weight * (rate - self.rate)
+            self._last_time = timestamp
+            self._last_energy = energy
+            self._check_energy(timestamp, raised)
+
+        if material is not None:
+            if self._last_material is None or material > self._last_material:
+                # A counter that moved once in this session is watched before the warm-up ends
+                self._material_moved = self._last_material is not None
+                self._last_material = material
+                self._stall_start = None
+            elif not printing:
+                self._stall_start = None
+            elif self._material_moved or timestamp - self.session_start >= ANOMALY_WARMUP_SECONDS:
+                if self._stall_start is None:
+                    self._stall_start = timestamp
+                elif timestamp - self._stall_start >= ANOMALY_STALL_SECONDS:
+                    stats = self.baseline(MATERIAL_RATE)
+                    self._raise(
+                        raised,
+                        ANOMALY_NO_MATERIAL,
+                        timestamp,
+                        value=0.0,
+                        expected=stats.mean if stats else None,
+                        stalled_seconds=timestamp - self._stall_start,
+                    )
+        return raised
+
+    def _check_energy(self, timestamp: float, raised: list[dict[str, Any]]) -> None:
+        """Raise when the smoothed energy rate is far above the baseline."""
+        if self.rate is None or timestamp - self.session_start < ANOMALY_WARMUP_SECONDS:
+            return
+        stats = self.baseline(ENERGY_RATE)
+        if stats is None:
+            return
+        std = max(stats.std, ANOMALY_MIN_STD_RATIO * stats.mean)
+        limit = max(stats.mean + ANOMALY_ENERGY_SIGMAS * std, ANOMALY_ENERGY_RATIO * stats.mean)
+        if self.rate > limit:
+            self._raise(raised, ANOMALY_HIGH_ENERGY, timestamp, value=self.rate, expected=stats.mean, limit=limit)
+
+    def _raise(self, raised: list[dict[str, Any]], kind: str, timestamp: float, **details: Any) -> None:
+        """Raise an anomaly once per session."""
+        if kind in self.active:
+            return
+        anomaly = {
+            "kind": kind,
+            "time": timestamp,
+            **{key: round(value, 4) if isinstance(value, float) else value for key, value in details.items()},
+        }
+        self.active[kind] = anomaly
+        raised.append(anomaly)
+
+    def as_dict(self) -> dict[str, list[float]]:
+        """Return the baselines for storage."""
+        return {key: stats.as_list() for key, stats in self.baselines.items()}
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, list[float]]) -> AnomalyDetector:
+        """Create a detector from stored baselines."""
+        detector = cls()
+        detector.baselines = {
+            key: EwmaStats(value[0], value[1], int(value[2])) for key, value in data.items()
+        }
+        return detector
@@ -0,0 +1,165 @@
+"""Apportion a shared energy meter among the printers behind it."""
+
+from __future__ import annotations
+
+from typing import Any, Iterable, Sequence
+
+from .const import METER_UNITS_PER_KWH, SPLIT_NAMEPLATE, SPLIT_POWER
+from .state_machine import MACHINE_IDLE
+from .tracker import PrinterTracker
+
+
+def split_largest_remainder(total: int, weights: Sequence[float]) -> list[int]:
+    """Split an integer total by weights so the shares add up exactly to the total.
+
+    Each share gets the floor of its quota, and the units left over go to
+    the largest fractional remainders (earlier entries win ties). Weights
+    that are all zero split equally.
+    """
+    count = len(weights)
+    if count == 0:
+        return []
+    weight_sum = float(sum(weights))
+    if weight_sum <= 0:
+        weights = [1.0] * count
+        weight_sum = float(count)
+    quotas = [total * weight / weight_sum for weight in weights]
+    shares = [int(quota // 1) for quota in quotas]
+    remainder = total - sum(shares)
+    if remainder:
+        order = sorted(range(count), key=lambda index: shares[index] - quotas[index])
+        for index in order[:remainder]:
+            shares[index] += 1
+    return shares
+
+
+class SharedMeter:
+    """One cumulative energy meter shared by several printers.
+
+    Readings are kept as integer meter units (``METER_UNITS_PER_KWH`` per
+    kWh), so each delta is split exactly and no energy is lost or
+    double-counted to rounding. Every printer gets its own attributed
+    counter, which its tracker uses as its energy reading. A delta is split
+    only among the printers whose session is open or pending (the active
+    set), so a tick costs O(active printers). Energy used while no printer
+    is active is counted as unattributed. The meter is the only writer of
+    its printers' energy readings, so it counts how many are unavailable
+    instead of scanning them on every tick.
+    """
+
+    __slots__ = (
+        "entity_id",
+        "split",
+        "trackers",
+        "active",
+        "last_units",
+        "attributed",
+        "unattributed",
+        "unavailable",
+    )
+
+    def __init__(self, entity_id: str, split: str, trackers: list[PrinterTracker]) -> None:
+        """Initialize the shared meter."""
+        self.entity_id = entity_id
+        self.split = split
+        self.trackers = trackers
+        # Printers active on this meter, by id, in insertion order
+        self.active: dict[str, PrinterTracker] = {}
+        self.last_units: int | None = None
+        self.attributed: dict[str, int] = {tracker.printer_id: 0 for tracker in trackers}
+        self.unattributed = 0
+        # Printers whose energy reading is unavailable (None); all until the first reading
+        self.unavailable = sum(1 for tracker in trackers if tracker.energy is None)
+
+    def update_active(self, tracker: PrinterTracker) -> None:
+        """Add or remove a printer from the active set after its state changed."""
+        if tracker.machine.state != MACHINE_IDLE:
+            self.active.setdefault(tracker.printer_id, tracker)
+        else:
+            self.active.pop(tracker.printer_id, None)
+
+    def add_reading(self, energy: float | None) -> list[PrinterTracker]:
+        """Split the delta since the last reading and return the printers that changed.
+
+        An unavailable meter makes the energy reading of every printer
+        unavailable until it comes back. A drop in the reading (meter reset)
+        only moves the baseline.
+        """
+        if energy is None:
+            for tracker in self.trackers:
+                tracker.energy = None
+            self.unavailable = len(self.trackers)
+            return list(self.trackers)
+
+        units = round(energy * METER_UNITS_PER_KWH)
+        last_units = self.last_units
+        self.last_units = units
+        if last_units is None or self.unavailable:
+            # First reading or back from unavailable - every printer's reading changes
+            for tracker in self.trackers:
+                tracker.energy = self.attributed[tracker.printer_id] / METER_UNITS_PER_KWH
+            self.unavailable = 0
+            changed = list(self.trackers)
+        else:
+            changed = []
+        delta = units - last_units if last_units is not None else 0
+        if delta <= 0:
+            return changed
+        if not self.active:
+            self.unattributed += delta
+            return changed
+
+        active = list(self.active.values())
+        shares = split_largest_remainder(delta, self._weights(active))
+        for tracker, share in zip(active, shares):
+            total = self.attributed[tracker.printer_id] + share
+            self.attributed[tracker.printer_id] = total
+            tracker.energy = total / METER_UNITS_PER_KWH
+        return changed or active
+
+    def _weights(self, active: list[PrinterTracker]) -> list[float]:
+        """Return the split weights of the active printers.
+
+        The power split falls back to nameplate power when a printer has no
+        power reading, and both fall back to an equal split when a printer
+        has no nameplate power.
+        """
+        if self.split == SPLIT_POWER and all(tracker.power is not None for tracker in active):
+            return [max(tracker.power, 0.0) for tracker in active]
+        if self.split in (SPLIT_POWER, SPLIT_NAMEPLATE) and all(
+            tracker.nameplate_power for tracker in active
+        ):
+            return [tracker.nameplate_power for tracker in active]
+        return [1.0] * len(active)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the meter baseline and attributed counters for storage."""
+        return {
+            "last": self.last_units,
+            "attributed": dict(self.attributed),
+            "unattributed": self.unattributed,
+        }
+
+    def restore(self, data: dict[str, Any]) -> None:
+        """Restore stored counters; printers added since start from zero."""
+        self.last_units = data.get("last")
+        for printer_id, units in data.get("attributed", {}).items():
+            if printer_id in self.attributed:
+                self.attributed[printer_id] = units
+        self.unattributed = data.get("unattributed", 0)
+
+
+def build_shared_meters(trackers: Iterable[PrinterTracker], split: str) -> dict[str, SharedMeter]:
+    """Return a shared meter for every energy sensor used by more than one printer."""
+    by_meter: dict[str, list[PrinterTracker]] = {}
+    for tracker in trackers:
+        if tracker.energy_sensor:
+            by_meter.setdefault(tracker.energy_sensor, []).append(tracker)
+    meters = {}
+    for entity_id, meter_trackers in by_meter.items():
+        if len(meter_trackers) > 1:
+            meters[entity_id] = SharedMeter(entity_id, split, meter_trackers)
+            # The meter writes the attributed readings and moves its own baseline on a reset
+            for tracker in meter_trackers:
+                tracker.energy_filter = None
+    return meters
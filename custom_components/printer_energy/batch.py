@@ -0,0 +1,439 @@
+"""Headless batch processing of exported state history.
+
+Replays exported Home Assistant history through the same trackers the farm
+coordinator uses live, without a running Home Assistant. Prints match a farm
+entry; they match a single-printer entry only for what the two share (an
+energy meter, an optional material sensor and a fixed spool price). Run it
+as a script:
+
+    python custom_components/printer_energy/batch.py --config farm.json \\
+        history.csv more-history.jsonl.gz --output results/
+
+The config is a JSON object with the same keys as a farm entry (``printers``
+plus the shared settings) and an optional constant ``energy_price``.
+History files are streamed once and split into one partition per printer
+(printers on a shared meter stay together); partitions are put in time order
+with an external merge sort and replayed in a process pool. Results are
+written as ``prints`` and ``periods`` files.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+if not __package__:
+    # Run as a script: load the sibling modules as a bare package, without
+    # the integration's __init__ (which needs Home Assistant). The script
+    # directory leaves sys.path, or select.py would shadow the stdlib module.
+    import types
+
+    _directory = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:] = [path for path in sys.path if os.path.abspath(path or ".") != _directory]
+    _package = types.ModuleType("printer_energy_batch")
+    _package.__path__ = [_directory]
+    sys.modules["printer_energy_batch"] = _package
+    __package__ = "printer_energy_batch"
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import csv
+from datetime import datetime, timezone
+import gzip
+import heapq
+from itertools import islice
+import json
+import math
+import tempfile
+from typing import Any, Iterator, TextIO
+
+from .apportion import SharedMeter, build_shared_meters
+from .const import (
+    COMPACTION_MONTH,
+    COMPACTION_PERIODS,
+    CONF_ENERGY_COST_SENSOR,
+    CONF_ENERGY_SENSOR,
+    CONF_MATERIAL_COST_PER_SPOOL,
+    CONF_MATERIAL_SPOOL_LENGTH,
+    CONF_PRINTER_ID,
+    CONF_PRINTERS,
+    CONF_PRINTING_SENSOR,
+    CONF_SHARED_METER_SPLIT,
+    DEFAULT_MATERIAL_COST_PER_SPOOL,
+    DEFAULT_SHARED_METER_SPLIT,
+    DEFAULT_SPOOL_LENGTH,
+)
+from .retention import compact_history
+from .tracker import (
+    UNAVAILABLE_STATES,
+    PrinterTracker,
+    build_trackers,
+    parse_energy,
+    parse_material,
+    parse_power,
+)
+
+# Constant energy price used when the config has no price entity (or before its first row)
+CONF_ENERGY_PRICE = "energy_price"
+
+# Partition rows sorted in memory at a time; longer partitions are merged from sorted runs
+SORT_RUN_ROWS = 100_000
+
+# Which reading of a tracker an entity feeds
+_ROLE_PRINTING = 0
+_ROLE_ENERGY = 1
+_ROLE_MATERIAL = 2
+_ROLE_POWER = 3
+
+# Column order of the output files
+PRINT_FIELDS = (
+    "printer_id",
+    "name",
+    "start",
+    "end",
+    "duration",
+    "energy",
+    "material",
+    "energy_cost",
+    "material_cost",
+    "total_cost",
+)
+PERIOD_FIELDS = (
+    "printer_id",
+    "name",
+    "period",
+    "start",
+    "end",
+    "count",
+    "duration",
+    "energy",
+    "material",
+    "energy_cost",
+    "material_cost",
+    "total_cost",
+)
+
+
+def parse_timestamp(value: Any) -> float | None:
+    """Return an epoch timestamp from an ISO string or epoch number (naive times are UTC)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _open_text(path: str) -> TextIO:
+    """Open a history file for reading, transparently decompressing ``.gz``."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def iter_history(path: str) -> Iterator[tuple[float, str, str | None, dict[str, Any] | None]]:
+    """Stream (timestamp, entity_id, state, attributes) rows from one history file.
+
+    CSV files use the columns of the Home Assistant history download
+    (``entity_id``, ``state``, ``last_changed``); JSONL files hold one state
+    object per line and may include ``attributes``. Rows without an entity
+    or a parseable time are skipped.
+    """
+    with _open_text(path) as handle:
+        is_jsonl = path.endswith((".jsonl", ".jsonl.gz", ".json", ".json.gz"))
+        rows: Iterator[dict[str, Any]]
+        if is_jsonl:
+            rows = (json.loads(line) for line in handle if line.strip())
+        else:
+            rows = csv.DictReader(handle)
+        for row in rows:
+            entity_id = row.get("entity_id")
+            timestamp = parse_timestamp(
+                row.get("last_changed") or row.get("last_updated") or row.get("timestamp")
+            )
+            if not entity_id or timestamp is None:
+                continue
+            attributes = row.get("attributes")
+            yield timestamp, entity_id, row.get("state"), attributes if isinstance(attributes, dict) else None
+
+
+def partition_printers(config: dict[str, Any]) -> list[list[dict[str, Any]]]:
+    """Group printer configs so printers sharing an energy meter end up together."""
+    groups: dict[str, list[dict[str, Any]]] = {}
+    for printer in config.get(CONF_PRINTERS, []):
+        key = printer.get(CONF_ENERGY_SENSOR) or printer.get(CONF_PRINTER_ID) or printer[CONF_PRINTING_SENSOR]
+        groups.setdefault(key, []).append(printer)
+    return list(groups.values())
+
+
+class _Replay:
+    """Replay one partition of history through its trackers, like the farm coordinator does live."""
+
+    def __init__(self, config: dict[str, Any]) -> None:
+        """Build the trackers, shared meters and dispatch map of a partition."""
+        self.trackers: dict[str, PrinterTracker] = build_trackers(config)
+        self.meters: dict[str, SharedMeter] = build_shared_meters(
+            self.trackers.values(),
+            config.get(CONF_SHARED_METER_SPLIT, DEFAULT_SHARED_METER_SPLIT),
+        )
+        self.by_entity: dict[str, list[tuple[PrinterTracker, int]]] = {}
+        for tracker in self.trackers.values():
+            self.by_entity.setdefault(tracker.printing_sensor, []).append((tracker, _ROLE_PRINTING))
+            if tracker.energy_sensor and tracker.energy_sensor not in self.meters:
+                self.by_entity.setdefault(tracker.energy_sensor, []).append((tracker, _ROLE_ENERGY))
+            if tracker.material_sensor:
+                self.by_entity.setdefault(tracker.material_sensor, []).append((tracker, _ROLE_MATERIAL))
+            if tracker.power_sensor and tracker.energy_sensor in self.meters:
+                self.by_entity.setdefault(tracker.power_sensor, []).append((tracker, _ROLE_POWER))
+
+        self.energy_cost_sensor = config.get(CONF_ENERGY_COST_SENSOR) or None
+        self.energy_price = float(config.get(CONF_ENERGY_PRICE, 0.0))
+        spool_length = float(int(config.get(CONF_MATERIAL_SPOOL_LENGTH, DEFAULT_SPOOL_LENGTH)))
+        spool_cost = float(config.get(CONF_MATERIAL_COST_PER_SPOOL, DEFAULT_MATERIAL_COST_PER_SPOOL))
+        self.material_cost_per_meter = spool_cost / spool_length if spool_length > 0 else 0.0
+        self.records: list[dict[str, Any]] = []
+
+    def entity_ids(self) -> set[str]:
+        """Return every entity this partition reads."""
+        entity_ids = {*self.by_entity, *self.meters}
+        if self.energy_cost_sensor:
+            entity_ids.add(self.energy_cost_sensor)
+        return entity_ids
+
+    def feed(
+        self, timestamp: float, entity_id: str, state: str | None, attributes: dict[str, Any] | None
+    ) -> None:
+        """Apply one state change, first firing any dwell deadline that passed before it."""
+        self.advance(timestamp)
+        if entity_id == self.energy_cost_sensor:
+            self._set_energy_price(state)
+        meter = self.meters.get(entity_id)
+        if meter is not None:
+            for tracker in meter.add_reading(parse_energy(state, attributes)):
+                self._step(tracker, timestamp)
+            return
+        for tracker, role in self.by_entity.get(entity_id, ()):
+            if role == _ROLE_PRINTING:
+                tracker.classify(state, attributes)
+            elif role == _ROLE_ENERGY:
+                tracker.read_energy(parse_energy(state, attributes), timestamp)
+            elif role == _ROLE_MATERIAL:
+                tracker.read_material(parse_material(state), timestamp)
+            else:
+                tracker.power = parse_power(state, attributes)
+                continue
+            self._step(tracker, timestamp)
+
+    def advance(self, timestamp: float) -> None:
+        """Step every printer whose start or stop deadline is at or before the timestamp."""
+        for tracker in self.trackers.values():
+            deadline = tracker.machine.next_deadline()
+            while deadline is not None and deadline <= timestamp:
+                self._step(tracker, deadline)
+                next_deadline = tracker.machine.next_deadline()
+                if next_deadline == deadline:
+                    break
+                deadline = next_deadline
+
+    def _set_energy_price(self, state: str | None) -> None:
+        """Track the energy price entity; unavailable counts as free, like live."""
+        if state is None or state in UNAVAILABLE_STATES:
+            self.energy_price = 0.0
+            return
+        try:
+            self.energy_price = float(state)
+        except ValueError:
+            self.energy_price = 0.0
+
+    def _step(self, tracker: PrinterTracker, timestamp: float) -> None:
+        """Advance one printer and keep the record of a closed session."""
+        record = tracker.step(timestamp, self.energy_price, self.material_cost_per_meter)
+        meter = self.meters.get(tracker.energy_sensor)
+        if meter is not None:
+            meter.update_active(tracker)
+        if record is not None:
+            self.records.append({"printer_id": tracker.printer_id, "name": tracker.name, **record})
+
+
+def _row_time(row: list[Any]) -> float:
+    """Return the timestamp of a partition row."""
+    return row[0]
+
+
+def iter_sorted_rows(path: str) -> Iterator[list[Any]]:
+    """Stream a partition file in time order, stable for ties.
+
+    Exports are usually grouped by entity. The file is read in runs of
+    ``SORT_RUN_ROWS`` rows; each run is sorted and written next to the
+    file, then the runs are merged lazily, so memory stays bounded by one
+    run whatever the length of the history.
+    """
+    run_paths: list[str] = []
+    with open(path, encoding="utf-8") as handle:
+        while True:
+            run = [json.loads(line) for line in islice(handle, SORT_RUN_ROWS)]
+            if not run:
+                break
+            run.sort(key=_row_time)
+            if not run_paths and len(run) < SORT_RUN_ROWS:
+                # The whole partition fits in one run
+                yield from run
+                return
+            run_path = f"{path}.{len(run_paths)}"
+            with open(run_path, "w", encoding="utf-8") as run_handle:
+                run_handle.writelines(json.dumps(row, separators=(",", ":")) + "\n" for row in run)
+            run_paths.append(run_path)
+    run_handles = [open(run_path, encoding="utf-8") for run_path in run_paths]
+    try:
+        # heapq.merge takes ties from earlier runs first, which keeps the file order
+        yield from heapq.merge(*(map(json.loads, run_handle) for run_handle in run_handles), key=_row_time)
+    finally:
+        for run_handle in run_handles:
+            run_handle.close()
+        for run_path in run_paths:
+            os.remove(run_path)
+
+
+def _process_partition(job: tuple[dict[str, Any], str]) -> tuple[list[dict[str, Any]], list[str]]:
+    """Replay one partition file and return its print records and the printers left printing."""
+    config, path = job
+    replay = _Replay(config)
+    last_timestamp = None
+    for timestamp, entity_id, state, attributes in iter_sorted_rows(path):
+        replay.feed(timestamp, entity_id, state, attributes)
+        last_timestamp = timestamp
+    if last_timestamp is not None:
+        replay.advance(last_timestamp)
+    still_printing = [tracker.printer_id for tracker in replay.trackers.values() if tracker.is_printing]
+    return replay.records, still_printing
+
+
+def summarize_periods(records: list[dict[str, Any]], period: str) -> list[dict[str, Any]]:
+    """Fold print records into per-printer day or month totals, like history compaction."""
+    by_printer: dict[str, list[dict[str, Any]]] = {}
+    for record in records:
+        by_printer.setdefault(record["printer_id"], []).append(record)
+    periods: list[dict[str, Any]] = []
+    for printer_id, printer_records in sorted(by_printer.items()):
+        _, aggregates, _ = compact_history(printer_records, [], [], math.inf, period)
+        name = printer_records[0]["name"]
+        periods.extend({"printer_id": printer_id, "name": name, **aggregate} for aggregate in aggregates)
+    return periods
+
+
+def process_history(
+    config: dict[str, Any],
+    paths: list[str],
+    period: str = COMPACTION_MONTH,
+    workers: int | None = None,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]], list[str]]:
+    """Process history files and return (print records, period totals, printers still printing)."""
+    groups = partition_printers(config)
+    shared = {key: value for key, value in config.items() if key != CONF_PRINTERS}
+    group_configs = [{**shared, CONF_PRINTERS: group} for group in groups]
+
+    # Entity id -> partitions that read it (the price entity goes to all of them)
+    routes: dict[str, list[int]] = {}
+    for index, group_config in enumerate(group_configs):
+        for entity_id in _Replay(group_config).entity_ids():
+            routes.setdefault(entity_id, []).append(index)
+
+    records: list[dict[str, Any]] = []
+    still_printing: list[str] = []
+    with tempfile.TemporaryDirectory(prefix="printer_energy_") as directory:
+        partition_paths = [os.path.join(directory, f"{index}.jsonl") for index in range(len(groups))]
+        handles = [open(path, "w", encoding="utf-8") for path in partition_paths]
+        try:
+            for path in paths:
+                for row in iter_history(path):
+                    targets = routes.get(row[1])
+                    if not targets:
+                        continue
+                    line = json.dumps(row, separators=(",", ":")) + "\n"
+                    for index in targets:
+                        handles[index].write(line)
+        finally:
+            for handle in handles:
+                handle.close()
+
+        jobs = list(zip(group_configs, partition_paths))
+        if workers == 1 or len(jobs) <= 1:
+            results = map(_process_partition, jobs)
+            for partition_records, partition_printing in results:
+                records.extend(partition_records)
+                still_printing.extend(partition_printing)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for partition_records, partition_printing in executor.map(_process_partition, jobs):
+                    records.extend(partition_records)
+                    still_printing.extend(partition_printing)
+
+    records.sort(key=lambda record: (record["printer_id"], record["start"]))
+    return records, summarize_periods(records, period), still_printing
+
+
+def _iso(timestamp: float | None) -> str:
+    """Format an epoch timestamp as UTC ISO 8601."""
+    if timestamp is None:
+        return ""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+def write_results(rows: list[dict[str, Any]], fields: tuple[str, ...], path: str, output_format: str) -> None:
+    """Write result rows as CSV or JSONL, with times in UTC ISO 8601 and unrounded numbers."""
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fields, extrasaction="ignore") if output_format == "csv" else None
+        if writer is not None:
+            writer.writeheader()
+        for row in rows:
+            out = {field: row.get(field) for field in fields}
+            out["start"] = _iso(row.get("start"))
+            out["end"] = _iso(row.get("end"))
+            if "duration" in fields and "duration" not in row:
+                out["duration"] = row["end"] - row["start"]
+            if writer is not None:
+                writer.writerow(out)
+            else:
+                handle.write(json.dumps(out) + "\n")
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(
+        description="Compute 3D printer energy and cost per print from exported Home Assistant history."
+    )
+    parser.add_argument("history", nargs="+", help="CSV or JSONL history files (optionally .gz)")
+    parser.add_argument("--config", required=True, help="JSON file with the farm settings and printers")
+    parser.add_argument("--output", default=".", help="Directory for the result files")
+    parser.add_argument("--period", choices=COMPACTION_PERIODS, default=COMPACTION_MONTH)
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv", dest="output_format")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    with open(args.config, encoding="utf-8") as handle:
+        config = json.load(handle)
+    if not config.get(CONF_PRINTERS):
+        parser.error("config has no printers")
+
+    records, periods, still_printing = process_history(config, args.history, args.period, args.workers)
+
+    os.makedirs(args.output, exist_ok=True)
+    write_results(records, PRINT_FIELDS, os.path.join(args.output, f"prints.{args.output_format}"), args.output_format)
+    write_results(periods, PERIOD_FIELDS, os.path.join(args.output, f"periods.{args.output_format}"), args.output_format)
+    print(f"{len(records)} prints in {len(periods)} printer {args.period}s written to {args.output}")
+    if still_printing:
+        print(f"Still printing at the end of the history (not counted): {', '.join(still_printing)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
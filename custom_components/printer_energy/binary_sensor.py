@@ -0,0 +1,120 @@
+"""Binary sensor platform for Printer Energy integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.binary_sensor import BinarySensorDeviceClass, BinarySensorEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_NAME
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import (
+    ATTR_ANOMALIES,
+    ATTR_SPOOL_LOW_REMAINING,
+    ATTR_SPOOL_NAME,
+    ATTR_SPOOL_REMAINING,
+    BINARY_SENSOR_ACTIVE_SPOOL_LOW,
+    BINARY_SENSOR_PRINT_ANOMALY,
+    DOMAIN,
+)
+from .coordinator import PrinterEnergyCoordinator
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the printer energy binary sensors."""
+    coordinator: PrinterEnergyCoordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    async_add_entities(
+        [
+            ActiveSpoolLowBinarySensor(coordinator, config_entry),
+            PrintAnomalyBinarySensor(coordinator, config_entry),
+        ]
+    )
+
+
+class ActiveSpoolLowBinarySensor(CoordinatorEntity, BinarySensorEntity):
+    """On when the printer's active spool is running out."""
+
+    _attr_has_entity_name = True
+    _attr_name = "Active Spool Low"
+    _attr_icon = "mdi:printer-3d-nozzle-alert"
+
+    def __init__(
+        self,
+        coordinator: PrinterEnergyCoordinator,
+        config_entry: ConfigEntry,
+    ) -> None:
+        """Initialize the binary sensor."""
+        super().__init__(coordinator)
+        self.config_entry = config_entry
+        device_name = config_entry.data.get(CONF_NAME, config_entry.title or "3D Printer Cost Tracker")
+        self._attr_unique_id = f"{config_entry.entry_id}_{BINARY_SENSOR_ACTIVE_SPOOL_LOW}"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, config_entry.entry_id)},
+            "name": device_name,
+            "manufacturer": "Custom",
+            "model": "3D Printer Cost Tracker",
+        }
+
+    @property
+    def is_on(self) -> bool | None:
+        """Return True when the remaining length is at or below the spool's threshold."""
+        spool = self.coordinator.data.get("active_spool") if self.coordinator.data else None
+        if spool is None:
+            return None
+        return spool["remaining"] <= spool["low_remaining"]
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the active spool's name and lengths."""
+        spool = self.coordinator.data.get("active_spool") if self.coordinator.data else None
+        if spool is None:
+            return None
+        return {
+            ATTR_SPOOL_NAME: spool["name"],
+            ATTR_SPOOL_REMAINING: spool["remaining"],
+            ATTR_SPOOL_LOW_REMAINING: spool["low_remaining"],
+        }
+
+
+class PrintAnomalyBinarySensor(CoordinatorEntity, BinarySensorEntity):
+    """On while the running print has an energy or material anomaly."""
+
+    _attr_has_entity_name = True
+    _attr_name = "Print Anomaly"
+    _attr_device_class = BinarySensorDeviceClass.PROBLEM
+
+    def __init__(
+        self,
+        coordinator: PrinterEnergyCoordinator,
+        config_entry: ConfigEntry,
+    ) -> None:
+        """Initialize the binary sensor."""
+        super().__init__(coordinator)
+        self.config_entry = config_entry
+        device_name = config_entry.data.get(CONF_NAME, config_entry.title or "3D Printer Cost Tracker")
+        self._attr_unique_id = f"{config_entry.entry_id}_{BINARY_SENSOR_PRINT_ANOMALY}"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, config_entry.entry_id)},
+            "name": device_name,
+            "manufacturer": "Custom",
+            "model": "3D Printer Cost Tracker",
+        }
+
+    @property
+    def is_on(self) -> bool:
+        """Return True when an anomaly was raised during the running print."""
+        return bool(self.coordinator.data and self.coordinator.data.get("anomalies"))
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the anomalies of the running print."""
+        anomalies = self.coordinator.data.get("anomalies", []) if self.coordinator.data else []
+        return {ATTR_ANOMALIES: anomalies}
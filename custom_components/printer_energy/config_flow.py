@@ -8,47 +8,109 @@ from homeassistant import config_entries
 from homeassistant.core import callback
 from homeassistant.const import CONF_NAME
 from homeassistant.helpers import selector
+from homeassistant.util import slugify
 
 from .const import (
+    ATTRIBUTE_POLICIES,
+    COMPACTION_PERIODS,
+    CONF_ADD_ANOTHER,
+    CONF_ATTRIBUTE_POLICY,
     CONF_ENERGY_COST_SENSOR,
     CONF_ENERGY_SENSOR,
+    CONF_ENERGY_SOURCES,
+    CONF_ESTIMATED_MATERIAL_SENSOR,
+    CONF_ESTIMATED_TIME_SENSOR,
+    CONF_FARM,
+    CONF_FILE_NAME_SENSOR,
+    CONF_HISTORY_COMPACTION,
+    CONF_HISTORY_RETENTION,
+    CONF_JOB_NAME_SENSOR,
     CONF_MATERIAL_COST_PER_SPOOL,
     CONF_MATERIAL_SENSOR,
     CONF_MATERIAL_SPOOL_LENGTH,
+    CONF_NAMEPLATE_POWER,
+    CONF_PAUSE_RULE,
+    CONF_PAUSE_STATE,
+    CONF_POWER_SENSOR,
+    CONF_PRINTER_ID,
+    CONF_PRINTERS,
+    CONF_PRINTING_RULE,
     CONF_PRINTING_SENSOR,
     CONF_PRINTING_STATE,
+    CONF_PROGRESS_SENSOR,
+    CONF_REMAINING_TIME_SENSOR,
+    CONF_SHARED_METER_SPLIT,
+    CONF_START_DWELL,
+    CONF_STOP_DWELL,
+    CONF_UNAVAILABLE_GRACE,
+    DEFAULT_ATTRIBUTE_POLICY,
+    DEFAULT_HISTORY_COMPACTION,
+    DEFAULT_HISTORY_RETENTION,
     DEFAULT_MATERIAL_COST_PER_SPOOL,
+    DEFAULT_PAUSE_STATE,
     DEFAULT_PRINTING_STATE,
+    DEFAULT_SHARED_METER_SPLIT,
     DEFAULT_SPOOL_LENGTH,
+    DEFAULT_START_DWELL,
+    DEFAULT_STOP_DWELL,
+    DEFAULT_UNAVAILABLE_GRACE,
     DOMAIN,
+    SHARED_METER_SPLITS,
 )
+from .rules import RuleError, compile_rule
 
 
+def _validate_rules(user_input: dict) -> dict[str, str]:
+    """Return form errors for printing and pause rules that do not compile."""
+    errors = {}
+    for key in (CONF_PRINTING_RULE, CONF_PAUSE_RULE):
+        try:
+            compile_rule(user_input.get(key))
+        except RuleError:
+            errors[key] = "invalid_rule"
+    return errors
+
 class PrinterEnergyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Printer Energy."""
 
     VERSION = 4
 
+    def __init__(self) -> None:
+        """Initialize the config flow."""
+        self._farm: dict | None = None
+
     async def async_step_user(self, user_input=None):
-        """Handle the initial step."""
+        """Choose between tracking one printer and a printer farm."""
+        return self.async_show_menu(step_id="user", menu_options=["printer", "farm"])
+
+    async def async_step_printer(self, user_input=None):
+        """Handle setup of a single printer."""
         errors = {}
 
         if user_input is not None:
             # Validate the sensors exist
-            energy_sensor = user_input[CONF_ENERGY_SENSOR]
+            energy_sensor = user_input.get(CONF_ENERGY_SENSOR)
+            power_sensor = user_input.get(CONF_POWER_SENSOR)
             printing_sensor = user_input[CONF_PRINTING_SENSOR]
             material_sensor = user_input.get(CONF_MATERIAL_SENSOR)
 
             energy_cost_sensor = user_input.get(CONF_ENERGY_COST_SENSOR)
 
-            if self.hass.states.get(energy_sensor) is None:
+            if not energy_sensor and not power_sensor:
+                # Need either a cumulative energy meter or a power sensor to integrate
+                errors["base"] = "energy_source_required"
+            elif energy_sensor and self.hass.states.get(energy_sensor) is None:
                 errors[CONF_ENERGY_SENSOR] = "entity_not_found"
+            elif power_sensor and self.hass.states.get(power_sensor) is None:
+                errors[CONF_POWER_SENSOR] = "entity_not_found"
             elif self.hass.states.get(printing_sensor) is None:
                 errors[CONF_PRINTING_SENSOR] = "entity_not_found"
             elif material_sensor and material_sensor.strip() and self.hass.states.get(material_sensor) is None:
                 errors[CONF_MATERIAL_SENSOR] = "entity_not_found"
             elif energy_cost_sensor and energy_cost_sensor.strip() and self.hass.states.get(energy_cost_sensor) is None:
                 errors[CONF_ENERGY_COST_SENSOR] = "entity_not_found"
+            elif any(self.hass.states.get(source) is None for source in user_input.get(CONF_ENERGY_SOURCES) or []):
+                errors[CONF_ENERGY_SOURCES] = "entity_not_found"
             else:
                 # Clean up sensor values - remove if empty
                 if material_sensor and not material_sensor.strip():
@@ -62,7 +124,7 @@ class PrinterEnergyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     user_input[CONF_ENERGY_COST_SENSOR] = energy_cost_sensor.strip()
                 
                 # Check for duplicate entries
-                unique_id_parts = [energy_sensor, printing_sensor]
+                unique_id_parts = [energy_sensor or power_sensor, printing_sensor]
                 if user_input.get(CONF_MATERIAL_SENSOR):
                     unique_id_parts.append(user_input[CONF_MATERIAL_SENSOR])
                 await self.async_set_unique_id("_".join(unique_id_parts))
@@ -76,12 +138,24 @@ class PrinterEnergyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         schema = vol.Schema(
             {
                 vol.Optional(CONF_NAME, default="3D Printer Cost Tracker"): str,
-                vol.Required(CONF_ENERGY_SENSOR): selector.EntitySelector(
+                vol.Optional(CONF_ENERGY_SENSOR): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain="sensor",
+                        multiple=False,
+                    )
+                ),
+                vol.Optional(CONF_POWER_SENSOR): selector.EntitySelector(
                     selector.EntitySelectorConfig(
                         domain="sensor",
                         multiple=False,
                     )
                 ),
+                vol.Optional(CONF_ENERGY_SOURCES): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain="sensor",
+                        multiple=True,
+                    )
+                ),
                 vol.Required(CONF_PRINTING_SENSOR): selector.EntitySelector(
                     selector.EntitySelectorConfig(
                         domain=["binary_sensor", "sensor"],
@@ -91,6 +165,9 @@ class PrinterEnergyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Optional(
                     CONF_PRINTING_STATE, default=DEFAULT_PRINTING_STATE
                 ): str,
+                vol.Optional(
+                    CONF_PAUSE_STATE, default=DEFAULT_PAUSE_STATE
+                ): str,
                 vol.Optional(CONF_MATERIAL_SENSOR): selector.EntitySelector(
                     selector.EntitySelectorConfig(
                         domain="sensor",
@@ -111,10 +188,170 @@ class PrinterEnergyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     CONF_MATERIAL_SPOOL_LENGTH,
                     default=DEFAULT_SPOOL_LENGTH,
                 ): vol.Coerce(float),
+                vol.Optional(CONF_PROGRESS_SENSOR): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain=["sensor", "number"],
+                        multiple=False,
+                    )
+                ),
+                vol.Optional(CONF_REMAINING_TIME_SENSOR): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain="sensor",
+                        multiple=False,
+                    )
+                ),
+                vol.Optional(CONF_JOB_NAME_SENSOR): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain=["sensor", "text", "input_text"],
+                        multiple=False,
+                    )
+                ),
+                vol.Optional(CONF_FILE_NAME_SENSOR): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain=["sensor", "text", "input_text"],
+                        multiple=False,
+                    )
+                ),
+                vol.Optional(CONF_ESTIMATED_TIME_SENSOR): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain="sensor",
+                        multiple=False,
+                    )
+                ),
+                vol.Optional(CONF_ESTIMATED_MATERIAL_SENSOR): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain="sensor",
+                        multiple=False,
+                    )
+                ),
             }
         )
 
-        return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
+        return self.async_show_form(step_id="printer", data_schema=schema, errors=errors)
+
+    async def async_step_farm(self, user_input=None):
+        """Handle the shared settings of a printer farm."""
+        errors = {}
+
+        if user_input is not None:
+            energy_cost_sensor = user_input.get(CONF_ENERGY_COST_SENSOR)
+            if energy_cost_sensor and self.hass.states.get(energy_cost_sensor) is None:
+                errors[CONF_ENERGY_COST_SENSOR] = "entity_not_found"
+            else:
+                await self.async_set_unique_id(f"farm_{slugify(user_input[CONF_NAME])}")
+                self._abort_if_unique_id_configured()
+                self._farm = {**user_input, CONF_FARM: True, CONF_PRINTERS: []}
+                return await self.async_step_farm_printer()
+
+        schema = vol.Schema(
+            {
+                vol.Required(CONF_NAME, default="3D Printer Farm"): str,
+                vol.Optional(
+                    CONF_PRINTING_STATE, default=DEFAULT_PRINTING_STATE
+                ): str,
+                vol.Optional(
+                    CONF_PAUSE_STATE, default=DEFAULT_PAUSE_STATE
+                ): str,
+                vol.Optional(CONF_ENERGY_COST_SENSOR): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain=["sensor", "number"],
+                        multiple=False,
+                    )
+                ),
+                vol.Optional(
+                    CONF_MATERIAL_COST_PER_SPOOL,
+                    default=DEFAULT_MATERIAL_COST_PER_SPOOL,
+                ): vol.Coerce(float),
+                vol.Optional(
+                    CONF_MATERIAL_SPOOL_LENGTH,
+                    default=DEFAULT_SPOOL_LENGTH,
+                ): vol.Coerce(float),
+                vol.Optional(
+                    CONF_SHARED_METER_SPLIT, default=DEFAULT_SHARED_METER_SPLIT
+                ): vol.In(SHARED_METER_SPLITS),
+            }
+        )
+
+        return self.async_show_form(step_id="farm", data_schema=schema, errors=errors)
+
+    async def async_step_farm_printer(self, user_input=None):
+        """Add one printer to the farm; repeats until no more printers are added."""
+        errors = {}
+        printers = self._farm[CONF_PRINTERS]
+
+        if user_input is not None:
+            printing_sensor = user_input[CONF_PRINTING_SENSOR]
+            energy_sensor = user_input[CONF_ENERGY_SENSOR]
+            material_sensor = user_input.get(CONF_MATERIAL_SENSOR)
+            power_sensor = user_input.get(CONF_POWER_SENSOR)
+            if self.hass.states.get(printing_sensor) is None:
+                errors[CONF_PRINTING_SENSOR] = "entity_not_found"
+            elif self.hass.states.get(energy_sensor) is None:
+                errors[CONF_ENERGY_SENSOR] = "entity_not_found"
+            elif material_sensor and self.hass.states.get(material_sensor) is None:
+                errors[CONF_MATERIAL_SENSOR] = "entity_not_found"
+            elif power_sensor and self.hass.states.get(power_sensor) is None:
+                errors[CONF_POWER_SENSOR] = "entity_not_found"
+            elif any(printer[CONF_PRINTING_SENSOR] == printing_sensor for printer in printers):
+                errors[CONF_PRINTING_SENSOR] = "already_configured"
+            else:
+                # Stable id per printer, used for its device and entity unique ids
+                used_ids = {printer[CONF_PRINTER_ID] for printer in printers}
+                base_id = slugify(user_input[CONF_NAME]) or "printer"
+                printer_id = base_id
+                suffix = 2
+                while printer_id in used_ids:
+                    printer_id = f"{base_id}_{suffix}"
+                    suffix += 1
+                printers.append(
+                    {
+                        CONF_PRINTER_ID: printer_id,
+                        CONF_NAME: user_input[CONF_NAME],
+                        CONF_PRINTING_SENSOR: printing_sensor,
+                        CONF_ENERGY_SENSOR: energy_sensor,
+                        CONF_MATERIAL_SENSOR: material_sensor or None,
+                        CONF_POWER_SENSOR: power_sensor or None,
+                        CONF_NAMEPLATE_POWER: user_input.get(CONF_NAMEPLATE_POWER),
+                    }
+                )
+                if user_input.get(CONF_ADD_ANOTHER):
+                    return await self.async_step_farm_printer()
+                return self.async_create_entry(title=self._farm[CONF_NAME], data=self._farm)
+
+        schema = vol.Schema(
+            {
+                vol.Required(CONF_NAME, default=f"Printer {len(printers) + 1}"): str,
+                vol.Required(CONF_PRINTING_SENSOR): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain=["binary_sensor", "sensor"],
+                        multiple=False,
+                    )
+                ),
+                vol.Required(CONF_ENERGY_SENSOR): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain="sensor",
+                        multiple=False,
+                    )
+                ),
+                vol.Optional(CONF_MATERIAL_SENSOR): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain="sensor",
+                        multiple=False,
+                    )
+                ),
+                # Only used to split an energy sensor shared with other printers
+                vol.Optional(CONF_POWER_SENSOR): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain="sensor",
+                        multiple=False,
+                    )
+                ),
+                vol.Optional(CONF_NAMEPLATE_POWER): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(CONF_ADD_ANOTHER, default=True): bool,
+            }
+        )
+
+        return self.async_show_form(step_id="farm_printer", data_schema=schema, errors=errors)
 
     @staticmethod
     @callback
@@ -132,8 +369,13 @@ class PrinterEnergyOptionsFlowHandler(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input=None):
         """Manage the options."""
+        if self.config_entry.data.get(CONF_FARM):
+            return await self.async_step_farm(user_input)
+        errors = {}
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            errors = _validate_rules(user_input)
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
 
         schema = vol.Schema(
             {
@@ -146,6 +388,48 @@ class PrinterEnergyOptionsFlowHandler(config_entries.OptionsFlow):
                         ),
                     ),
                 ): str,
+                vol.Optional(
+                    CONF_PAUSE_STATE,
+                    default=self.config_entry.options.get(
+                        CONF_PAUSE_STATE,
+                        self.config_entry.data.get(CONF_PAUSE_STATE, DEFAULT_PAUSE_STATE),
+                    ),
+                ): str,
+                vol.Optional(
+                    CONF_PRINTING_RULE,
+                    default=self.config_entry.options.get(
+                        CONF_PRINTING_RULE,
+                        self.config_entry.data.get(CONF_PRINTING_RULE, ""),
+                    ),
+                ): str,
+                vol.Optional(
+                    CONF_PAUSE_RULE,
+                    default=self.config_entry.options.get(
+                        CONF_PAUSE_RULE,
+                        self.config_entry.data.get(CONF_PAUSE_RULE, ""),
+                    ),
+                ): str,
+                vol.Optional(
+                    CONF_START_DWELL,
+                    default=self.config_entry.options.get(
+                        CONF_START_DWELL,
+                        self.config_entry.data.get(CONF_START_DWELL, DEFAULT_START_DWELL),
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_STOP_DWELL,
+                    default=self.config_entry.options.get(
+                        CONF_STOP_DWELL,
+                        self.config_entry.data.get(CONF_STOP_DWELL, DEFAULT_STOP_DWELL),
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_UNAVAILABLE_GRACE,
+                    default=self.config_entry.options.get(
+                        CONF_UNAVAILABLE_GRACE,
+                        self.config_entry.data.get(CONF_UNAVAILABLE_GRACE, DEFAULT_UNAVAILABLE_GRACE),
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
                 vol.Optional(
                     CONF_MATERIAL_SENSOR,
                     default=self.config_entry.options.get(
@@ -158,6 +442,217 @@ class PrinterEnergyOptionsFlowHandler(config_entries.OptionsFlow):
                         multiple=False,
                     )
                 ),
+                vol.Optional(
+                    CONF_POWER_SENSOR,
+                    default=self.config_entry.options.get(
+                        CONF_POWER_SENSOR,
+                        self.config_entry.data.get(CONF_POWER_SENSOR, ""),
+                    ),
+                ): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain="sensor",
+                        multiple=False,
+                    )
+                ),
+                vol.Optional(
+                    CONF_ENERGY_SOURCES,
+                    default=self.config_entry.options.get(
+                        CONF_ENERGY_SOURCES,
+                        self.config_entry.data.get(CONF_ENERGY_SOURCES, []),
+                    ),
+                ): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain="sensor",
+                        multiple=True,
+                    )
+                ),
+                vol.Optional(
+                    CONF_ENERGY_COST_SENSOR,
+                    default=self.config_entry.options.get(
+                        CONF_ENERGY_COST_SENSOR,
+                        self.config_entry.data.get(CONF_ENERGY_COST_SENSOR, ""),
+                    ),
+                ): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain=["sensor", "number"],
+                        multiple=False,
+                    )
+                ),
+                vol.Optional(
+                    CONF_MATERIAL_COST_PER_SPOOL,
+                    default=self.config_entry.options.get(
+                        CONF_MATERIAL_COST_PER_SPOOL,
+                        self.config_entry.data.get(CONF_MATERIAL_COST_PER_SPOOL, DEFAULT_MATERIAL_COST_PER_SPOOL),
+                    ),
+                ): vol.Coerce(float),
+                vol.Optional(
+                    CONF_MATERIAL_SPOOL_LENGTH,
+                    default=self.config_entry.options.get(
+                        CONF_MATERIAL_SPOOL_LENGTH,
+                        self.config_entry.data.get(
+                            CONF_MATERIAL_SPOOL_LENGTH, DEFAULT_SPOOL_LENGTH
+                        ),
+                    ),
+                ): vol.Coerce(float),
+                vol.Optional(
+                    CONF_PROGRESS_SENSOR,
+                    default=self.config_entry.options.get(
+                        CONF_PROGRESS_SENSOR,
+                        self.config_entry.data.get(CONF_PROGRESS_SENSOR, ""),
+                    ),
+                ): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain=["sensor", "number"],
+                        multiple=False,
+                    )
+                ),
+                vol.Optional(
+                    CONF_REMAINING_TIME_SENSOR,
+                    default=self.config_entry.options.get(
+                        CONF_REMAINING_TIME_SENSOR,
+                        self.config_entry.data.get(CONF_REMAINING_TIME_SENSOR, ""),
+                    ),
+                ): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain="sensor",
+                        multiple=False,
+                    )
+                ),
+                vol.Optional(
+                    CONF_JOB_NAME_SENSOR,
+                    default=self.config_entry.options.get(
+                        CONF_JOB_NAME_SENSOR,
+                        self.config_entry.data.get(CONF_JOB_NAME_SENSOR, ""),
+                    ),
+                ): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain=["sensor", "text", "input_text"],
+                        multiple=False,
+                    )
+                ),
+                vol.Optional(
+                    CONF_FILE_NAME_SENSOR,
+                    default=self.config_entry.options.get(
+                        CONF_FILE_NAME_SENSOR,
+                        self.config_entry.data.get(CONF_FILE_NAME_SENSOR, ""),
+                    ),
+                ): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain=["sensor", "text", "input_text"],
+                        multiple=False,
+                    )
+                ),
+                vol.Optional(
+                    CONF_ESTIMATED_TIME_SENSOR,
+                    default=self.config_entry.options.get(
+                        CONF_ESTIMATED_TIME_SENSOR,
+                        self.config_entry.data.get(CONF_ESTIMATED_TIME_SENSOR, ""),
+                    ),
+                ): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain="sensor",
+                        multiple=False,
+                    )
+                ),
+                vol.Optional(
+                    CONF_ESTIMATED_MATERIAL_SENSOR,
+                    default=self.config_entry.options.get(
+                        CONF_ESTIMATED_MATERIAL_SENSOR,
+                        self.config_entry.data.get(CONF_ESTIMATED_MATERIAL_SENSOR, ""),
+                    ),
+                ): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain="sensor",
+                        multiple=False,
+                    )
+                ),
+                vol.Optional(
+                    CONF_ATTRIBUTE_POLICY,
+                    default=self.config_entry.options.get(
+                        CONF_ATTRIBUTE_POLICY,
+                        self.config_entry.data.get(CONF_ATTRIBUTE_POLICY, DEFAULT_ATTRIBUTE_POLICY),
+                    ),
+                ): vol.In(ATTRIBUTE_POLICIES),
+                vol.Optional(
+                    CONF_HISTORY_RETENTION,
+                    default=self.config_entry.options.get(
+                        CONF_HISTORY_RETENTION,
+                        self.config_entry.data.get(CONF_HISTORY_RETENTION, DEFAULT_HISTORY_RETENTION),
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_HISTORY_COMPACTION,
+                    default=self.config_entry.options.get(
+                        CONF_HISTORY_COMPACTION,
+                        self.config_entry.data.get(CONF_HISTORY_COMPACTION, DEFAULT_HISTORY_COMPACTION),
+                    ),
+                ): vol.In(COMPACTION_PERIODS),
+            }
+        )
+
+        return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
+
+    async def async_step_farm(self, user_input=None):
+        """Manage the shared options of a printer farm."""
+        errors = {}
+        if user_input is not None:
+            errors = _validate_rules(user_input)
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
+
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_PRINTING_STATE,
+                    default=self.config_entry.options.get(
+                        CONF_PRINTING_STATE,
+                        self.config_entry.data.get(
+                            CONF_PRINTING_STATE, DEFAULT_PRINTING_STATE
+                        ),
+                    ),
+                ): str,
+                vol.Optional(
+                    CONF_PAUSE_STATE,
+                    default=self.config_entry.options.get(
+                        CONF_PAUSE_STATE,
+                        self.config_entry.data.get(CONF_PAUSE_STATE, DEFAULT_PAUSE_STATE),
+                    ),
+                ): str,
+                vol.Optional(
+                    CONF_PRINTING_RULE,
+                    default=self.config_entry.options.get(
+                        CONF_PRINTING_RULE,
+                        self.config_entry.data.get(CONF_PRINTING_RULE, ""),
+                    ),
+                ): str,
+                vol.Optional(
+                    CONF_PAUSE_RULE,
+                    default=self.config_entry.options.get(
+                        CONF_PAUSE_RULE,
+                        self.config_entry.data.get(CONF_PAUSE_RULE, ""),
+                    ),
+                ): str,
+                vol.Optional(
+                    CONF_START_DWELL,
+                    default=self.config_entry.options.get(
+                        CONF_START_DWELL,
+                        self.config_entry.data.get(CONF_START_DWELL, DEFAULT_START_DWELL),
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_STOP_DWELL,
+                    default=self.config_entry.options.get(
+                        CONF_STOP_DWELL,
+                        self.config_entry.data.get(CONF_STOP_DWELL, DEFAULT_STOP_DWELL),
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_UNAVAILABLE_GRACE,
+                    default=self.config_entry.options.get(
+                        CONF_UNAVAILABLE_GRACE,
+                        self.config_entry.data.get(CONF_UNAVAILABLE_GRACE, DEFAULT_UNAVAILABLE_GRACE),
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
                 vol.Optional(
                     CONF_ENERGY_COST_SENSOR,
                     default=self.config_entry.options.get(
@@ -186,7 +681,14 @@ class PrinterEnergyOptionsFlowHandler(config_entries.OptionsFlow):
                         ),
                     ),
                 ): vol.Coerce(float),
+                vol.Optional(
+                    CONF_SHARED_METER_SPLIT,
+                    default=self.config_entry.options.get(
+                        CONF_SHARED_METER_SPLIT,
+                        self.config_entry.data.get(CONF_SHARED_METER_SPLIT, DEFAULT_SHARED_METER_SPLIT),
+                    ),
+                ): vol.In(SHARED_METER_SPLITS),
             }
         )
 
-        return self.async_show_form(step_id="init", data_schema=schema)
+        return self.async_show_form(step_id="farm", data_schema=schema, errors=errors)
@@ -5,26 +5,194 @@ STORAGE_KEY = f"{DOMAIN}.storage"
 STORAGE_VERSION = 1
 
 CONF_ENERGY_SENSOR = "energy_sensor"
+CONF_POWER_SENSOR = "power_sensor"
+CONF_ENERGY_SOURCES = "energy_sources"  # Additional energy meters summed into the session
 CONF_PRINTING_SENSOR = "printing_sensor"
 CONF_PRINTING_STATE = "printing_state"
+CONF_PAUSE_STATE = "pause_state"
+CONF_PRINTING_RULE = "printing_rule"  # Optional rule replacing the printing state list
+CONF_PAUSE_RULE = "pause_rule"  # Optional rule replacing the pause state list
+CONF_START_DWELL = "start_dwell"
+CONF_STOP_DWELL = "stop_dwell"
+CONF_UNAVAILABLE_GRACE = "unavailable_grace"
+CONF_ATTRIBUTE_POLICY = "attribute_policy"
+CONF_JOB_NAME_SENSOR = "job_name_sensor"
+CONF_FILE_NAME_SENSOR = "file_name_sensor"
+CONF_ESTIMATED_TIME_SENSOR = "estimated_time_sensor"
+CONF_ESTIMATED_MATERIAL_SENSOR = "estimated_material_sensor"
+CONF_HISTORY_RETENTION = "history_retention_months"
+CONF_HISTORY_COMPACTION = "history_compaction"
 CONF_MATERIAL_SENSOR = "material_sensor"
 CONF_ENERGY_COST_SENSOR = "energy_cost_sensor"
 CONF_MATERIAL_COST_PER_SPOOL = "material_cost_per_spool"
 CONF_MATERIAL_SPOOL_LENGTH = "material_spool_length"
+CONF_PROGRESS_SENSOR = "progress_sensor"
+CONF_REMAINING_TIME_SENSOR = "remaining_time_sensor"
+CONF_FARM = "farm"
+CONF_PRINTERS = "printers"
+CONF_PRINTER_ID = "printer_id"
+CONF_ADD_ANOTHER = "add_another"
+CONF_NAMEPLATE_POWER = "nameplate_power"
+CONF_SHARED_METER_SPLIT = "shared_meter_split"
 
 DEFAULT_PRINTING_STATE = "on,printing,self-check"
+DEFAULT_PAUSE_STATE = "pause,paused,pausing"
+DEFAULT_START_DWELL = 10  # Seconds printing must persist before a session starts
+DEFAULT_STOP_DWELL = 30  # Seconds idle must persist before a session stops
+DEFAULT_UNAVAILABLE_GRACE = 300  # Seconds the printing sensor may be unavailable mid-print
+
+# Which extra state attributes sensors expose (and the recorder stores)
+ATTRIBUTE_POLICY_FULL = "full"
+ATTRIBUTE_POLICY_MINIMAL = "minimal"
+ATTRIBUTE_POLICY_NONE = "none"
+ATTRIBUTE_POLICIES = [ATTRIBUTE_POLICY_FULL, ATTRIBUTE_POLICY_MINIMAL, ATTRIBUTE_POLICY_NONE]
+DEFAULT_ATTRIBUTE_POLICY = ATTRIBUTE_POLICY_FULL
 DEFAULT_MATERIAL_COST_PER_SPOOL = 2600.0  # Default material cost per spool
 DEFAULT_SPOOL_LENGTH = 330.0  # 330 meters per spool (common default)
 
 # Hardcoded energy attribute - always use "total_increased"
 ENERGY_ATTRIBUTE = "total_increased"
 
+# Power integration mode (power sensor without a cumulative energy meter)
+POWER_MAX_GAP = 300  # Seconds to hold last power when the power sensor drops out
+POWER_CROSS_CHECK_TOLERANCE = 0.1  # Relative deviation between meter and integrated power
+POWER_CROSS_CHECK_MIN_ENERGY = 0.01  # kWh, skip cross-check for tiny sessions
+
+# Print phase segmentation
+PHASE_HEAT_UP = "heat_up"
+PHASE_PRINTING = "printing"
+PHASE_COOL_DOWN = "cool_down"
+PHASE_IDLE = "idle"
+PHASES = [PHASE_HEAT_UP, PHASE_PRINTING, PHASE_COOL_DOWN, PHASE_IDLE]
+PHASE_SMOOTHING_SECONDS = 60.0  # EWMA time constant applied to power before change detection
+PHASE_CUSUM_DRIFT = 0.2  # Relative level change ignored by the change-point test
+PHASE_CUSUM_THRESHOLD = 2.0  # Accumulated relative deviation that signals a change point
+PHASE_MIN_SEGMENT_SECONDS = 60.0  # Minimum segment length before another change point
+PHASE_IDLE_POWER = 15.0  # W, below this the printer is cooling down or idle
+PHASE_COOL_DOWN_RATIO = 0.5  # Drop below this fraction of printing power means cool-down
+PHASE_HEAT_UP_MAX_SECONDS = 1800.0  # Assume printing if heat-up never shows a clear drop
+
+# Closing a print that ended while Home Assistant was down
+RECONCILE_ENERGY_WINDOW = 900  # Seconds around the real end searched for the closest meter reading
+LAST_SEEN_SAVE_INTERVAL = 60  # Seconds between saves of a running print's last seen time
+LAST_SEEN_SAVE_DELAY = 10  # Seconds a last seen save waits to batch with other writes
+
+# Cost forecasting for the running print
+FORECAST_MIN_PRINTS = 2  # Past prints needed before the fitted rates are used
+FORECAST_UPDATE_INTERVAL = 60  # Seconds between forecast refreshes
+
+# Cheapest start planning from price forecasts
+PLANNER_HORIZON = 86400  # Seconds ahead searched for the best start sensor
+
+# Per-print history
+HISTORY_STORAGE_VERSION = 1
+HISTORY_SAVE_DELAY = 10  # Seconds to batch history writes
+DEFAULT_HISTORY_RETENTION = 12  # Months of raw print records to keep (0 keeps all)
+COMPACTION_DAY = "day"
+COMPACTION_MONTH = "month"
+COMPACTION_PERIODS = [COMPACTION_DAY, COMPACTION_MONTH]
+DEFAULT_HISTORY_COMPACTION = COMPACTION_DAY
+
+# Per-print power curve
+CURVE_MAX_POINTS = 512  # Point budget per print (about 4 KB stored)
+CURVE_BUCKET_SECONDS = 10.0  # Initial bucket width, doubled whenever the budget is hit
+
+# Rolling-window efficiency of recent prints
+ROLLING_PRINTS = 20  # Prints in the last-prints window
+ROLLING_DAYS = 7  # Days in the last-days window
+ROLLING_BUCKET_SECONDS = 3600  # Width of one slot of the last-days window
+
+# Farm mode: many printers in one entry, one coordinator and one store
+FARM_STORAGE_VERSION = 1
+FARM_SAVE_DELAY = 10  # Seconds to batch farm writes
+
+# Splitting a meter shared by several printers in a farm
+SPLIT_EQUAL = "equal"
+SPLIT_NAMEPLATE = "nameplate"
+SPLIT_POWER = "power"
+SHARED_METER_SPLITS = [SPLIT_EQUAL, SPLIT_NAMEPLATE, SPLIT_POWER]
+DEFAULT_SHARED_METER_SPLIT = SPLIT_EQUAL
+METER_UNITS_PER_KWH = 1_000_000  # Integer units (mWh) a shared meter delta is split in
+
+# Spool inventory, shared by all printers
+SPOOL_STORAGE_KEY = f"{DOMAIN}.spools"
+SPOOL_STORAGE_VERSION = 1
+SPOOL_SAVE_DELAY = 10  # Seconds to batch spool writes
+DEFAULT_SPOOL_LOW_REMAINING = 20.0  # Meters left when a spool counts as low
+SPOOL_NONE_OPTION = "None"  # Select option for printers without an active spool
+DATA_SPOOL_REGISTRY = f"{DOMAIN}_spools"
+
+# Services
+SERVICE_GET_STATISTICS = "get_statistics"
+SERVICE_ADD_SPOOL = "add_spool"
+SERVICE_UPDATE_SPOOL = "update_spool"
+SERVICE_REMOVE_SPOOL = "remove_spool"
+SERVICE_LIST_SPOOLS = "list_spools"
+SERVICE_GET_FILE_COSTS = "get_file_costs"
+SERVICE_FIND_CHEAPEST_START = "find_cheapest_start"
+SERVICE_REPRICE = "reprice"
+SERVICE_ESTIMATE_PRINT = "estimate_print"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_FILE_NAME = "file_name"
+ATTR_DURATION = "duration"
+ATTR_POWER = "power"
+ATTR_START_ENERGY = "start_energy"
+ATTR_PRICE_ENTITY = "price_entity"
+ATTR_HORIZON = "horizon"
+ATTR_SPOOL_ID = "spool_id"
+ATTR_SPOOL_NAME = "name"
+ATTR_SPOOL_MATERIAL = "material"
+ATTR_SPOOL_PRICE = "price"
+ATTR_SPOOL_LENGTH = "length"
+ATTR_SPOOL_REMAINING = "remaining"
+ATTR_SPOOL_LOW_REMAINING = "low_remaining"
+ATTR_PERIOD_START = "start"
+ATTR_PERIOD_END = "end"
+ATTR_ENERGY_PRICE = "energy_price"
+ATTR_TARIFF = "tariff"
+ATTR_MATERIAL_COST_PER_METER = "material_cost_per_meter"
+ATTR_DRY_RUN = "dry_run"
+ATTR_FILE_PATH = "path"
+STATISTICS_PERCENTILES = [5, 25, 50, 75, 95]
+DATA_STATISTICS_CACHE = f"{DOMAIN}_statistics_cache"
+DATA_PRINT_FILE_CACHE = f"{DOMAIN}_print_file_cache"
+
+# Bus events fired when a print starts and finishes
+EVENT_PRINT_STARTED = f"{DOMAIN}_print_started"
+EVENT_PRINT_FINISHED = f"{DOMAIN}_print_finished"
+EVENT_ANOMALY = f"{DOMAIN}_anomaly"
+
+# Online anomaly detection on energy and material use
+ANOMALY_HIGH_ENERGY = "high_energy"
+ANOMALY_NO_MATERIAL = "no_material"
+ANOMALY_PRINT_ALPHA = 0.2  # EWMA weight of each finished print in the per-printer and per-material baselines
+ANOMALY_MIN_PRINTS = 3  # Finished prints needed before a baseline is used
+ANOMALY_RATE_SECONDS = 300.0  # EWMA time constant of the running print's energy rate
+ANOMALY_WARMUP_SECONDS = 900.0  # Heat-up time ignored by the energy and material checks
+ANOMALY_ENERGY_SIGMAS = 3.0  # Energy rate above mean + this many standard deviations is anomalous
+ANOMALY_ENERGY_RATIO = 1.5  # ... and at least this multiple of the mean
+ANOMALY_MIN_STD_RATIO = 0.1  # Standard deviation floor, as a fraction of the mean
+ANOMALY_STALL_SECONDS = 600.0  # Printing time without material use that suggests a clog
+
+# Prometheus metrics endpoint
+DATA_METRICS = f"{DOMAIN}_metrics"
+METRICS_URL = f"/api/{DOMAIN}/metrics"
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Websocket commands
+WS_TYPE_PRINT_CURVE = f"{DOMAIN}/print_curve"
+WS_TYPE_SUBSCRIBE = f"{DOMAIN}/subscribe"
+ATTR_SUBSCRIBE_INTERVAL = "interval"
+DEFAULT_SUBSCRIBE_INTERVAL = 1.0  # Seconds between pushes to one subscriber
+ATTR_PRINT_INDEX = "print_index"
+
 ATTR_CURRENT_SESSION_ENERGY = "current_session_energy"
 ATTR_TOTAL_ENERGY = "total_energy"
 ATTR_PRINT_COUNT = "print_count"
 ATTR_LAST_PRINT_ENERGY = "last_print_energy"
 ATTR_LAST_PRINT_START = "last_print_start"
 ATTR_LAST_PRINT_END = "last_print_end"
+ATTR_LAST_PRINT_INTEGRATED_ENERGY = "last_print_integrated_energy"
 ATTR_CURRENT_SESSION_MATERIAL = "current_session_material"
 ATTR_LAST_PRINT_MATERIAL = "last_print_material"
 ATTR_TOTAL_MATERIAL = "total_material"
@@ -37,6 +205,21 @@ ATTR_CURRENT_SESSION_TOTAL_COST = "current_session_total_cost"
 ATTR_TOTAL_ENERGY_COST = "total_energy_cost"
 ATTR_TOTAL_MATERIAL_COST = "total_material_cost"
 ATTR_TOTAL_COST = "total_cost"
+ATTR_PHASE_BREAKDOWN = "phase_breakdown"
+ATTR_ENERGY_SOURCES = "energy_sources"
+ATTR_ANOMALIES = "anomalies"
+ATTR_PROJECTED_DURATION = "projected_duration"
+ATTR_PROJECTED_MATERIAL = "projected_material"
+ATTR_PROJECTED_ENERGY_COST = "projected_energy_cost"
+ATTR_PROJECTED_MATERIAL_COST = "projected_material_cost"
+ATTR_FORECAST_BASIS = "forecast_basis"
+ATTR_SESSION_STATE = "session_state"
+ATTR_STATE_TRANSITIONS = "state_transitions"
+ATTR_SUPPRESSED_STARTS = "suppressed_starts"
+ATTR_SUPPRESSED_STOPS = "suppressed_stops"
+ATTR_COST_PER_METER = "cost_per_meter"
+ATTR_ROLLING_PRINTS = "prints"
+ATTR_ROLLING_HOURS = "hours"
 
 SENSOR_TOTAL_ENERGY = "total_energy"
 SENSOR_CURRENT_SESSION = "current_session"
@@ -45,3 +228,13 @@ SENSOR_LAST_PRINT_ENERGY = "last_print_energy"
 SENSOR_LAST_PRINT_MATERIAL = "last_print_material"
 SENSOR_LAST_PRINT_COST = "last_print_cost"
 SENSOR_TOTAL_COST = "total_cost"
+SENSOR_PRINT_PHASE = "print_phase"
+SENSOR_ACTIVE_SPOOL_REMAINING = "active_spool_remaining"
+BINARY_SENSOR_ACTIVE_SPOOL_LOW = "active_spool_low"
+BINARY_SENSOR_PRINT_ANOMALY = "print_anomaly"
+SELECT_ACTIVE_SPOOL = "active_spool"
+SENSOR_HISTORY_SIZE = "history_size"
+SENSOR_BEST_START = "best_start"
+SENSOR_ROLLING_ENERGY_PER_HOUR = "energy_per_hour"
+SENSOR_ROLLING_ENERGY_PER_METER = "energy_per_meter"
+SENSOR_ROLLING_COST_PER_HOUR = "cost_per_hour"
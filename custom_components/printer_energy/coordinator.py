@@ -2,29 +2,104 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+import asyncio
+from datetime import datetime, timedelta
+import time
 from typing import Any, Callable
 
 from homeassistant.core import HomeAssistant, State, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.const import CONF_NAME, EVENT_HOMEASSISTANT_STOP, STATE_UNAVAILABLE, STATE_UNKNOWN
 from homeassistant.util import dt as dt_util
 
 from .const import (
+    ATTR_CONFIG_ENTRY_ID,
+    CONF_ATTRIBUTE_POLICY,
     CONF_ENERGY_COST_SENSOR,
     CONF_ENERGY_SENSOR,
+    CONF_ENERGY_SOURCES,
+    CONF_ESTIMATED_MATERIAL_SENSOR,
+    CONF_ESTIMATED_TIME_SENSOR,
+    CONF_FILE_NAME_SENSOR,
+    CONF_HISTORY_COMPACTION,
+    CONF_HISTORY_RETENTION,
+    CONF_JOB_NAME_SENSOR,
     CONF_MATERIAL_COST_PER_SPOOL,
     CONF_MATERIAL_SENSOR,
     CONF_MATERIAL_SPOOL_LENGTH,
+    CONF_PAUSE_RULE,
+    CONF_PAUSE_STATE,
+    CONF_POWER_SENSOR,
+    CONF_PRINTING_RULE,
     CONF_PRINTING_SENSOR,
     CONF_PRINTING_STATE,
+    CONF_PROGRESS_SENSOR,
+    CONF_REMAINING_TIME_SENSOR,
+    CONF_START_DWELL,
+    CONF_STOP_DWELL,
+    CONF_UNAVAILABLE_GRACE,
+    CURVE_BUCKET_SECONDS,
+    CURVE_MAX_POINTS,
+    DEFAULT_ATTRIBUTE_POLICY,
+    DEFAULT_HISTORY_COMPACTION,
+    DEFAULT_HISTORY_RETENTION,
     DEFAULT_MATERIAL_COST_PER_SPOOL,
+    DEFAULT_PAUSE_STATE,
     DEFAULT_SPOOL_LENGTH,
+    DEFAULT_START_DWELL,
+    DEFAULT_STOP_DWELL,
+    DEFAULT_UNAVAILABLE_GRACE,
+    DATA_SPOOL_REGISTRY,
     DOMAIN,
     ENERGY_ATTRIBUTE,
+    EVENT_ANOMALY,
+    EVENT_PRINT_FINISHED,
+    EVENT_PRINT_STARTED,
+    FORECAST_UPDATE_INTERVAL,
+    LAST_SEEN_SAVE_DELAY,
+    LAST_SEEN_SAVE_INTERVAL,
+    PHASE_IDLE,
+    PHASE_PRINTING,
+    PLANNER_HORIZON,
+    POWER_CROSS_CHECK_MIN_ENERGY,
+    POWER_CROSS_CHECK_TOLERANCE,
+    POWER_MAX_GAP,
+    RECONCILE_ENERGY_WINDOW,
+    ROLLING_BUCKET_SECONDS,
+    ROLLING_DAYS,
+    ROLLING_PRINTS,
     STORAGE_KEY,
     STORAGE_VERSION,
 )
+from .analytics import reprice_records
+from .anomaly import AnomalyDetector
+from .counters import CounterFilter
+from .curve import PowerCurve
+from .exposition import PerfCounters
+from .forecast import PrintCostModel, project_session
+from .history import PrintHistory
+from .phases import PhaseDetector
+from .planner import cheapest_start, forecast_attributes, parse_price_forecast
+from .power import PowerIntegrator
+from .retention import months_before
+from .rolling import RollingEfficiency
+from .rules import Predicate, RuleError, compile_rule
+from .sources import SessionSources
+from .spools import Spool, SpoolRegistry
+from .state_machine import (
+    CLASS_IDLE,
+    CLASS_PAUSED,
+    CLASS_PRINTING,
+    CLASS_UNAVAILABLE,
+    MACHINE_IDLE,
+    MACHINE_PRINTING,
+    MACHINE_STARTING,
+    MACHINE_STOPPING,
+    PrintingStateMachine,
+    find_session_end,
+)
 from .storage import PrinterEnergyStorage
 
 
@@ -46,7 +121,23 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
         )
         self.hass = hass
         self.entry_id = entry_id
-        self.energy_sensor = config[CONF_ENERGY_SENSOR]
+        self.printer_name = config.get(CONF_NAME)
+        # Counters of the coordinator's own work, for the metrics endpoint
+        self.perf = PerfCounters()
+        energy_sensor_config = config.get(CONF_ENERGY_SENSOR)
+        self.energy_sensor = energy_sensor_config.strip() if energy_sensor_config and isinstance(energy_sensor_config, str) else (energy_sensor_config if energy_sensor_config else None)
+        # Optional power sensor (W) - integrated into kWh when there is no energy meter,
+        # and used to cross-check the meter when both are configured
+        power_sensor_config = config.get(CONF_POWER_SENSOR)
+        self.power_sensor = power_sensor_config.strip() if power_sensor_config and isinstance(power_sensor_config, str) else (power_sensor_config if power_sensor_config else None)
+        self._power_integrator = PowerIntegrator(POWER_MAX_GAP) if self.power_sensor else None
+        # Additional energy meters (enclosure heater, dryer), each with its own session baseline
+        self.energy_sources = [
+            entity_id.strip()
+            for entity_id in config.get(CONF_ENERGY_SOURCES) or []
+            if entity_id and entity_id.strip() and entity_id.strip() != self.energy_sensor
+        ]
+        self._sources = SessionSources()
         self.printing_sensor = config[CONF_PRINTING_SENSOR]
         printing_state_config = config.get(CONF_PRINTING_STATE, "on")
         # Support comma-separated states or single state
@@ -60,22 +151,81 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
             self.printing_states = [str(printing_state_config).lower()]
         if not self.printing_states:
             self.printing_states = ["on"]
+        # Pause states keep the session open without counting as a new print
+        pause_state_config = config.get(CONF_PAUSE_STATE, DEFAULT_PAUSE_STATE)
+        self.pause_states = [
+            state.strip().lower()
+            for state in str(pause_state_config or "").split(",")
+            if state.strip() and state.strip().lower() not in self.printing_states
+        ]
+        # Optional rules over the printing sensor's state and attributes replace the lists
+        self._printing_rule = self._compile_rule(config, CONF_PRINTING_RULE)
+        self._pause_rule = self._compile_rule(config, CONF_PAUSE_RULE)
+        # Debounce flapping printers with dwell times and an unavailable grace period
+        self._state_machine = PrintingStateMachine(
+            float(config.get(CONF_START_DWELL, DEFAULT_START_DWELL)),
+            float(config.get(CONF_STOP_DWELL, DEFAULT_STOP_DWELL)),
+            float(config.get(CONF_UNAVAILABLE_GRACE, DEFAULT_UNAVAILABLE_GRACE)),
+        )
+        self._start_candidate = None
+        self._stop_candidate = None
+        self._unsub_state_timer = None
+
+        # Extra state attribute policy for sensors (full, minimal, none)
+        self.attribute_policy = config.get(CONF_ATTRIBUTE_POLICY, DEFAULT_ATTRIBUTE_POLICY)
         # Energy attribute is always "total_increased" (hardcoded, not stored as instance variable)
         material_sensor_config = config.get(CONF_MATERIAL_SENSOR)
         self.material_sensor = material_sensor_config.strip() if material_sensor_config and isinstance(material_sensor_config, str) else (material_sensor_config if material_sensor_config else None)
+        # Reset, rollover and glitch filters of the cumulative counters
+        self._counters = {
+            entity_id: CounterFilter(entity_id)
+            for entity_id in [self.energy_sensor, self.material_sensor, *self.energy_sources]
+            if entity_id
+        }
         
         # Energy cost sensor
         energy_cost_sensor_config = config.get(CONF_ENERGY_COST_SENSOR)
         self.energy_cost_sensor = energy_cost_sensor_config.strip() if energy_cost_sensor_config and isinstance(energy_cost_sensor_config, str) else (energy_cost_sensor_config if energy_cost_sensor_config else None)
         
+        # Optional progress (%) and remaining-time entities used for forecasting
+        progress_sensor_config = config.get(CONF_PROGRESS_SENSOR)
+        self.progress_sensor = progress_sensor_config.strip() if progress_sensor_config and isinstance(progress_sensor_config, str) else (progress_sensor_config if progress_sensor_config else None)
+        remaining_time_sensor_config = config.get(CONF_REMAINING_TIME_SENSOR)
+        self.remaining_time_sensor = remaining_time_sensor_config.strip() if remaining_time_sensor_config and isinstance(remaining_time_sensor_config, str) else (remaining_time_sensor_config if remaining_time_sensor_config else None)
+
+        # Optional job metadata entities, snapshotted at print start
+        job_name_sensor_config = config.get(CONF_JOB_NAME_SENSOR)
+        self.job_name_sensor = job_name_sensor_config.strip() if job_name_sensor_config and isinstance(job_name_sensor_config, str) else (job_name_sensor_config if job_name_sensor_config else None)
+        file_name_sensor_config = config.get(CONF_FILE_NAME_SENSOR)
+        self.file_name_sensor = file_name_sensor_config.strip() if file_name_sensor_config and isinstance(file_name_sensor_config, str) else (file_name_sensor_config if file_name_sensor_config else None)
+        estimated_time_sensor_config = config.get(CONF_ESTIMATED_TIME_SENSOR)
+        self.estimated_time_sensor = estimated_time_sensor_config.strip() if estimated_time_sensor_config and isinstance(estimated_time_sensor_config, str) else (estimated_time_sensor_config if estimated_time_sensor_config else None)
+        estimated_material_sensor_config = config.get(CONF_ESTIMATED_MATERIAL_SENSOR)
+        self.estimated_material_sensor = estimated_material_sensor_config.strip() if estimated_material_sensor_config and isinstance(estimated_material_sensor_config, str) else (estimated_material_sensor_config if estimated_material_sensor_config else None)
+        self.session_job: dict[str, Any] = {}
+
+        # Cheapest start in the next 24 h, recomputed when the price forecast changes
+        self.best_start: dict[str, float] | None = None
+        self._planner_key: tuple | None = None
+
+        # Open session restored after a restart, and when it was last seen running
+        self._restored_session: dict[str, Any] | None = None
+        self._gap_start: datetime | None = None
+        self._last_seen_saved = 0.0
+        
         # Create entry-specific storage to prevent data sharing between instances
         self.storage = PrinterEnergyStorage(hass, entry_id)
+        self.history = PrintHistory(hass, entry_id)
+        # Raw records older than this many months are compacted (0 keeps all)
+        self.history_retention = int(config.get(CONF_HISTORY_RETENTION, DEFAULT_HISTORY_RETENTION))
+        self.history_compaction = config.get(CONF_HISTORY_COMPACTION, DEFAULT_HISTORY_COMPACTION)
         
         # Update cost configuration
         self._update_cost_config(config)
 
         self.is_printing = False
         self.session_start_energy = None
+        self.session_meter_energy = 0.0
         self.current_session_energy = 0.0
         self.total_energy = 0.0
         self.print_count = 0
@@ -83,6 +233,33 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
         self.last_print_start = None
         self.last_print_end = None
 
+        # Integrated power (cross-check against the energy meter)
+        self.session_start_integrated = None
+        self.last_print_integrated_energy = 0.0
+
+        # Phase segmentation of the running session
+        self._phase_detector = PhaseDetector()
+
+        # Downsampled power curve of the running session
+        self._power_curve = PowerCurve(CURVE_MAX_POINTS, CURVE_BUCKET_SECONDS)
+
+        # Forecast for the running session, from a model of past prints
+        self.cost_model = PrintCostModel()
+        self.projected_duration = None
+        self.projected_energy = None
+        self.projected_material = None
+        self.projected_energy_cost = None
+        self.projected_material_cost = None
+        self.projected_total_cost = None
+        self.forecast_basis = None
+        self._last_forecast = 0.0
+
+        # Energy and material baselines of past prints, checked while printing
+        self.anomaly = AnomalyDetector()
+
+        # Efficiency of the last prints and the last days
+        self.rolling = RollingEfficiency(ROLLING_PRINTS, ROLLING_DAYS, ROLLING_BUCKET_SECONDS)
+
         # Material tracking
         self.session_start_material = None
         self.current_session_material = 0.0
@@ -100,6 +277,13 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
         self.total_material_cost = 0.0
         self.total_cost = 0.0
 
+        # Active spool from the shared registry (material cost and remaining length)
+        self.spool_registry: SpoolRegistry = hass.data[DATA_SPOOL_REGISTRY]
+        self.active_spool_id = None
+
+        # One re-pricing at a time, so each starts from the costs the previous one wrote
+        self._reprice_lock = asyncio.Lock()
+
         self._event_listeners = []
 
     def _update_cost_config(self, config: dict[str, Any]) -> None:
@@ -124,6 +308,23 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
             f"spool_length={self.material_spool_length}, cost_per_meter={self.material_cost_per_meter}"
         )
 
+    def get_active_spool(self) -> Spool | None:
+        """Return the active spool, if one is selected and still registered."""
+        return self.spool_registry.get(self.active_spool_id)
+
+    def _get_material_cost_per_meter(self) -> float:
+        """Get material cost per meter from the active spool, or the configured spool price."""
+        spool = self.get_active_spool()
+        if spool is not None:
+            return spool.cost_per_meter
+        return self.material_cost_per_meter
+
+    async def async_set_active_spool(self, spool_id: str | None) -> None:
+        """Select the spool loaded in this printer."""
+        self.active_spool_id = spool_id
+        await self._save_data()
+        await self.async_refresh()
+
     def _get_energy_cost_per_kwh(self) -> float:
         """Get energy cost per kWh from selected sensor/number entity."""
         if not self.energy_cost_sensor:
@@ -168,12 +369,19 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
     async def async_config_entry_first_refresh(self) -> None:
         """Load persisted data on first refresh."""
         await self._load_persisted_data()
+        self._schedule_history_maintenance()
+        if self.power_sensor:
+            # Anchor the power integrator on the current reading
+            self._add_power_sample(self.hass.states.get(self.power_sensor))
+        self._restore_session()
+        self._update_best_start()
         await self._update_printing_state()
         await self.async_refresh()
 
     async def _load_persisted_data(self) -> None:
         """Load persisted data from storage."""
         data = await self.storage.load()
+        await self.history.load()
         
         # Check if entry-specific storage is empty (new entry or first load after migration)
         # If empty, try to migrate from old shared storage (one-time migration)
@@ -206,6 +414,41 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
         self.last_print_energy = data.get("last_print_energy", 0.0)
         self.total_material = data.get("total_material", 0.0)
         self.last_print_material = data.get("last_print_material", 0.0)
+        self.last_print_integrated_energy = data.get("last_print_integrated_energy", 0.0)
+        self.active_spool_id = data.get("active_spool")
+        self._restored_session = data.get("open_session")
+        if self._power_integrator is not None:
+            # Continue the integrated total so a restored session's baseline stays valid
+            self._power_integrator.energy = data.get("integrated_energy", 0.0)
+
+        if data.get("cost_model"):
+            self.cost_model = PrintCostModel.from_dict(data["cost_model"])
+        else:
+            # One-time seed of the forecast model from existing print records
+            for record in self.history.records:
+                if record.get("start") is not None:
+                    self.cost_model.add_print(
+                        (record["end"] - record["start"]) / 3600.0,
+                        record.get("energy", 0.0),
+                        record.get("material", 0.0),
+                        record.get("material_cost", 0.0),
+                    )
+        if data.get("anomaly") is not None:
+            self.anomaly = AnomalyDetector.from_dict(data["anomaly"])
+        else:
+            # One-time seed of the anomaly baselines, oldest print first
+            for record in self.history.records:
+                if record.get("start") is not None:
+                    self.anomaly.add_print(
+                        (record["end"] - record["start"]) / 3600.0,
+                        record.get("energy", 0.0),
+                        record.get("material", 0.0),
+                        self.history.lookup(record.get("material_type")),
+                    )
+        if data.get("rolling") is not None:
+            self.rolling.restore(data["rolling"])
+        else:
+            self._seed_rolling()
         
         # Cost data
         self.total_energy_cost = data.get("total_energy_cost", 0.0)
@@ -228,31 +471,24 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
                 self.last_print_end = None
 
     async def _async_update_data(self) -> dict[str, Any]:
+        """Update data from sensors, counting the time it takes."""
+        started = time.perf_counter()
+        data = await self._async_read_sources()
+        self.perf.add_update(time.perf_counter() - started)
+        return data
+
+    async def _async_read_sources(self) -> dict[str, Any]:
         """Update data from sensors."""
         try:
-            energy_state = self.hass.states.get(self.energy_sensor)
             printing_state = self.hass.states.get(self.printing_sensor)
 
             # Handle unavailable sensors gracefully - use last known values
             # Don't raise UpdateFailed, just skip updates for unavailable sensors
-            current_energy = None
-            if energy_state and energy_state.state not in (STATE_UNAVAILABLE, STATE_UNKNOWN):
-                current_energy = self._get_energy_value(energy_state)
-            else:
+            current_energy = self._get_current_energy()
+            if current_energy is None:
                 # Energy sensor unavailable - use last known energy if we have it
                 # This allows sensors to continue showing last known values
-                self.logger.debug(f"Energy sensor {self.energy_sensor} is unavailable, using last known values")
-
-            # Check printing state - handle unavailable printing sensor
-            printing = False
-            if printing_state and printing_state.state not in (STATE_UNAVAILABLE, STATE_UNKNOWN):
-                printing_state_value = printing_state.state.lower()
-                printing = printing_state_value in self.printing_states
-            else:
-                # Printing sensor unavailable - assume not printing to avoid false triggers
-                # Keep last known state if already tracked
-                self.logger.debug(f"Printing sensor {self.printing_sensor} is unavailable, assuming not printing")
-                printing = False
+                self.logger.debug(f"Energy sensor {self.energy_sensor or self.power_sensor} is unavailable, using last known values")
 
             # Get current material value if material sensor is configured
             current_material = None
@@ -262,34 +498,61 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
                     STATE_UNAVAILABLE,
                     STATE_UNKNOWN,
                 ):
-                    current_material = self._get_material_value(material_state)
+                    current_material = self._filter_counter(
+                        self.material_sensor, material_state, self._get_material_value(material_state)
+                    )
+
+            # Check printing state through the debounced state machine - an unavailable
+            # printing sensor keeps the session open for the grace period
+            printing = self._update_state_machine(printing_state, current_energy, current_material)
 
             # Handle state transitions - only if we have valid sensor data
             # If sensors are unavailable, we skip updates but keep last known values
             if current_energy is not None:
                 if printing and not self.is_printing:
                     # Started printing
-                    await self._handle_print_start(current_energy, current_material)
+                    await self._start_from_candidate(current_energy, current_material)
                 elif not printing and self.is_printing:
                     # Stopped printing
-                    await self._handle_print_stop(current_energy, current_material)
+                    await self._stop_session(current_energy, current_material)
                 elif printing and self.is_printing:
+                    if self._gap_start is not None and self._classify_printing_state(printing_state) in (
+                        CLASS_PRINTING,
+                        CLASS_PAUSED,
+                    ):
+                        # The restored print is still running, it did not end during the downtime
+                        self._gap_start = None
+                    if self._stop_candidate is not None:
+                        # The print looks finished, hold the session until the stop is confirmed
+                        return self._build_data(current_energy)
                     # Still printing - update current session energy and material
                     if self.session_start_energy is not None:
-                        self.current_session_energy = current_energy - self.session_start_energy
+                        # Additional sources keep a running total, updated as their states change
+                        self.session_meter_energy = current_energy - self.session_start_energy
+                        self.current_session_energy = self.session_meter_energy + self._sources.total
                         # Calculate cost for current session energy (convert mm to meters for material)
                         energy_cost_per_kwh = self._get_energy_cost_per_kwh()
                         self.current_session_energy_cost = self.current_session_energy * energy_cost_per_kwh
                     else:
                         self.current_session_energy = 0.0
                         self.current_session_energy_cost = 0.0
+
+                    self._phase_detector.update(
+                        dt_util.utcnow().timestamp(),
+                        self.current_session_energy,
+                        self._power_integrator.last_power if self._power_integrator else None,
+                    )
+                    if not self.power_sensor:
+                        # Without a power sensor the curve follows the energy rate
+                        self._power_curve.update(dt_util.utcnow().timestamp(), self.current_session_energy)
+                    self._update_forecast()
                     
                     if self.material_sensor and current_material is not None:
                         if self.session_start_material is not None:
                             self.current_session_material = current_material - self.session_start_material
                             # Material is in mm, convert to meters for cost calculation
                             material_meters = self.current_session_material / 1000.0
-                            self.current_session_material_cost = material_meters * self.material_cost_per_meter
+                            self.current_session_material_cost = material_meters * self._get_material_cost_per_meter()
                         else:
                             self.current_session_material = 0.0
                             self.current_session_material_cost = 0.0
@@ -298,62 +561,482 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
                     
                     # Calculate total current session cost
                     self.current_session_total_cost = self.current_session_energy_cost + self.current_session_material_cost
+                    self._check_anomalies()
+                    self._save_last_seen()
             else:
                 # Energy sensor unavailable - keep last known values, don't update current session
                 self.logger.debug("Skipping state transitions due to unavailable energy sensor")
 
             # Return data - use current_energy if available, otherwise keep last known values
             # This ensures sensors continue to show data even when source sensors are unavailable
-            return {
-                "is_printing": self.is_printing,
-                "current_energy": current_energy if current_energy is not None else (self.total_energy if hasattr(self, 'total_energy') else 0.0),
-                "current_session_energy": self.current_session_energy,
-                "total_energy": self.total_energy,
-                "print_count": self.print_count,
-                "last_print_energy": self.last_print_energy,
-                "last_print_start": self.last_print_start,
-                "last_print_end": self.last_print_end,
-                "current_session_material": self.current_session_material,
-                "total_material": self.total_material,
-                "last_print_material": self.last_print_material,
-                "current_session_energy_cost": self.current_session_energy_cost,
-                "current_session_material_cost": self.current_session_material_cost,
-                "current_session_total_cost": self.current_session_total_cost,
-                "last_print_energy_cost": self.last_print_energy_cost,
-                "last_print_material_cost": self.last_print_material_cost,
-                "last_print_total_cost": self.last_print_total_cost,
-                "total_energy_cost": self.total_energy_cost,
-                "total_material_cost": self.total_material_cost,
-                "total_cost": self.total_cost,
-            }
+            return self._build_data(current_energy)
 
         except Exception as err:
             # Log error but don't raise UpdateFailed - return last known values instead
             # This keeps sensors available showing last known data even when errors occur
             self.logger.warning(f"Error updating printer energy data: {err}, using last known values")
             # Return last known data - all attributes are initialized in __init__ so safe to access
+            return self._build_data(None)
+
+    def _check_anomalies(self) -> None:
+        """Feed the running session to the anomaly detector and report new anomalies."""
+        anomalies = self.anomaly.tick(
+            dt_util.utcnow().timestamp(),
+            self.current_session_energy,
+            self.current_session_material if self.material_sensor and self.session_start_material is not None else None,
+            self._state_machine.state == MACHINE_PRINTING and self._phase_detector.phase == PHASE_PRINTING,
+        )
+        for anomaly in anomalies:
+            self.logger.warning(f"Print anomaly {anomaly['kind']}: {anomaly}")
+            self.hass.bus.async_fire(
+                EVENT_ANOMALY,
+                {
+                    **self._print_event_base(),
+                    **anomaly,
+                    "time": dt_util.utc_from_timestamp(anomaly["time"]).isoformat(),
+                    "start": self.last_print_start.isoformat() if self.last_print_start else None,
+                    "session_energy": self.current_session_energy,
+                    "session_material": self.current_session_material,
+                    "material_type": self.anomaly.material_type,
+                },
+            )
+
+    def _compile_rule(self, config: dict[str, Any], key: str) -> Predicate | None:
+        """Compile a detection rule once; an invalid rule falls back to the state list."""
+        try:
+            return compile_rule(config.get(key))
+        except RuleError as err:
+            self.logger.error(f"Invalid {key} {config.get(key)!r}, using the state list: {err}")
+            return None
+
+    def _classify_printing_state(self, state: State | None) -> str:
+        """Classify the printing sensor state for the state machine."""
+        if state is None or state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+            return CLASS_UNAVAILABLE
+        value = state.state.lower()
+        if self._printing_rule is not None:
+            if self._printing_rule(state.state, state.attributes):
+                return CLASS_PRINTING
+        elif value in self.printing_states:
+            return CLASS_PRINTING
+        if self._pause_rule is not None:
+            if self._pause_rule(state.state, state.attributes):
+                return CLASS_PAUSED
+        elif value in self.pause_states:
+            return CLASS_PAUSED
+        return CLASS_IDLE
+
+    def _update_state_machine(
+        self,
+        printing_state: State | None,
+        current_energy: float | None,
+        current_material: float | None,
+    ) -> bool:
+        """Feed the printing sensor state to the state machine and return if printing."""
+        now = dt_util.utcnow()
+        printing = self._state_machine.update(
+            self._classify_printing_state(printing_state), now.timestamp()
+        )
+
+        # Remember the readings at the first printing state, so the session
+        # includes the start dwell once it is confirmed, and at the first
+        # non-printing state, so it leaves the stop dwell out
+        if self._state_machine.state == MACHINE_STARTING:
+            if self._start_candidate is None and current_energy is not None:
+                self._start_candidate = (current_energy, current_material, now)
+        elif self._state_machine.state == MACHINE_STOPPING:
+            if self._stop_candidate is None and current_energy is not None:
+                self._stop_candidate = (current_energy, current_material, now, dict(self._sources.last))
+        elif self._state_machine.state == MACHINE_IDLE:
+            self._start_candidate = None
+        else:
+            # Printing again, the stop was suppressed
+            self._stop_candidate = None
+
+        self._schedule_state_machine_check()
+        return printing
+
+    async def _start_from_candidate(self, current_energy: float, current_material: float | None) -> None:
+        """Start a session from the readings taken when printing was first seen."""
+        if self._start_candidate is None:
+            await self._handle_print_start(current_energy, current_material)
+            return
+        start_energy, start_material, start_time = self._start_candidate
+        self._start_candidate = None
+        await self._handle_print_start(
+            start_energy,
+            start_material if start_material is not None else current_material,
+            start_time,
+        )
+
+    def _schedule_state_machine_check(self) -> None:
+        """Schedule a refresh for when a pending start or stop becomes due."""
+        if self._unsub_state_timer is not None:
+            self._unsub_state_timer()
+            self._unsub_state_timer = None
+        deadline = self._state_machine.next_deadline()
+        if deadline is None:
+            return
+        delay = max(deadline - dt_util.utcnow().timestamp(), 0.0) + 0.1
+        self._unsub_state_timer = async_call_later(self.hass, delay, self._state_timer_fired)
+
+    @callback
+    def _state_timer_fired(self, _now: datetime) -> None:
+        """Re-evaluate the state machine when a dwell time has passed."""
+        self._unsub_state_timer = None
+        self.hass.async_create_task(self.async_refresh())
+
+    def _build_data(self, current_energy: float | None) -> dict[str, Any]:
+        """Build the coordinator data dict from the current tracking state."""
+        spool = self.get_active_spool()
+        return {
+            "is_printing": self.is_printing,
+            "current_energy": current_energy if current_energy is not None else self.total_energy,
+            "current_session_energy": self.current_session_energy,
+            "total_energy": self.total_energy,
+            "print_count": self.print_count,
+            "last_print_energy": self.last_print_energy,
+            "last_print_start": self.last_print_start,
+            "last_print_end": self.last_print_end,
+            "last_print_integrated_energy": self.last_print_integrated_energy,
+            "current_session_material": self.current_session_material,
+            "total_material": self.total_material,
+            "last_print_material": self.last_print_material,
+            "current_session_energy_cost": self.current_session_energy_cost,
+            "current_session_material_cost": self.current_session_material_cost,
+            "current_session_total_cost": self.current_session_total_cost,
+            "last_print_energy_cost": self.last_print_energy_cost,
+            "last_print_material_cost": self.last_print_material_cost,
+            "last_print_total_cost": self.last_print_total_cost,
+            "total_energy_cost": self.total_energy_cost,
+            "total_material_cost": self.total_material_cost,
+            "total_cost": self.total_cost,
+            "current_phase": self._phase_detector.phase if self.is_printing else PHASE_IDLE,
+            "phase_breakdown": self._get_phase_breakdown(),
+            "energy_sources": self._get_source_breakdown(),
+            "projected_duration": self.projected_duration,
+            "projected_energy": self.projected_energy,
+            "projected_material": self.projected_material,
+            "projected_energy_cost": self.projected_energy_cost,
+            "projected_material_cost": self.projected_material_cost,
+            "projected_total_cost": self.projected_total_cost,
+            "forecast_basis": self.forecast_basis,
+            "session_state": self._state_machine.state,
+            "state_counters": self._state_machine.counters(),
+            "active_spool": spool.as_dict() if spool else None,
+            "history_size": self.history.disk_size,
+            "history_records": len(self.history.records),
+            "history_aggregates": len(self.history.aggregates),
+            "history_strings": len(self.history.strings),
+            "best_start": self.best_start,
+            "anomalies": list(self.anomaly.active.values()) if self.is_printing else [],
+            "rolling": self.rolling.values(dt_util.utcnow().timestamp()),
+        }
+
+    def _get_phase_breakdown(self) -> dict[str, dict[str, float]]:
+        """Return the running session's phase breakdown, or the last print's."""
+        if self.is_printing:
+            return self._phase_detector.breakdown()
+        last_record = self.history.last
+        return last_record.get("phases", {}) if last_record else {}
+
+    def _get_source_breakdown(self) -> dict[str, float]:
+        """Return the running session's energy per source, or the last print's."""
+        if not self.energy_sources:
+            return {}
+        if self.is_printing:
             return {
-                "is_printing": self.is_printing,
-                "current_energy": self.total_energy,
-                "current_session_energy": self.current_session_energy,
-                "total_energy": self.total_energy,
-                "print_count": self.print_count,
-                "last_print_energy": self.last_print_energy,
-                "last_print_start": self.last_print_start,
-                "last_print_end": self.last_print_end,
-                "current_session_material": self.current_session_material,
-                "total_material": self.total_material,
-                "last_print_material": self.last_print_material,
-                "current_session_energy_cost": self.current_session_energy_cost,
-                "current_session_material_cost": self.current_session_material_cost,
-                "current_session_total_cost": self.current_session_total_cost,
-                "last_print_energy_cost": self.last_print_energy_cost,
-                "last_print_material_cost": self.last_print_material_cost,
-                "last_print_total_cost": self.last_print_total_cost,
-                "total_energy_cost": self.total_energy_cost,
-                "total_material_cost": self.total_material_cost,
-                "total_cost": self.total_cost,
+                self.energy_sensor or self.power_sensor: round(self.session_meter_energy, 4),
+                **self._sources.breakdown(),
             }
+        last_record = self.history.last
+        return last_record.get("sources", {}) if last_record else {}
+
+    def _update_forecast(self, force: bool = False) -> None:
+        """Project the running print's finish energy and cost (throttled)."""
+        now = dt_util.utcnow()
+        if not force and now.timestamp() - self._last_forecast < FORECAST_UPDATE_INTERVAL:
+            return
+        self._last_forecast = now.timestamp()
+        if self.last_print_start is None:
+            return
+
+        elapsed_hours = max((now - self.last_print_start).total_seconds() / 3600.0, 0.0)
+        (
+            self.projected_duration,
+            self.projected_energy,
+            self.projected_material,
+            self.forecast_basis,
+        ) = project_session(
+            self.cost_model,
+            elapsed_hours,
+            self.current_session_energy,
+            self.current_session_material if self.material_sensor else 0.0,
+            progress=self._get_progress(),
+            remaining_hours=self._get_remaining_hours(),
+        )
+        # A selected spool's price beats the learned average
+        cost_per_meter = None if self.get_active_spool() else self.cost_model.cost_per_meter()
+        if cost_per_meter is None:
+            cost_per_meter = self._get_material_cost_per_meter()
+        self.projected_energy_cost = self.projected_energy * self._get_energy_cost_per_kwh()
+        self.projected_material_cost = self.projected_material / 1000.0 * cost_per_meter
+        self.projected_total_cost = self.projected_energy_cost + self.projected_material_cost
+
+    def plan_cheapest_start(
+        self,
+        duration: float | None = None,
+        power: float | None = None,
+        start_energy: float | None = None,
+        price_entity: str | None = None,
+        horizon: float | None = None,
+    ) -> dict[str, float] | None:
+        """Find the cheapest start for a job on a price entity's forecast.
+
+        Duration (s), power (kW) and start energy (kWh) default to the
+        profile learned from this printer's past prints.
+        """
+        price_entity = price_entity or self.energy_cost_sensor
+        state = self.hass.states.get(price_entity) if price_entity else None
+        if state is None:
+            return None
+        if duration is None:
+            duration = self.cost_model.mean_hours * 3600.0
+        if power is None:
+            power = self.cost_model.energy_rate()
+        if start_energy is None:
+            start_energy = self.cost_model.energy_intercept()
+        if not duration or power is None:
+            return None
+        return cheapest_start(
+            parse_price_forecast(state.attributes),
+            dt_util.utcnow().timestamp(),
+            duration,
+            power,
+            start_energy,
+            horizon,
+        )
+
+    def estimate_print(
+        self, filament: float, duration: float, cost_per_meter: float | None = None
+    ) -> dict[str, Any]:
+        """Estimate the energy and cost of a job starting now.
+
+        Filament is in mm and duration in s, as read from a sliced file.
+        Energy uses the learned kWh per hour and heat-up energy, or the
+        last prints' average rate until enough prints are learned. The
+        energy is priced on the price entity's forecast when it covers the
+        job, else at the current price. Material is priced per meter of the
+        given, the active or the configured spool.
+        """
+        hours = duration / 3600.0
+        rate = self.cost_model.energy_rate()
+        start_energy = self.cost_model.energy_intercept()
+        energy_basis = "learned"
+        if rate is None:
+            rate = self.rolling.values(dt_util.utcnow().timestamp())["recent_prints"]["energy_per_hour"]
+            start_energy = 0.0
+            energy_basis = "recent_prints"
+        energy = start_energy + rate * hours if rate is not None else None
+
+        energy_cost = None
+        price_basis = None
+        if energy is not None:
+            state = self.hass.states.get(self.energy_cost_sensor) if self.energy_cost_sensor else None
+            plan = None
+            if state is not None:
+                plan = cheapest_start(
+                    parse_price_forecast(state.attributes),
+                    dt_util.utcnow().timestamp(),
+                    duration,
+                    rate,
+                    start_energy,
+                    horizon=0.0,
+                )
+            if plan is not None:
+                energy_cost = plan["cost"]
+                price_basis = "forecast"
+            else:
+                energy_cost = energy * self._get_energy_cost_per_kwh()
+                price_basis = "current"
+
+        if cost_per_meter is None:
+            cost_per_meter = self._get_material_cost_per_meter()
+        material_cost = filament / 1000.0 * cost_per_meter
+        return {
+            "print_time": round(duration),
+            "filament": round(filament, 1),
+            "energy": round(energy, 3) if energy is not None else None,
+            "energy_basis": energy_basis if energy is not None else None,
+            "energy_cost": round(energy_cost, 4) if energy_cost is not None else None,
+            "energy_price_basis": price_basis,
+            "material_cost": round(material_cost, 4),
+            "total_cost": round((energy_cost or 0.0) + material_cost, 4),
+            "currency": self._get_currency(),
+        }
+
+    def _update_best_start(self, force: bool = False) -> bool:
+        """Recompute the best start sensor if the price forecast changed."""
+        state = self.hass.states.get(self.energy_cost_sensor) if self.energy_cost_sensor else None
+        key = forecast_attributes(state.attributes) if state is not None else None
+        if not force and key == self._planner_key:
+            return False
+        self._planner_key = key
+        self.best_start = self.plan_cheapest_start(horizon=PLANNER_HORIZON)
+        return True
+
+    def _clear_forecast(self) -> None:
+        """Clear the forecast when no print is running."""
+        self.projected_duration = None
+        self.projected_energy = None
+        self.projected_material = None
+        self.projected_energy_cost = None
+        self.projected_material_cost = None
+        self.projected_total_cost = None
+        self.forecast_basis = None
+        self._last_forecast = 0.0
+
+    def _get_progress(self) -> float | None:
+        """Get print progress in percent from the progress entity."""
+        if not self.progress_sensor:
+            return None
+        state = self.hass.states.get(self.progress_sensor)
+        if state is None or state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+            return None
+        try:
+            return float(state.state)
+        except (ValueError, TypeError):
+            return None
+
+    def _get_remaining_hours(self) -> float | None:
+        """Get remaining print time in hours from the remaining-time entity."""
+        return self._get_duration_hours(self.remaining_time_sensor)
+
+    def _get_duration_hours(self, entity_id: str | None) -> float | None:
+        """Get a duration in hours from an entity.
+
+        Supports timestamp entities (estimated finish time) and durations
+        with a unit of s, min, h or d (minutes if no unit is set).
+        """
+        if not entity_id:
+            return None
+        state = self.hass.states.get(entity_id)
+        if state is None or state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+            return None
+        if state.attributes.get("device_class") == "timestamp":
+            finish = dt_util.parse_datetime(state.state)
+            if finish is None:
+                return None
+            return (finish - dt_util.utcnow()).total_seconds() / 3600.0
+        try:
+            value = float(state.state)
+        except (ValueError, TypeError):
+            return None
+        unit = state.attributes.get("unit_of_measurement")
+        if unit == "s":
+            return value / 3600.0
+        if unit == "h":
+            return value
+        if unit == "d":
+            return value * 24.0
+        return value / 60.0
+
+    def _snapshot_job(self) -> dict[str, Any]:
+        """Snapshot job metadata (name, file, slicer estimates) at print start."""
+        job: dict[str, Any] = {}
+        job_name = self._get_text_value(self.job_name_sensor)
+        if job_name:
+            job["job"] = job_name
+        file_name = self._get_text_value(self.file_name_sensor)
+        if file_name:
+            # Group prints of the same file regardless of the folder it was sent from
+            job["file"] = file_name.replace("\\", "/").rsplit("/", 1)[-1]
+        estimated_hours = self._get_duration_hours(self.estimated_time_sensor)
+        if estimated_hours is not None and estimated_hours > 0:
+            job["estimated_time"] = round(estimated_hours * 3600.0)
+        estimated_material = self._get_length_mm(self.estimated_material_sensor)
+        if estimated_material is not None:
+            job["estimated_material"] = round(estimated_material, 1)
+        return job
+
+    def _get_text_value(self, entity_id: str | None) -> str | None:
+        """Get a non-empty text state from an entity."""
+        if not entity_id:
+            return None
+        state = self.hass.states.get(entity_id)
+        if state is None or state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN, ""):
+            return None
+        return state.state.strip() or None
+
+    def _get_length_mm(self, entity_id: str | None) -> float | None:
+        """Get a filament length in mm from an entity with a unit of mm, cm or m (mm if unset)."""
+        if not entity_id:
+            return None
+        state = self.hass.states.get(entity_id)
+        if state is None or state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+            return None
+        try:
+            value = float(state.state)
+        except (ValueError, TypeError):
+            return None
+        unit = state.attributes.get("unit_of_measurement")
+        if unit == "m":
+            return value * 1000.0
+        if unit == "cm":
+            return value * 10.0
+        if unit in (None, "mm"):
+            return value
+        self.logger.debug(f"Unsupported estimated material unit {unit} on {entity_id}, ignoring")
+        return None
+
+    def _get_current_energy(self) -> float | None:
+        """Return the cumulative energy reading in kWh, or None if unavailable.
+
+        The energy meter is authoritative when configured. Without one, the
+        integrated power sensor total is used instead.
+        """
+        if self.energy_sensor:
+            energy_state = self.hass.states.get(self.energy_sensor)
+            if energy_state and energy_state.state not in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+                return self._filter_counter(self.energy_sensor, energy_state, self._get_energy_value(energy_state))
+            return None
+        return self._get_integrated_energy()
+
+    def _filter_counter(self, entity_id: str, state: State, value: float) -> float:
+        """Return a cumulative reading with resets carried over and glitches dropped."""
+        counter = self._counters.get(entity_id)
+        if counter is None:
+            return value
+        return counter.update(value, state.last_updated.timestamp())
+
+    def _counter_offset(self, entity_id: str | None) -> float:
+        """Return the offset carried across resets of a counter."""
+        counter = self._counters.get(entity_id) if entity_id else None
+        return counter.offset if counter is not None else 0.0
+
+    def _get_source_energy(self, entity_id: str) -> float | None:
+        """Return the reading of an additional energy source in kWh, or None if unavailable."""
+        state = self.hass.states.get(entity_id)
+        if state is None or state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+            return None
+        return self._filter_counter(entity_id, state, self._get_energy_value(state))
+
+    def _get_integrated_energy(self) -> float | None:
+        """Return the integrated power total in kWh, brought up to now."""
+        if self._power_integrator is None or not self._power_integrator.has_sample:
+            return None
+        return self._power_integrator.advance(dt_util.utcnow().timestamp())
+
+    def _add_power_sample(self, state: State | None) -> None:
+        """Feed a power sensor state into the integrator."""
+        if self._power_integrator is None or state is None:
+            return
+        power = None
+        if state.state not in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+            power = self._get_power_value(state)
+        self._power_integrator.add_sample(state.last_updated.timestamp(), power)
+        if power is not None:
+            self._power_curve.add(state.last_updated.timestamp(), power)
 
     def _get_energy_value(self, state: State) -> float:
         """Extract energy value from state."""
@@ -370,6 +1053,16 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
         except (ValueError, TypeError):
             return 0.0
 
+    def _get_power_value(self, state: State) -> float | None:
+        """Extract power value in W from state."""
+        try:
+            power = float(state.state)
+        except (ValueError, TypeError):
+            return None
+        if state.attributes.get("unit_of_measurement") == "kW":
+            power *= 1000.0
+        return power
+
     def _get_material_value(self, state: State) -> float:
         """Extract material value from state."""
         try:
@@ -377,13 +1070,34 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
         except (ValueError, TypeError):
             return 0.0
 
-    async def _handle_print_start(self, current_energy: float, current_material: float | None = None) -> None:
+    async def _handle_print_start(
+        self,
+        current_energy: float,
+        current_material: float | None = None,
+        start_time: datetime | None = None,
+    ) -> None:
         """Handle when printing starts."""
         self.is_printing = True
+        self._stop_candidate = None
         self.session_start_energy = current_energy
         self.current_session_energy = 0.0
         self.current_session_energy_cost = 0.0
-        self.last_print_start = dt_util.utcnow()
+        self.session_meter_energy = 0.0
+        self._sources.start({entity_id: self._get_source_energy(entity_id) for entity_id in self.energy_sources})
+        for counter in self._counters.values():
+            counter.begin_session()
+        self.last_print_start = start_time or dt_util.utcnow()
+        spool = self.get_active_spool()
+        self.anomaly.start(self.last_print_start.timestamp(), spool.material if spool else None)
+        self._phase_detector.start(self.last_print_start.timestamp())
+        self._power_curve.begin(self.last_print_start.timestamp())
+        self.session_job = self._snapshot_job()
+        self._clear_forecast()
+
+        # Baseline for cross-checking the meter against integrated power
+        self.session_start_integrated = (
+            self._get_integrated_energy() if self.energy_sensor and self.power_sensor else None
+        )
         
         if current_material is not None:
             self.session_start_material = current_material
@@ -398,17 +1112,211 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
         
         material_info = f", Material: {current_material:.2f}" if current_material is not None else ""
         self.logger.info(f"Printing started. Energy: {current_energy:.2f}{material_info}")
+        self.hass.bus.async_fire(
+            EVENT_PRINT_STARTED,
+            {
+                **self._print_event_base(),
+                "start": self.last_print_start.isoformat(),
+                "start_energy": current_energy,
+                "start_material": current_material,
+                **self.session_job,
+                "spool_id": self.active_spool_id,
+            },
+        )
 
-    async def _handle_print_stop(self, current_energy: float, current_material: float | None = None) -> None:
+        # Persist the open session so it survives a restart
+        await self._save_data()
+
+    def _restore_session(self) -> None:
+        """Reopen a session that was running when Home Assistant stopped."""
+        session = self._restored_session
+        self._restored_session = None
+        if not session or session.get("start_energy") is None:
+            return
+        start = dt_util.parse_datetime(session.get("start") or "")
+        if start is None:
+            return
+        now = dt_util.utcnow()
+        self.is_printing = True
+        self.session_start_energy = session["start_energy"]
+        self.session_start_material = session.get("start_material")
+        self._sources.restore(session.get("sources") or {}, self.energy_sources)
+        # Counter offsets keep the stored baselines on the same scale as new readings
+        for entity_id, counter_data in (session.get("counters") or {}).items():
+            if entity_id in self._counters:
+                self._counters[entity_id].restore(counter_data)
+        self.last_print_start = start
+        self.session_job = session.get("job") or {}
+        # Phases restart from now, the curve keeps its original time base
+        self._phase_detector.start(now.timestamp())
+        self._power_curve.begin(start.timestamp())
+        spool = self.get_active_spool()
+        self.anomaly.start(start.timestamp(), spool.material if spool else None)
+        self._state_machine.resume(now.timestamp())
+        self._gap_start = dt_util.parse_datetime(session.get("last_seen") or "") or start
+        self.logger.info(f"Restored print session started at {start}, last seen at {self._gap_start}")
+
+    async def _stop_session(self, current_energy: float, current_material: float | None) -> None:
+        """Close the session where it ended: at the first non-printing state, or in the downtime gap."""
+        candidate = self._stop_candidate
+        self._stop_candidate = None
+        gap_start = self._gap_start
+        self._gap_start = None
+        if gap_start is not None:
+            end = await self._async_reconcile_gap(gap_start)
+            if end is not None:
+                end_time, end_energy, end_material, end_sources = end
+                self._sources.rewind(end_sources)
+                self.logger.info(
+                    f"Print ended at {end_time} while Home Assistant was down, "
+                    f"closing it with energy {end_energy:.3f} instead of {current_energy:.3f}"
+                )
+                await self._handle_print_stop(
+                    end_energy,
+                    end_material if end_material is not None else current_material,
+                    end_time,
+                )
+                return
+        if candidate is not None:
+            end_energy, end_material, end_time, end_sources = candidate
+            self._sources.rewind(end_sources)
+            await self._handle_print_stop(
+                end_energy,
+                end_material if end_material is not None else current_material,
+                end_time,
+            )
+            return
+        await self._handle_print_stop(current_energy, current_material)
+
+    async def _async_reconcile_gap(
+        self, gap_start: datetime
+    ) -> tuple[datetime, float, float | None, dict[str, float]] | None:
+        """Find when the print really ended, and the readings at that time, in the recorder."""
+        if "recorder" not in self.hass.config.components:
+            return None
+        from homeassistant.components.recorder import get_instance
+
+        try:
+            return await get_instance(self.hass).async_add_executor_job(
+                self._find_gap_end, gap_start, dt_util.utcnow()
+            )
+        except Exception as err:  # Recorder errors must never block closing the session
+            self.logger.warning(f"Could not reconcile print end from recorder history: {err}")
+            return None
+
+    def _find_gap_end(
+        self, gap_start: datetime, gap_end: datetime
+    ) -> tuple[datetime, float, float | None, dict[str, float]] | None:
+        """Query the recorder for the print end within the gap (runs in the recorder executor)."""
+        from homeassistant.components.recorder import history
+
+        # Printing sensor transitions, bounded to the downtime window
+        states = history.state_changes_during_period(
+            self.hass,
+            gap_start,
+            gap_end,
+            entity_id=self.printing_sensor,
+            # Printing and pause rules may test attributes
+            no_attributes=False,
+            include_start_time_state=True,
+        ).get(self.printing_sensor, [])
+        end = find_session_end(
+            (
+                (state.last_changed.timestamp(), self._classify_printing_state(state))
+                for state in states
+            ),
+            gap_start.timestamp(),
+            self._state_machine.stop_dwell,
+        )
+        if end is None:
+            return None
+        end_time = dt_util.utc_from_timestamp(end)
+
+        if self.energy_sensor:
+            end_energy = self._closest_reading(self.energy_sensor, end_time, self._get_energy_value)
+            if end_energy is not None:
+                # Recorder readings are raw, baselines include the carried offset
+                end_energy += self._counter_offset(self.energy_sensor)
+        else:
+            end_energy = self._integrate_power_history(gap_start, end_time)
+        if end_energy is None:
+            return None
+        end_material = None
+        if self.material_sensor:
+            end_material = self._closest_reading(self.material_sensor, end_time, self._get_material_value)
+            if end_material is not None:
+                end_material += self._counter_offset(self.material_sensor)
+        end_sources = {}
+        for entity_id in self.energy_sources:
+            reading = self._closest_reading(entity_id, end_time, self._get_energy_value)
+            if reading is not None:
+                end_sources[entity_id] = reading + self._counter_offset(entity_id)
+        return end_time, end_energy, end_material, end_sources
+
+    def _closest_reading(
+        self, entity_id: str, moment: datetime, parse: Callable[[State], float]
+    ) -> float | None:
+        """Return the recorded reading of an entity closest to a moment."""
+        from homeassistant.components.recorder import history
+
+        window = timedelta(seconds=RECONCILE_ENERGY_WINDOW)
+        states = history.state_changes_during_period(
+            self.hass,
+            moment - window,
+            moment + window,
+            entity_id=entity_id,
+            include_start_time_state=True,
+        ).get(entity_id, [])
+        valid = [
+            state for state in states if state.state not in (STATE_UNAVAILABLE, STATE_UNKNOWN)
+        ]
+        if not valid:
+            return None
+        closest = min(valid, key=lambda state: abs((state.last_updated - moment).total_seconds()))
+        return parse(closest)
+
+    def _integrate_power_history(self, gap_start: datetime, end_time: datetime) -> float | None:
+        """Return the integrated energy total at the print end from recorded power."""
+        from homeassistant.components.recorder import history
+
+        if self._power_integrator is None:
+            return None
+        states = history.state_changes_during_period(
+            self.hass,
+            gap_start,
+            end_time,
+            entity_id=self.power_sensor,
+            include_start_time_state=True,
+        ).get(self.power_sensor, [])
+        integrator = PowerIntegrator(POWER_MAX_GAP)
+        for state in states:
+            power = None
+            if state.state not in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+                power = self._get_power_value(state)
+            integrator.add_sample(max(state.last_updated, gap_start).timestamp(), power)
+        if not integrator.has_sample:
+            return None
+        # The persisted total was saved at gap_start, add what was used until the end
+        return self._power_integrator.energy + integrator.advance(end_time.timestamp())
+
+    async def _handle_print_stop(
+        self,
+        current_energy: float,
+        current_material: float | None = None,
+        end_time: datetime | None = None,
+    ) -> None:
         """Handle when printing stops."""
         if self.session_start_energy is not None:
-            session_energy = current_energy - self.session_start_energy
+            meter_energy = current_energy - self.session_start_energy
+            session_energy = meter_energy + self._sources.session_total()
             if session_energy > 0:
                 self.current_session_energy = session_energy
                 self.total_energy += session_energy
                 self.last_print_energy = session_energy
                 self.print_count += 1
-                self.last_print_end = dt_util.utcnow()
+                self.last_print_end = end_time or dt_util.utcnow()
+
+                self._cross_check_session_energy(meter_energy)
 
                 # Calculate energy cost
                 energy_cost_per_kwh = self._get_energy_cost_per_kwh()
@@ -426,13 +1334,16 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
                         
                         # Calculate material cost (convert mm to meters)
                         material_meters = session_material / 1000.0
-                        self.last_print_material_cost = material_meters * self.material_cost_per_meter
+                        cost_per_meter = self._get_material_cost_per_meter()
+                        self.last_print_material_cost = material_meters * cost_per_meter
                         self.total_material_cost += self.last_print_material_cost
                         self.current_session_material_cost = self.last_print_material_cost
                         self.logger.info(
                             f"Material cost calc: material_mm={session_material}, material_meters={material_meters}, "
-                            f"cost_per_meter={self.material_cost_per_meter}, cost={self.last_print_material_cost}"
+                            f"cost_per_meter={cost_per_meter}, cost={self.last_print_material_cost}"
                         )
+                        # Take the used material off the loaded spool
+                        self.spool_registry.async_deduct(self.active_spool_id, material_meters)
                     else:
                         self.current_session_material = 0.0
                         self.last_print_material_cost = 0.0
@@ -447,6 +1358,61 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
                 self.total_cost += self.last_print_total_cost
                 self.current_session_total_cost = self.last_print_total_cost
 
+                # Learn from this print for future forecasts
+                if self.last_print_start is not None:
+                    self.cost_model.add_print(
+                        (self.last_print_end - self.last_print_start).total_seconds() / 3600.0,
+                        session_energy,
+                        self.current_session_material,
+                        self.last_print_material_cost,
+                    )
+                    self.anomaly.add_print(
+                        (self.last_print_end - self.last_print_start).total_seconds() / 3600.0,
+                        session_energy,
+                        self.current_session_material,
+                        self.anomaly.material_type,
+                    )
+                    self.rolling.add_print(
+                        self.last_print_end.timestamp(),
+                        (self.last_print_end - self.last_print_start).total_seconds() / 3600.0,
+                        session_energy,
+                        self.current_session_material,
+                        self.last_print_total_cost,
+                    )
+
+                # Record the print with its phase breakdown and job metadata
+                record = {
+                    "start": self.last_print_start.timestamp() if self.last_print_start else None,
+                    "end": self.last_print_end.timestamp(),
+                    "energy": session_energy,
+                    "material": self.current_session_material,
+                    "energy_cost": self.last_print_energy_cost,
+                    "material_cost": self.last_print_material_cost,
+                    "total_cost": self.last_print_total_cost,
+                    "phases": self._phase_detector.finish(
+                        self.last_print_end.timestamp(), session_energy
+                    ),
+                    "curve": self._power_curve.finish(),
+                }
+                if self.energy_sources:
+                    record["sources"] = {
+                        self.energy_sensor or self.power_sensor: round(meter_energy, 4),
+                        **self._sources.breakdown(),
+                    }
+                if self.anomaly.active:
+                    record["anomalies"] = sorted(self.anomaly.active)
+                corrections = self._session_corrections()
+                if corrections:
+                    record["corrections"] = corrections
+                record.update(self._job_record_fields())
+                self.history.append(record)
+                self.hass.bus.async_fire(
+                    EVENT_PRINT_FINISHED, self._finished_event_data(record, energy_cost_per_kwh)
+                )
+                self._schedule_history_maintenance()
+                # The learned print profile changed
+                self._update_best_start(force=True)
+
                 # Save to storage
                 await self._save_data()
 
@@ -464,10 +1430,210 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
         self.is_printing = False
         self.session_start_energy = None
         self.session_start_material = None
+        self.session_start_integrated = None
+        self._sources.clear()
+        self.anomaly.reset()
+        self._phase_detector.reset()
+        self._power_curve.reset()
+        self.session_job = {}
+        self._clear_forecast()
+
+    def _seed_rolling(self) -> None:
+        """Fill the rolling windows from the raw print records, oldest first."""
+        self.rolling = RollingEfficiency(ROLLING_PRINTS, ROLLING_DAYS, ROLLING_BUCKET_SECONDS)
+        for record in self.history.records:
+            if record.get("start") is not None:
+                self.rolling.add_print(
+                    record["end"],
+                    (record["end"] - record["start"]) / 3600.0,
+                    record.get("energy", 0.0),
+                    record.get("material", 0.0),
+                    record.get("total_cost", 0.0),
+                )
+
+    def _session_corrections(self) -> list[dict[str, Any]]:
+        """Return the counter corrections made during the session, oldest first."""
+        corrections = [
+            correction for counter in self._counters.values() for correction in counter.corrections
+        ]
+        corrections.sort(key=lambda correction: correction["time"])
+        return corrections
+
+    def _print_event_base(self) -> dict[str, Any]:
+        """Return the fields shared by the print started and finished events."""
+        return {
+            ATTR_CONFIG_ENTRY_ID: self.entry_id,
+            "name": self.printer_name,
+            "energy_price": self._get_energy_cost_per_kwh(),
+            "material_cost_per_meter": self._get_material_cost_per_meter(),
+            "currency": self._get_currency(),
+        }
+
+    def _finished_event_data(self, record: dict[str, Any], energy_price: float) -> dict[str, Any]:
+        """Return the print finished event: the full record with names resolved and the tariff."""
+        data = self._print_event_base()
+        data["energy_price"] = energy_price  # The price the energy cost was computed with
+        data.update(
+            {
+                "start": self.last_print_start.isoformat() if self.last_print_start else None,
+                "end": self.last_print_end.isoformat(),
+                "duration": record["end"] - record["start"] if record.get("start") is not None else None,
+                "energy": record["energy"],
+                "material": record["material"],
+                "energy_cost": record["energy_cost"],
+                "material_cost": record["material_cost"],
+                "total_cost": record["total_cost"],
+                "phases": record.get("phases", {}),
+                "sources": record.get("sources", {}),
+                "corrections": record.get("corrections", []),
+                "anomalies": record.get("anomalies", []),
+                "job": self.history.lookup(record.get("job")),
+                "file": self.history.lookup(record.get("file")),
+                "material_type": self.history.lookup(record.get("material_type")),
+                "spool_id": self.history.lookup(record.get("spool")),
+                "estimated_time": record.get("estimated_time"),
+                "estimated_material": record.get("estimated_material"),
+                "print_count": self.print_count,
+            }
+        )
+        return data
+
+    async def async_reprice(
+        self,
+        start: float | None,
+        end: float | None,
+        energy_price: float | None,
+        slots: list[tuple[float, float, float]],
+        cost_per_meter: float | None,
+        spool_id: str | None,
+        dry_run: bool = False,
+    ) -> dict[str, Any]:
+        """Recompute the costs of past prints under a corrected tariff or spool price.
+
+        Costs are computed in the executor, written back to the history in
+        one step, then the totals and the forecast model are adjusted by the
+        delta. Compacted aggregates keep their costs.
+        """
+        async with self._reprice_lock:
+            records = self.history.records
+            spool = self.history.index_of(spool_id) if spool_id is not None else None
+            if spool_id is not None and spool is None:
+                # No recorded print used this spool
+                cost_per_meter = None
+            result = await self.hass.async_add_executor_job(
+                reprice_records, list(records), start, end, energy_price, slots, cost_per_meter, spool
+            )
+            delta = result["delta"]
+            response = {
+                ATTR_CONFIG_ENTRY_ID: self.entry_id,
+                "name": self.printer_name,
+                "prints": result["prints"],
+                "repriced": len(result["indexes"]),
+                "delta": {key: round(value, 4) for key, value in delta.items()},
+                "currency": self._get_currency(),
+            }
+            if dry_run or not result["indexes"]:
+                return response
+            if not await self.history.async_update_costs(
+                records, result["indexes"], result["energy_cost"], result["material_cost"]
+            ):
+                raise HomeAssistantError("Print history was compacted or cleared while repricing, try again")
+
+            self.total_energy_cost += delta["energy_cost"]
+            self.total_material_cost += delta["material_cost"]
+            self.total_cost += delta["total_cost"]
+            # The model also counts compacted prints, so it is adjusted rather than rebuilt
+            self.cost_model.sum_material_cost = max(
+                self.cost_model.sum_material_cost + delta["material_cost"], 0.0
+            )
+            if len(records) - 1 in result["indexes"]:
+                last_record = records[-1]
+                self.last_print_energy_cost = last_record["energy_cost"]
+                self.last_print_material_cost = last_record["material_cost"]
+                self.last_print_total_cost = last_record["total_cost"]
+            # The windows hold the old costs
+            self._seed_rolling()
+            self.logger.info(
+                f"Repriced {response['repriced']} prints, total cost changed by {delta['total_cost']:.2f}"
+            )
+        await self._save_data()
+        await self.async_refresh()
+        return response
+
+    def _job_record_fields(self) -> dict[str, Any]:
+        """Return job metadata for the print record, with strings interned."""
+        fields: dict[str, Any] = {}
+        spool = self.get_active_spool()
+        strings = {
+            "job": self.session_job.get("job"),
+            "file": self.session_job.get("file"),
+            "material_type": spool.material if spool and spool.material else None,
+            "spool": self.active_spool_id,
+        }
+        for key, value in strings.items():
+            if value is not None:
+                fields[key] = self.history.intern(value)
+        for key in ("estimated_time", "estimated_material"):
+            if key in self.session_job:
+                fields[key] = self.session_job[key]
+        return fields
+
+    @callback
+    def _schedule_history_maintenance(self) -> None:
+        """Compact old history and measure its size without blocking the caller."""
+        self.hass.async_create_background_task(
+            self._async_maintain_history(),
+            f"{DOMAIN} history maintenance {self.entry_id}",
+        )
+
+    async def _async_maintain_history(self) -> None:
+        """Compact records past the retention window and update the disk usage."""
+        if self.history_retention > 0:
+            cutoff = months_before(dt_util.utcnow().timestamp(), self.history_retention)
+            records_before = len(self.history.records)
+            if await self.history.async_compact(cutoff, self.history_compaction):
+                self.logger.info(
+                    f"Compacted print history: {records_before - len(self.history.records)} records "
+                    f"older than {self.history_retention} months folded into {self.history_compaction} aggregates"
+                )
+        await self.history.async_update_disk_usage()
+        await self.async_refresh()
+
+    def _cross_check_session_energy(self, session_energy: float) -> None:
+        """Compare metered session energy with the integrated power sensor."""
+        if self.session_start_integrated is None:
+            return
+        integrated_total = self._get_integrated_energy()
+        if integrated_total is None:
+            return
+        integrated_energy = integrated_total - self.session_start_integrated
+        self.last_print_integrated_energy = integrated_energy
+        if session_energy < POWER_CROSS_CHECK_MIN_ENERGY:
+            return
+        deviation = abs(integrated_energy - session_energy) / session_energy
+        if deviation > POWER_CROSS_CHECK_TOLERANCE:
+            self.logger.warning(
+                f"Energy meter {self.energy_sensor} and integrated power {self.power_sensor} disagree: "
+                f"meter={session_energy:.3f} kWh, integrated={integrated_energy:.3f} kWh ({deviation:.0%})"
+            )
 
     async def _save_data(self) -> None:
         """Save data to persistent storage."""
-        data = {
+        await self.storage.save(self._storage_data())
+
+    @callback
+    def _save_last_seen(self) -> None:
+        """Persist the running print's last seen time now and then, for crash recovery."""
+        now = dt_util.utcnow().timestamp()
+        if now - self._last_seen_saved < LAST_SEEN_SAVE_INTERVAL:
+            return
+        self._last_seen_saved = now
+        # The data is built when the delayed write runs, so last_seen is that time
+        self.storage.delay_save(self._storage_data, LAST_SEEN_SAVE_DELAY)
+
+    def _storage_data(self) -> dict[str, Any]:
+        """Return the data to persist."""
+        return {
             "total_energy": self.total_energy,
             "print_count": self.print_count,
             "last_print_energy": self.last_print_energy,
@@ -479,14 +1645,40 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
             ),
             "total_material": self.total_material,
             "last_print_material": self.last_print_material,
+            "last_print_integrated_energy": self.last_print_integrated_energy,
             "total_energy_cost": self.total_energy_cost,
             "total_material_cost": self.total_material_cost,
             "total_cost": self.total_cost,
             "last_print_energy_cost": self.last_print_energy_cost,
             "last_print_material_cost": self.last_print_material_cost,
             "last_print_total_cost": self.last_print_total_cost,
+            "cost_model": self.cost_model.as_dict(),
+            "anomaly": self.anomaly.as_dict(),
+            "rolling": self.rolling.as_dict(),
+            "active_spool": self.active_spool_id,
+            "open_session": self._open_session_data(),
+            "integrated_energy": self._power_integrator.energy if self._power_integrator else 0.0,
         }
-        await self.storage.save(data)
+
+    def _open_session_data(self) -> dict[str, Any] | None:
+        """Return the running session's baseline for storage, or None when idle."""
+        if not self.is_printing or self.session_start_energy is None:
+            return None
+        return {
+            "start": self.last_print_start.isoformat() if self.last_print_start else None,
+            "start_energy": self.session_start_energy,
+            "start_material": self.session_start_material,
+            "sources": self._sources.as_dict(),
+            "counters": {entity_id: counter.as_dict() for entity_id, counter in self._counters.items()},
+            "job": self.session_job,
+            "last_seen": dt_util.utcnow().isoformat(),
+        }
+
+    async def _async_handle_stop_event(self, _event: Any) -> None:
+        """Save the open session and integrated total when Home Assistant stops."""
+        if self._power_integrator is not None and self._power_integrator.has_sample:
+            self._power_integrator.advance(dt_util.utcnow().timestamp())
+        await self._save_data()
 
     async def _update_printing_state(self) -> None:
         """Update printing state based on current sensor state.
@@ -495,30 +1687,30 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
         """
         printing_state = self.hass.states.get(self.printing_sensor)
         if printing_state and printing_state.state not in (STATE_UNAVAILABLE, STATE_UNKNOWN):
-            printing_state_value = printing_state.state.lower()
-            printing = printing_state_value in self.printing_states
+            current_energy = self._get_current_energy()
+
+            # Get material value if configured
+            current_material = None
+            if self.material_sensor:
+                material_state = self.hass.states.get(self.material_sensor)
+                if material_state and material_state.state not in (
+                    STATE_UNAVAILABLE,
+                    STATE_UNKNOWN,
+                ):
+                    current_material = self._filter_counter(
+                        self.material_sensor, material_state, self._get_material_value(material_state)
+                    )
+
+            printing = self._update_state_machine(printing_state, current_energy, current_material)
             if printing != self.is_printing:
-                energy_state = self.hass.states.get(self.energy_sensor)
-                if energy_state and energy_state.state not in (STATE_UNAVAILABLE, STATE_UNKNOWN):
-                    current_energy = self._get_energy_value(energy_state)
-                    
-                    # Get material value if configured
-                    current_material = None
-                    if self.material_sensor:
-                        material_state = self.hass.states.get(self.material_sensor)
-                        if material_state and material_state.state not in (
-                            STATE_UNAVAILABLE,
-                            STATE_UNKNOWN,
-                        ):
-                            current_material = self._get_material_value(material_state)
-                    
+                if current_energy is not None:
                     if printing:
-                        await self._handle_print_start(current_energy, current_material)
+                        await self._start_from_candidate(current_energy, current_material)
                     else:
-                        await self._handle_print_stop(current_energy, current_material)
+                        await self._stop_session(current_energy, current_material)
                 else:
                     # Energy sensor unavailable - skip update but log it
-                    self.logger.debug(f"Energy sensor {self.energy_sensor} unavailable, skipping print state transition")
+                    self.logger.debug(f"Energy sensor {self.energy_sensor or self.power_sensor} unavailable, skipping print state transition")
         else:
             # Printing sensor unavailable - skip update but log it
             self.logger.debug(f"Printing sensor {self.printing_sensor} unavailable, skipping print state check")
@@ -526,20 +1718,47 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
     @callback
     def _state_listener(self, event: dict) -> None:
         """Handle state change events."""
+        started = time.perf_counter()
         entity_id = event.data.get("entity_id")
-        tracked_entities = [self.energy_sensor, self.printing_sensor]
+        if entity_id == self.power_sensor:
+            # Integrate every power change, refreshes may coalesce several of them
+            self._add_power_sample(event.data.get("new_state"))
+        if entity_id in self.energy_sources:
+            new_state = event.data.get("new_state")
+            if new_state is not None and new_state.state not in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+                # The filter follows every reading, so a reset between prints is seen
+                reading = self._filter_counter(entity_id, new_state, self._get_energy_value(new_state))
+                if self.is_printing:
+                    # Only this source's delta changes, the session total moves by the difference
+                    self._sources.update(entity_id, reading)
+                    self.hass.async_create_task(self.async_refresh())
+        if entity_id == self.energy_cost_sensor and entity_id is not None:
+            # Price state changes often, the forecast list usually once a day
+            if self._update_best_start():
+                self.hass.async_create_task(self.async_refresh())
+        tracked_entities = [self.energy_sensor, self.printing_sensor, self.power_sensor]
         if self.material_sensor:
             tracked_entities.append(self.material_sensor)
         if entity_id in tracked_entities:
             self.hass.async_create_task(self.async_refresh())
+        self.perf.add_event(time.perf_counter() - started)
 
     @callback
     def async_setup_listeners(self) -> Callable[[], None]:
         """Set up state change listeners and return cleanup function."""
         remove_listener = self.hass.bus.async_listen("state_changed", self._state_listener)
         self._event_listeners.append(remove_listener)
+        self._event_listeners.append(self.spool_registry.async_add_listener(self._spools_changed))
+        self._event_listeners.append(
+            self.hass.bus.async_listen(EVENT_HOMEASSISTANT_STOP, self._async_handle_stop_event)
+        )
         return remove_listener
 
+    @callback
+    def _spools_changed(self) -> None:
+        """Refresh when spools are added, edited or used."""
+        self.hass.async_create_task(self.async_refresh())
+
     async def async_reset_data(self) -> None:
         """Reset all accumulated data."""
         self.total_energy = 0.0
@@ -549,6 +1768,7 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
         self.last_print_material = 0.0
         self.last_print_start = None
         self.last_print_end = None
+        self.last_print_integrated_energy = 0.0
         self.total_energy_cost = 0.0
         self.total_material_cost = 0.0
         self.total_cost = 0.0
@@ -560,9 +1780,13 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
         self.current_session_energy_cost = 0.0
         self.current_session_material_cost = 0.0
         self.current_session_total_cost = 0.0
+        self.cost_model = PrintCostModel()
+        self.anomaly = AnomalyDetector()
+        self.rolling = RollingEfficiency(ROLLING_PRINTS, ROLLING_DAYS, ROLLING_BUCKET_SECONDS)
         
         # Save reset state to storage
         await self._save_data()
+        await self.history.clear()
         
         # Refresh to update sensors
         await self.async_refresh()
@@ -575,3 +1799,6 @@ class PrinterEnergyCoordinator(DataUpdateCoordinator):
         for remove_listener in self._event_listeners:
             remove_listener()
         self._event_listeners.clear()
+        if self._unsub_state_timer is not None:
+            self._unsub_state_timer()
+            self._unsub_state_timer = None
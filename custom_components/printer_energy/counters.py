@@ -0,0 +1,193 @@
+"""Reset, rollover and glitch filter for cumulative energy and material counters.
+
+Smart plugs restart their energy counter at zero when they reboot, 16/32-bit
+counters roll over, and filament counters reset on every spool change. The
+filter turns the raw readings of one counter into a monotonic value:
+
+* A rise much faster than the recent rates (median + k * MAD of a bounded
+  window) is a spike. It is confirmed by the next reading staying up,
+  otherwise the single sample is dropped.
+* A drop larger than the rise that limit allows over the same time is a
+  reset, whatever fraction of the last reading is left. Until enough rates
+  are known, a drop to below half of the last reading is. It is confirmed
+  by the next reading staying low, then the last value is carried as an
+  offset so the counter continues where it was.
+* Smaller decreases are jitter and hold the value.
+
+Only the suspect sample waits for its successor; all other readings pass
+through at once. Every correction is recorded for the session record.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+import statistics
+from typing import Any, Mapping
+
+# Before the rate window fills, readings below this fraction of the last one are a reset
+RESET_FRACTION = 0.5
+# Rates kept for the outlier test, and how many are needed before it applies
+RATE_WINDOW = 15
+RATE_MIN_SAMPLES = 5
+# A rise is a spike above median + SPIKE_MADS * MAD, and at least SPIKE_RATIO * median
+SPIKE_MADS = 10.0
+SPIKE_RATIO = 5.0
+# Scale of the MAD to a standard deviation of normally distributed rates
+MAD_SCALE = 1.4826
+# Corrections kept per session, the count goes on
+MAX_CORRECTIONS = 20
+
+CORRECTION_RESET = "reset"
+CORRECTION_DROPOUT = "dropout"
+CORRECTION_SPIKE = "spike"
+
+
+class CounterFilter:
+    """Monotonic view of one cumulative counter."""
+
+    __slots__ = (
+        "entity_id",
+        "offset",
+        "last_raw",
+        "last_time",
+        "pending",
+        "rates",
+        "corrections",
+        "correction_count",
+    )
+
+    def __init__(self, entity_id: str) -> None:
+        """Initialize the filter without readings."""
+        self.entity_id = entity_id
+        self.offset = 0.0
+        self.last_raw: float | None = None
+        self.last_time: float | None = None
+        # Suspect reading (raw, time, kind) waiting for the next one
+        self.pending: tuple[float, float, str] | None = None
+        self.rates: deque[float] = deque(maxlen=RATE_WINDOW)
+        self.corrections: list[dict[str, Any]] = []
+        self.correction_count = 0
+
+    @property
+    def value(self) -> float | None:
+        """Return the filtered counter value, or None before the first reading."""
+        if self.last_raw is None:
+            return None
+        return self.last_raw + self.offset
+
+    def update(self, raw: float, timestamp: float) -> float:
+        """Filter a reading and return the counter value.
+
+        Readings are keyed by their timestamp, so reading the same state
+        again is a no-op.
+        """
+        if self.last_raw is None:
+            self.last_raw = raw
+            self.last_time = timestamp
+            return raw + self.offset
+        if timestamp == self.last_time or (self.pending is not None and timestamp == self.pending[1]):
+            return self.last_raw + self.offset
+
+        if self.pending is not None:
+            pending_raw, pending_time, kind = self.pending
+            self.pending = None
+            if kind == CORRECTION_RESET:
+                if self._is_reset(raw, timestamp):
+                    # Still low: the counter restarted, continue from the last value
+                    self._record(CORRECTION_RESET, pending_time, pending_raw)
+                    self.offset += self.last_raw
+                    self.last_raw = pending_raw
+                    self.last_time = pending_time
+                else:
+                    self._record(CORRECTION_DROPOUT, pending_time, pending_raw)
+            elif raw >= pending_raw:
+                # Still up: a real jump (e.g. after a gap), accept it
+                self._accept(pending_raw, pending_time)
+            else:
+                self._record(CORRECTION_SPIKE, pending_time, pending_raw)
+
+        self._step(raw, timestamp)
+        return self.last_raw + self.offset
+
+    def _step(self, raw: float, timestamp: float) -> None:
+        """Accept a reading, or hold it as pending when it looks wrong."""
+        if raw < self.last_raw:
+            if self._is_reset(raw, timestamp):
+                self.pending = (raw, timestamp, CORRECTION_RESET)
+            # Smaller decreases are jitter, the value holds
+            return
+        if raw > self.last_raw and self._is_spike(raw, timestamp):
+            self.pending = (raw, timestamp, CORRECTION_SPIKE)
+            return
+        self._accept(raw, timestamp)
+
+    def _accept(self, raw: float, timestamp: float) -> None:
+        """Take a reading and learn its rate."""
+        elapsed = timestamp - self.last_time
+        if raw > self.last_raw and elapsed > 0:
+            self.rates.append((raw - self.last_raw) / elapsed)
+        self.last_raw = raw
+        self.last_time = timestamp
+
+    def _is_spike(self, raw: float, timestamp: float) -> bool:
+        """Return if a rise is far faster than the recent rates."""
+        if len(self.rates) < RATE_MIN_SAMPLES:
+            return False
+        elapsed = max(timestamp - self.last_time, 1.0)
+        return (raw - self.last_raw) / elapsed > self._rate_limit()
+
+    def _is_reset(self, raw: float, timestamp: float) -> bool:
+        """Return if a drop is too large to be jitter.
+
+        Jitter moves a reading by about one step of the counter, so a drop
+        is a reset when it is larger than the rise the recent rates allow
+        over the same time. Without enough rates, a fixed fraction of the
+        last reading decides.
+        """
+        if len(self.rates) < RATE_MIN_SAMPLES:
+            return raw < self.last_raw * RESET_FRACTION
+        elapsed = max(timestamp - self.last_time, 1.0)
+        return (self.last_raw - raw) / elapsed > self._rate_limit()
+
+    def _rate_limit(self) -> float:
+        """Return the fastest plausible rate, median + k * MAD of the recent rates."""
+        median = statistics.median(self.rates)
+        mad = statistics.median(abs(value - median) for value in self.rates)
+        return max(median + SPIKE_MADS * MAD_SCALE * mad, SPIKE_RATIO * median)
+
+    def _record(self, kind: str, timestamp: float, raw: float) -> None:
+        """Remember a correction for the session record."""
+        self.correction_count += 1
+        if len(self.corrections) < MAX_CORRECTIONS:
+            self.corrections.append(
+                {
+                    "entity_id": self.entity_id,
+                    "kind": kind,
+                    "time": timestamp,
+                    "raw": raw,
+                    "previous": self.last_raw,
+                }
+            )
+
+    def begin_session(self) -> None:
+        """Start collecting the corrections of a new session."""
+        self.corrections = []
+        self.correction_count = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state that keeps a session's baseline valid after a restart."""
+        return {
+            "offset": self.offset,
+            "last_raw": self.last_raw,
+            "last_time": self.last_time,
+            "corrections": self.corrections,
+            "correction_count": self.correction_count,
+        }
+
+    def restore(self, data: Mapping[str, Any]) -> None:
+        """Restore a stored filter; the rate window is learned again."""
+        self.offset = data.get("offset", 0.0)
+        self.last_raw = data.get("last_raw")
+        self.last_time = data.get("last_time")
+        self.corrections = list(data.get("corrections", []))
+        self.correction_count = data.get("correction_count", len(self.corrections))
@@ -0,0 +1,176 @@
+"""Compact per-print power curve capture."""
+
+from __future__ import annotations
+
+from array import array
+import base64
+import sys
+from typing import Any
+
+from .power import WS_PER_KWH
+
+
+class PowerCurve:
+    """Capture a session's power curve within a fixed point budget.
+
+    Samples are min/max bucketed online: each time bucket keeps its lowest
+    and highest reading, so short spikes and dips survive downsampling. When
+    the bucket count exceeds the budget, bucket width doubles and neighbouring
+    buckets are merged in place. Points are held in ``array('f')`` buffers as
+    seconds since session start and watts, so memory is bounded by
+    ``max_points`` regardless of print length.
+    """
+
+    __slots__ = (
+        "max_points",
+        "min_bucket_seconds",
+        "bucket_seconds",
+        "start",
+        "_index",
+        "_values",
+        "_last_ts",
+        "_last_energy",
+    )
+
+    def __init__(self, max_points: int, bucket_seconds: float) -> None:
+        """Initialize an empty curve."""
+        self.max_points = max(max_points, 4)
+        self.min_bucket_seconds = bucket_seconds
+        self.bucket_seconds = bucket_seconds
+        self.start: float | None = None
+        # Bucket number per bucket, and (t_low, v_low, t_high, v_high) per bucket
+        self._index = array("l")
+        self._values = array("f")
+        self._last_ts = 0.0
+        self._last_energy = 0.0
+
+    @property
+    def active(self) -> bool:
+        """Return True while a session is being captured."""
+        return self.start is not None
+
+    def begin(self, timestamp: float) -> None:
+        """Start capturing a new session."""
+        self.bucket_seconds = self.min_bucket_seconds
+        self.start = timestamp
+        self._index = array("l")
+        self._values = array("f")
+        self._last_ts = timestamp
+        self._last_energy = 0.0
+
+    def update(self, timestamp: float, session_energy: float, power: float | None = None) -> None:
+        """Add a sample of power (W), or derive it from session energy (kWh)."""
+        if self.start is None:
+            return
+        if power is None:
+            elapsed = timestamp - self._last_ts
+            delta = session_energy - self._last_energy
+            if elapsed <= 0 or delta == 0:
+                # Meter has not ticked yet - wait for the next step to measure the rate
+                return
+            power = max(delta, 0.0) * WS_PER_KWH / elapsed
+            self._last_ts = timestamp
+            self._last_energy = session_energy
+        self.add(timestamp, power)
+
+    def add(self, timestamp: float, power: float) -> None:
+        """Add a power reading (W) at an epoch timestamp."""
+        if self.start is None:
+            return
+        offset = max(timestamp - self.start, 0.0)
+        bucket = int(offset // self.bucket_seconds)
+        values = self._values
+
+        if self._index and self._index[-1] == bucket:
+            base = len(values) - 4
+            if power < values[base + 1]:
+                values[base] = offset
+                values[base + 1] = power
+            if power > values[base + 3]:
+                values[base + 2] = offset
+                values[base + 3] = power
+            return
+
+        self._index.append(bucket)
+        values.extend((offset, power, offset, power))
+        if len(self._index) * 2 > self.max_points:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Double the bucket width and merge neighbouring buckets in place."""
+        index = self._index
+        values = self._values
+        self.bucket_seconds *= 2
+        write = -1
+        for read in range(len(index)):
+            bucket = index[read] >> 1
+            base = read * 4
+            if write >= 0 and index[write] == bucket:
+                target = write * 4
+                if values[base + 1] < values[target + 1]:
+                    values[target] = values[base]
+                    values[target + 1] = values[base + 1]
+                if values[base + 3] > values[target + 3]:
+                    values[target + 2] = values[base + 2]
+                    values[target + 3] = values[base + 3]
+                continue
+            write += 1
+            index[write] = bucket
+            target = write * 4
+            values[target:target + 4] = values[base:base + 4]
+        del index[write + 1:]
+        del values[(write + 1) * 4:]
+
+    def points(self) -> array:
+        """Return the curve as interleaved (seconds, watts) pairs in time order."""
+        result = array("f")
+        values = self._values
+        for base in range(0, len(values), 4):
+            t_low, v_low, t_high, v_high = values[base:base + 4]
+            if t_low == t_high:
+                result.extend((t_low, v_low))
+            elif t_low < t_high:
+                result.extend((t_low, v_low, t_high, v_high))
+            else:
+                result.extend((t_high, v_high, t_low, v_low))
+        return result
+
+    def finish(self) -> dict[str, Any] | None:
+        """Close the session and return the encoded curve (None when empty)."""
+        if self.start is None:
+            return None
+        curve = encode_curve(self.start, self.points()) if self._index else None
+        self.reset()
+        return curve
+
+    def reset(self) -> None:
+        """Drop the captured session."""
+        self.start = None
+        self._index = array("l")
+        self._values = array("f")
+
+
+def encode_curve(start: float, points: array) -> dict[str, Any]:
+    """Encode interleaved float32 points for storage in a print record."""
+    if sys.byteorder == "big":
+        # Stored little-endian so curves stay readable across hosts
+        points = array("f", points)
+        points.byteswap()
+    return {
+        "start": start,
+        "points": len(points) // 2,
+        "data": base64.b64encode(points.tobytes()).decode("ascii"),
+    }
+
+
+def decode_curve(curve: dict[str, Any]) -> list[list[float]]:
+    """Decode a stored curve into [epoch seconds, watts] pairs."""
+    points = array("f")
+    points.frombytes(base64.b64decode(curve["data"]))
+    if sys.byteorder == "big":
+        points.byteswap()
+    start = curve["start"]
+    return [
+        [round(start + points[offset], 1), round(points[offset + 1], 1)]
+        for offset in range(0, len(points) - 1, 2)
+    ]
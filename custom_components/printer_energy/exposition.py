@@ -0,0 +1,156 @@
+"""Prometheus text exposition of printer totals and coordinator counters.
+
+Samples are rendered per printer into fragments (family name -> sample
+lines), so only printers that changed are rendered again. ``render`` then
+joins the fragments of all printers under one HELP/TYPE header per family.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Iterable, Mapping
+
+# (name, type, help) of every metric family, in exposition order
+FAMILIES: tuple[tuple[str, str, str], ...] = (
+    ("printer_energy_printing", "gauge", "1 while a print session is open."),
+    ("printer_energy_prints_total", "counter", "Finished prints."),
+    ("printer_energy_energy_kwh_total", "counter", "Energy used by finished prints in kWh."),
+    ("printer_energy_material_mm_total", "counter", "Material used by finished prints in mm."),
+    ("printer_energy_cost_total", "counter", "Cost of finished prints."),
+    ("printer_energy_session_energy_kwh", "gauge", "Energy used by the running print in kWh."),
+    ("printer_energy_session_material_mm", "gauge", "Material used by the running print in mm."),
+    ("printer_energy_session_cost", "gauge", "Cost of the running print so far."),
+    ("printer_energy_state_transitions_total", "counter", "Printing state machine transitions."),
+    ("printer_energy_suppressed_transitions_total", "counter", "Starts and stops suppressed by dwell times."),
+    ("printer_energy_coordinator_updates_total", "counter", "Coordinator updates."),
+    ("printer_energy_coordinator_update_seconds_total", "counter", "Time spent in coordinator updates."),
+    ("printer_energy_coordinator_update_seconds_max", "gauge", "Slowest coordinator update."),
+    ("printer_energy_coordinator_events_total", "counter", "State change events handled."),
+    ("printer_energy_coordinator_event_seconds_total", "counter", "Time spent handling state change events."),
+    ("printer_energy_metrics_rebuilds_total", "counter", "Rebuilds of this exposition text."),
+    ("printer_energy_metrics_scrapes_total", "counter", "Requests served from the cached exposition text."),
+)
+
+Fragment = dict[str, list[str]]
+
+# Cost kinds and the data key of their finished-print total
+_COST_KINDS = (
+    ("energy", "total_energy_cost"),
+    ("material", "total_material_cost"),
+    ("total", "total_cost"),
+)
+
+
+class PerfCounters:
+    """Cheap counters of a coordinator's own work."""
+
+    __slots__ = ("updates", "update_seconds", "max_update_seconds", "events", "event_seconds")
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.updates = 0
+        self.update_seconds = 0.0
+        self.max_update_seconds = 0.0
+        self.events = 0
+        self.event_seconds = 0.0
+
+    def add_update(self, seconds: float) -> None:
+        """Count one coordinator update."""
+        self.updates += 1
+        self.update_seconds += seconds
+        if seconds > self.max_update_seconds:
+            self.max_update_seconds = seconds
+
+    def add_event(self, seconds: float) -> None:
+        """Count one handled state change event."""
+        self.events += 1
+        self.event_seconds += seconds
+
+
+def _escape(value: Any) -> str:
+    """Escape a label value (backslash, double quote and newline)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: Mapping[str, Any]) -> str:
+    """Return label pairs like ``a="1",b="2"`` with values escaped."""
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def format_value(value: float) -> str:
+    """Return a sample value, with infinities and NaN spelled as the text format wants."""
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _sample(fragment: Fragment, name: str, labels: str, value: Any, extra: str = "") -> None:
+    """Add one sample; values that are not numbers are left out."""
+    if value is None or isinstance(value, str):
+        return
+    if extra:
+        labels = f"{labels},{extra}" if labels else extra
+    fragment.setdefault(name, []).append(f"{name}{{{labels}}} {format_value(float(value))}")
+
+
+def printer_fragment(labels: Mapping[str, str], values: Mapping[str, Any], currency: str) -> Fragment:
+    """Render the samples of one printer from a coordinator data snapshot."""
+    label_text = format_labels(labels)
+    fragment: Fragment = {}
+    _sample(fragment, "printer_energy_printing", label_text, 1 if values.get("is_printing") else 0)
+    _sample(fragment, "printer_energy_prints_total", label_text, values.get("print_count"))
+    _sample(fragment, "printer_energy_energy_kwh_total", label_text, values.get("total_energy"))
+    _sample(fragment, "printer_energy_material_mm_total", label_text, values.get("total_material"))
+    _sample(fragment, "printer_energy_session_energy_kwh", label_text, values.get("current_session_energy"))
+    _sample(fragment, "printer_energy_session_material_mm", label_text, values.get("current_session_material"))
+    for kind, total_key in _COST_KINDS:
+        extra = format_labels({"kind": kind, "currency": currency})
+        _sample(fragment, "printer_energy_cost_total", label_text, values.get(total_key), extra)
+        _sample(fragment, "printer_energy_session_cost", label_text, values.get(f"current_session_{kind}_cost"), extra)
+
+    counters = values.get("state_counters") or {}
+    for transition, count in sorted((counters.get("transitions") or {}).items()):
+        _sample(
+            fragment,
+            "printer_energy_state_transitions_total",
+            label_text,
+            count,
+            format_labels({"transition": transition}),
+        )
+    for kind in ("start", "stop"):
+        _sample(
+            fragment,
+            "printer_energy_suppressed_transitions_total",
+            label_text,
+            counters.get(f"suppressed_{kind}s"),
+            f'kind="{kind}"',
+        )
+    return fragment
+
+
+def perf_fragment(labels: Mapping[str, str], perf: PerfCounters) -> Fragment:
+    """Render the performance counters of one coordinator."""
+    label_text = format_labels(labels)
+    fragment: Fragment = {}
+    _sample(fragment, "printer_energy_coordinator_updates_total", label_text, perf.updates)
+    _sample(fragment, "printer_energy_coordinator_update_seconds_total", label_text, perf.update_seconds)
+    _sample(fragment, "printer_energy_coordinator_update_seconds_max", label_text, perf.max_update_seconds)
+    _sample(fragment, "printer_energy_coordinator_events_total", label_text, perf.events)
+    _sample(fragment, "printer_energy_coordinator_event_seconds_total", label_text, perf.event_seconds)
+    return fragment
+
+
+def render(fragments: Iterable[Fragment]) -> str:
+    """Join fragments into exposition text with one HELP/TYPE header per family."""
+    fragments = list(fragments)
+    lines: list[str] = []
+    for name, metric_type, help_text in FAMILIES:
+        samples = [line for fragment in fragments for line in fragment.get(name, ())]
+        if not samples:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n" if lines else ""
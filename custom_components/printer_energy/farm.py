@@ -0,0 +1,349 @@
+"""Farm mode: many printers in one config entry with one shared coordinator."""
+
+from __future__ import annotations
+
+from datetime import datetime
+import time
+from typing import Any, Callable
+
+from homeassistant.const import CONF_NAME
+from homeassistant.core import Event, HomeAssistant, State, callback
+from homeassistant.helpers.event import async_call_later, async_track_state_change_event
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ATTR_CONFIG_ENTRY_ID,
+    CONF_ENERGY_COST_SENSOR,
+    CONF_MATERIAL_COST_PER_SPOOL,
+    CONF_MATERIAL_SPOOL_LENGTH,
+    CONF_PRINTER_ID,
+    CONF_SHARED_METER_SPLIT,
+    DEFAULT_MATERIAL_COST_PER_SPOOL,
+    DEFAULT_SHARED_METER_SPLIT,
+    DEFAULT_SPOOL_LENGTH,
+    DOMAIN,
+    EVENT_PRINT_FINISHED,
+    EVENT_PRINT_STARTED,
+    FARM_SAVE_DELAY,
+    FARM_STORAGE_VERSION,
+)
+from .apportion import SharedMeter, build_shared_meters
+from .exposition import PerfCounters
+from .tracker import (
+    UNAVAILABLE_STATES,
+    PrinterTracker,
+    build_trackers,
+    parse_energy,
+    parse_material,
+    parse_power,
+)
+
+# Which reading of a tracker an entity feeds
+_ROLE_PRINTING = 0
+_ROLE_ENERGY = 1
+_ROLE_MATERIAL = 2
+_ROLE_POWER = 3
+
+
+class FarmCoordinator(DataUpdateCoordinator):
+    """Track many printers with one listener, one store and one timer.
+
+    Each printer is a slotted ``PrinterTracker``. State changes are
+    dispatched through a map from entity id to the trackers that use it, so
+    an event only touches its own printers and only their entities are
+    notified. Shared cost settings (energy price entity, spool price) apply
+    to every printer in the farm. Printers that reference the same energy
+    sensor share it through a ``SharedMeter``, which splits each meter
+    delta among the printers active at the time.
+    """
+
+    def __init__(self, hass: HomeAssistant, config: dict[str, Any], entry_id: str) -> None:
+        """Initialize the farm coordinator."""
+        super().__init__(
+            hass,
+            logger=__import__("logging").getLogger(__name__),
+            name=f"{DOMAIN} farm",
+            update_interval=None,  # We update on state changes, not on interval
+        )
+        self.entry_id = entry_id
+        self.farm_name = config.get(CONF_NAME, "3D Printer Farm")
+        self.store = Store(hass, FARM_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.farm")
+
+        self.trackers: dict[str, PrinterTracker] = build_trackers(config)
+        # Energy sensors used by more than one printer are split between them
+        self.meters: dict[str, SharedMeter] = build_shared_meters(
+            self.trackers.values(),
+            config.get(CONF_SHARED_METER_SPLIT, DEFAULT_SHARED_METER_SPLIT),
+        )
+
+        # Entity id -> (tracker, role) pairs, so an event only touches its printers
+        self._by_entity: dict[str, list[tuple[PrinterTracker, int]]] = {}
+        for tracker in self.trackers.values():
+            self._by_entity.setdefault(tracker.printing_sensor, []).append((tracker, _ROLE_PRINTING))
+            if tracker.energy_sensor and tracker.energy_sensor not in self.meters:
+                self._by_entity.setdefault(tracker.energy_sensor, []).append((tracker, _ROLE_ENERGY))
+            if tracker.material_sensor:
+                self._by_entity.setdefault(tracker.material_sensor, []).append((tracker, _ROLE_MATERIAL))
+            if tracker.power_sensor and tracker.energy_sensor in self.meters:
+                self._by_entity.setdefault(tracker.power_sensor, []).append((tracker, _ROLE_POWER))
+
+        # Shared cost settings
+        self.energy_cost_sensor = config.get(CONF_ENERGY_COST_SENSOR) or None
+        self.energy_price = 0.0
+        self.currency = "RSD"  # Default currency, like single-printer entries
+        spool_length = float(int(config.get(CONF_MATERIAL_SPOOL_LENGTH, DEFAULT_SPOOL_LENGTH)))
+        spool_cost = float(config.get(CONF_MATERIAL_COST_PER_SPOOL, DEFAULT_MATERIAL_COST_PER_SPOOL))
+        self.material_cost_per_meter = spool_cost / spool_length if spool_length > 0 else 0.0
+
+        self._unsub_timer: Callable[[], None] | None = None
+        self._timer_deadline: float | None = None
+        self._event_listeners: list[Callable[[], None]] = []
+        # Printer id -> entity update callbacks, so a printer's change only updates its entities
+        self._printer_listeners: dict[Any, list[Callable[[], None]]] = {}
+        # Counters of the coordinator's own work, for the metrics endpoint
+        self.perf = PerfCounters()
+
+    async def async_config_entry_first_refresh(self) -> None:
+        """Restore stored totals and read every source entity once."""
+        now = dt_util.utcnow().timestamp()
+        stored = await self.store.async_load() or {}
+        printers = stored.get("printers", {})
+        for tracker in self.trackers.values():
+            if tracker.printer_id in printers:
+                tracker.restore(printers[tracker.printer_id], now)
+        meters = stored.get("meters", {})
+        for entity_id, meter in self.meters.items():
+            if entity_id in meters:
+                meter.restore(meters[entity_id])
+            # Restored sessions share what the meter used while Home Assistant was down
+            for tracker in meter.trackers:
+                meter.update_active(tracker)
+
+        if self.energy_cost_sensor:
+            self._set_energy_price(self.hass.states.get(self.energy_cost_sensor))
+        for entity_id, uses in self._by_entity.items():
+            state = self.hass.states.get(entity_id)
+            for tracker, role in uses:
+                self._apply_reading(tracker, role, state)
+        for entity_id, meter in self.meters.items():
+            state = self.hass.states.get(entity_id)
+            meter.add_reading(parse_energy(state.state, state.attributes) if state else None)
+        await self.async_refresh()
+
+    async def _async_update_data(self) -> dict[str, PrinterTracker]:
+        """Step every printer (startup and dwell deadlines)."""
+        started = time.perf_counter()
+        now = dt_util.utcnow().timestamp()
+        for tracker in self.trackers.values():
+            self._step(tracker, now)
+        self._schedule_timer()
+        self.perf.add_update(time.perf_counter() - started)
+        return self.trackers
+
+    def _apply_reading(self, tracker: PrinterTracker, role: int, state: State | None) -> None:
+        """Store a new reading of one source entity on a tracker."""
+        raw = state.state if state is not None else None
+        # Unavailable readings skip the counter filter, so their time does not matter
+        updated = state.last_updated.timestamp() if state is not None else 0.0
+        if role == _ROLE_PRINTING:
+            tracker.classify(raw, state.attributes if state is not None else None)
+        elif role == _ROLE_ENERGY:
+            tracker.read_energy(parse_energy(raw, state.attributes if state is not None else None), updated)
+        elif role == _ROLE_MATERIAL:
+            tracker.read_material(parse_material(raw), updated)
+        else:
+            tracker.power = parse_power(raw, state.attributes if state is not None else None)
+
+    def _set_energy_price(self, state: State | None) -> None:
+        """Cache the shared energy price and currency from the price entity."""
+        if state is None or state.state in UNAVAILABLE_STATES:
+            self.energy_price = 0.0
+            return
+        # Unit like "RSD/kWh" -> "RSD"
+        unit = state.attributes.get("unit_of_measurement")
+        if unit and isinstance(unit, str):
+            currency = unit.split("/")[0].strip().upper()
+            if currency and len(currency) <= 10:
+                self.currency = currency
+        try:
+            self.energy_price = float(state.state)
+        except (ValueError, TypeError):
+            self.logger.warning(f"Could not parse energy cost from {self.energy_cost_sensor}: {state.state}")
+            self.energy_price = 0.0
+
+    def _step(self, tracker: PrinterTracker, timestamp: float) -> None:
+        """Advance one printer and persist it when a session opens or closes."""
+        was_printing = tracker.is_printing
+        record = tracker.step(timestamp, self.energy_price, self.material_cost_per_meter)
+        meter = self.meters.get(tracker.energy_sensor)
+        if meter is not None:
+            meter.update_active(tracker)
+        if tracker.is_printing and not was_printing:
+            self.logger.info(f"{tracker.name}: printing started. Energy: {tracker.session_start_energy:.2f}")
+            self.hass.bus.async_fire(
+                EVENT_PRINT_STARTED,
+                {
+                    **self._print_event_base(tracker),
+                    "start": dt_util.utc_from_timestamp(tracker.session_start).isoformat(),
+                    "start_energy": tracker.session_start_energy,
+                    "start_material": tracker.session_start_material,
+                },
+            )
+            self._schedule_save()
+        elif was_printing and not tracker.is_printing:
+            if record is not None:
+                self.logger.info(
+                    f"{tracker.name}: printing stopped. Session energy: {record['energy']:.2f} kWh, "
+                    f"Cost: {record['total_cost']:.2f}"
+                )
+                self.hass.bus.async_fire(
+                    EVENT_PRINT_FINISHED,
+                    {
+                        **self._print_event_base(tracker),
+                        **record,
+                        "start": dt_util.utc_from_timestamp(record["start"]).isoformat(),
+                        "end": dt_util.utc_from_timestamp(record["end"]).isoformat(),
+                        "duration": record["end"] - record["start"],
+                        "print_count": tracker.print_count,
+                    },
+                )
+            self._schedule_save()
+
+    def _print_event_base(self, tracker: PrinterTracker) -> dict[str, Any]:
+        """Return the fields shared by the print started and finished events of a printer."""
+        return {
+            ATTR_CONFIG_ENTRY_ID: self.entry_id,
+            CONF_PRINTER_ID: tracker.printer_id,
+            "name": tracker.name,
+            "energy_price": self.energy_price,
+            "material_cost_per_meter": self.material_cost_per_meter,
+            "currency": self.currency,
+        }
+
+    @callback
+    def _async_state_changed(self, event: Event) -> None:
+        """Dispatch a state change to the printers that use the entity."""
+        started = time.perf_counter()
+        self._dispatch(event)
+        self.perf.add_event(time.perf_counter() - started)
+
+    @callback
+    def _dispatch(self, event: Event) -> None:
+        """Apply a state change to the printers that use the entity."""
+        entity_id = event.data["entity_id"]
+        new_state = event.data.get("new_state")
+        if entity_id == self.energy_cost_sensor:
+            self._set_energy_price(new_state)
+        now = dt_util.utcnow().timestamp()
+        meter = self.meters.get(entity_id)
+        if meter is not None:
+            energy = parse_energy(new_state.state, new_state.attributes) if new_state else None
+            for tracker in meter.add_reading(energy):
+                self._step(tracker, now)
+                self._notify(tracker)
+            # Counters are saved with session changes; a lost tick is re-split on restart
+            self._schedule_timer()
+            return
+        uses = self._by_entity.get(entity_id)
+        if not uses:
+            return
+        for tracker, role in uses:
+            self._apply_reading(tracker, role, new_state)
+            if role == _ROLE_POWER:
+                # Only weighs the next meter split
+                continue
+            self._step(tracker, now)
+            self._notify(tracker)
+        self._schedule_timer()
+
+    @callback
+    def async_add_listener(
+        self, update_callback: Callable[[], None], context: Any = None
+    ) -> Callable[[], None]:
+        """Listen for updates, also keyed by the printer id passed as context."""
+        remove_listener = super().async_add_listener(update_callback, context)
+        callbacks = self._printer_listeners.setdefault(context, [])
+        callbacks.append(update_callback)
+
+        @callback
+        def remove_printer_listener() -> None:
+            """Remove the listener from both registries."""
+            remove_listener()
+            if update_callback in callbacks:
+                callbacks.remove(update_callback)
+            if not callbacks and self._printer_listeners.get(context) is callbacks:
+                del self._printer_listeners[context]
+
+        return remove_printer_listener
+
+    @callback
+    def _notify(self, tracker: PrinterTracker) -> None:
+        """Update only the entities of one printer."""
+        for update_callback in list(self._printer_listeners.get(tracker.printer_id, ())):
+            update_callback()
+
+    @callback
+    def _schedule_timer(self) -> None:
+        """Keep one timer armed for the earliest pending start or stop."""
+        deadlines = [
+            deadline
+            for deadline in (tracker.machine.next_deadline() for tracker in self.trackers.values())
+            if deadline is not None
+        ]
+        deadline = min(deadlines) if deadlines else None
+        if deadline == self._timer_deadline:
+            return
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._timer_deadline = deadline
+        if deadline is not None:
+            delay = max(deadline - dt_util.utcnow().timestamp(), 0.0) + 0.1
+            self._unsub_timer = async_call_later(self.hass, delay, self._timer_fired)
+
+    @callback
+    def _timer_fired(self, _now: datetime) -> None:
+        """Step the printers whose dwell time has passed."""
+        self._unsub_timer = None
+        self._timer_deadline = None
+        now = dt_util.utcnow().timestamp()
+        for tracker in self.trackers.values():
+            deadline = tracker.machine.next_deadline()
+            if deadline is not None and deadline <= now:
+                self._step(tracker, now)
+                self._notify(tracker)
+        self._schedule_timer()
+
+    @callback
+    def _schedule_save(self) -> None:
+        """Batch writes of all printers into the single farm store."""
+        self.store.async_delay_save(self._data_to_save, FARM_SAVE_DELAY)
+
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return data to persist."""
+        return {
+            "printers": {printer_id: tracker.as_dict() for printer_id, tracker in self.trackers.items()},
+            "meters": {entity_id: meter.as_dict() for entity_id, meter in self.meters.items()},
+        }
+
+    @callback
+    def async_setup_listeners(self) -> Callable[[], None]:
+        """Subscribe once to every entity the farm uses and return the cleanup function."""
+        entity_ids = [*self._by_entity, *self.meters]
+        if self.energy_cost_sensor and self.energy_cost_sensor not in self._by_entity:
+            entity_ids.append(self.energy_cost_sensor)
+        remove_listener = async_track_state_change_event(self.hass, entity_ids, self._async_state_changed)
+        self._event_listeners.append(remove_listener)
+        return remove_listener
+
+    async def async_shutdown(self) -> None:
+        """Write pending changes and cancel listeners."""
+        for remove_listener in self._event_listeners:
+            remove_listener()
+        self._event_listeners.clear()
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        await self.store.async_save(self._data_to_save())
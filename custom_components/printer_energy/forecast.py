@@ -0,0 +1,145 @@
+"""Online cost forecasting for the in-progress print."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from .const import FORECAST_MIN_PRINTS
+
+FORECAST_BASIS_REMAINING = "remaining_time"
+FORECAST_BASIS_PROGRESS = "progress"
+FORECAST_BASIS_HISTORY = "history"
+
+
+class PrintCostModel:
+    """Running least-squares model of a printer's past prints.
+
+    Keeps only sufficient statistics (counts and sums), so adding a finished
+    print is O(1) and nothing is refitted over history. Energy and material
+    are regressed on print duration; the slope is the steady-state rate per
+    hour and the intercept absorbs fixed costs such as heat-up.
+    """
+
+    __slots__ = (
+        "count",
+        "sum_hours",
+        "sum_hours_sq",
+        "sum_energy",
+        "sum_energy_hours",
+        "sum_material",
+        "sum_material_hours",
+        "sum_material_cost",
+    )
+
+    def __init__(self) -> None:
+        """Initialize an empty model."""
+        self.count = 0
+        self.sum_hours = 0.0
+        self.sum_hours_sq = 0.0
+        self.sum_energy = 0.0
+        self.sum_energy_hours = 0.0
+        self.sum_material = 0.0
+        self.sum_material_hours = 0.0
+        self.sum_material_cost = 0.0
+
+    def add_print(self, hours: float, energy: float, material: float, material_cost: float) -> None:
+        """Add a finished print (duration in h, energy in kWh, material in mm)."""
+        if hours <= 0:
+            return
+        self.count += 1
+        self.sum_hours += hours
+        self.sum_hours_sq += hours * hours
+        self.sum_energy += energy
+        self.sum_energy_hours += energy * hours
+        self.sum_material += material
+        self.sum_material_hours += material * hours
+        self.sum_material_cost += material_cost
+
+    @property
+    def mean_hours(self) -> float:
+        """Return the mean print duration in hours."""
+        return self.sum_hours / self.count if self.count else 0.0
+
+    def energy_rate(self) -> float | None:
+        """Return the fitted energy rate in kWh per hour."""
+        return self._slope(self.sum_energy, self.sum_energy_hours)
+
+    def energy_intercept(self) -> float:
+        """Return the fitted fixed energy per print in kWh (mostly heat-up)."""
+        rate = self.energy_rate()
+        if rate is None:
+            return 0.0
+        return max((self.sum_energy - rate * self.sum_hours) / self.count, 0.0)
+
+    def material_rate(self) -> float | None:
+        """Return the fitted material rate in mm per hour."""
+        return self._slope(self.sum_material, self.sum_material_hours)
+
+    def cost_per_meter(self) -> float | None:
+        """Return the material cost per meter realized by past prints."""
+        if self.sum_material <= 0:
+            return None
+        return self.sum_material_cost / (self.sum_material / 1000.0)
+
+    def _slope(self, sum_y: float, sum_xy: float) -> float | None:
+        """Return the least-squares slope of y over duration."""
+        if self.count < FORECAST_MIN_PRINTS or self.sum_hours <= 0:
+            return None
+        denominator = self.count * self.sum_hours_sq - self.sum_hours * self.sum_hours
+        if denominator > 1e-9:
+            slope = (self.count * sum_xy - self.sum_hours * sum_y) / denominator
+            if slope >= 0:
+                return slope
+        # Durations too similar (or negative fit) - fall back to the mean rate
+        return sum_y / self.sum_hours
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics for storage."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any] | None) -> PrintCostModel:
+        """Restore a model from storage."""
+        model = cls()
+        for name in cls.__slots__:
+            if data and name in data:
+                setattr(model, name, data[name])
+        return model
+
+
+def project_session(
+    model: PrintCostModel,
+    elapsed_hours: float,
+    session_energy: float,
+    session_material: float,
+    progress: float | None = None,
+    remaining_hours: float | None = None,
+) -> tuple[float, float, float, str]:
+    """Project a running print to its finish.
+
+    Returns (projected duration h, projected energy kWh, projected material mm, basis).
+    The remaining time comes from the remaining-time entity, else from progress,
+    else from the mean duration of past prints.
+    """
+    if remaining_hours is not None:
+        basis = FORECAST_BASIS_REMAINING
+        remaining = max(remaining_hours, 0.0)
+    elif progress is not None and 0 < progress <= 100:
+        basis = FORECAST_BASIS_PROGRESS
+        remaining = elapsed_hours * (100.0 - progress) / progress
+    else:
+        basis = FORECAST_BASIS_HISTORY
+        remaining = max(model.mean_hours - elapsed_hours, 0.0)
+
+    energy_rate = model.energy_rate()
+    material_rate = model.material_rate()
+    if elapsed_hours > 0:
+        # Not enough history yet - extrapolate this session's own rate
+        if energy_rate is None:
+            energy_rate = session_energy / elapsed_hours
+        if material_rate is None:
+            material_rate = session_material / elapsed_hours
+
+    projected_energy = session_energy + (energy_rate or 0.0) * remaining
+    projected_material = session_material + (material_rate or 0.0) * remaining
+    return elapsed_hours + remaining, projected_energy, projected_material, basis
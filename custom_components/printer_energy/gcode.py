@@ -0,0 +1,387 @@
+"""Filament length and print time of sliced G-code and 3MF files.
+
+Files are read in fixed-size chunks and never loaded whole. The first pass
+hashes the file and searches the comment lines for the slicer's own
+estimates (PrusaSlicer, OrcaSlicer, Bambu Studio, Cura, Simplify3D and
+ideaMaker write them in a header or footer). Only when a value is missing
+does a second pass walk the moves: filament is the net extrusion and time
+is the move length at the commanded feed rate plus dwells. That pass does
+not model acceleration, so its time is a lower bound.
+
+A 3MF file is a zip archive; its sliced plate G-code member is streamed
+from the archive. Results are cached by the SHA-256 of the file content.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+import hashlib
+import math
+import os
+import re
+import threading
+from typing import Any, BinaryIO, Callable
+import zipfile
+
+CHUNK_SIZE = 1 << 20  # Bytes read at a time
+CACHE_SIZE = 64  # Parsed files kept, least recently used dropped first
+DEFAULT_FEED_RATE = 1500.0  # mm/min until the file sets one
+
+EXTENSIONS = (".gcode", ".gco", ".g", ".3mf")
+
+SOURCE_HEADER = "header"
+SOURCE_MOVES = "moves"
+
+_NUMBERS = rb"([\d.]+(?:\s*,\s*[\d.]+)*)"
+# (pattern, scale to mm) of the filament length, several extruders are summed
+_FILAMENT_PATTERNS = (
+    (re.compile(rb"^;\s*filament used \[mm\]\s*=\s*" + _NUMBERS, re.M | re.I), 1.0),
+    (re.compile(rb"^;\s*total filament length \[mm\]\s*:\s*" + _NUMBERS, re.M | re.I), 1.0),
+    (re.compile(rb"^;\s*filament used:\s*([\d.]+\s*m\b(?:\s*,\s*[\d.]+\s*m\b)*)", re.M | re.I), 1000.0),
+    (re.compile(rb"^;\s*filament length:\s*" + _NUMBERS + rb"\s*mm", re.M | re.I), 1.0),
+    (re.compile(rb"^;\s*material#\d+ used:\s*" + _NUMBERS, re.M | re.I), 1.0),
+)
+# Print time, as seconds or as "1d 2h 3m 4s" / "1 hours 2 minutes" text
+_TIME_SECONDS_PATTERNS = (
+    re.compile(rb"^;TIME:\s*([\d.]+)", re.M),
+    re.compile(rb"^;\s*print time:\s*([\d.]+)\s*$", re.M | re.I),
+)
+_TIME_TEXT_PATTERNS = (
+    re.compile(rb"^;\s*estimated printing time(?: \(normal mode\))?\s*=\s*([^\r\n;]+)", re.M | re.I),
+    re.compile(rb"^;[^\r\n]*?total estimated time\s*[:=]\s*([^\r\n;]+)", re.M | re.I),
+    re.compile(rb"^;\s*build time:\s*([^\r\n;]+)", re.M | re.I),
+)
+# Words one of the estimate lines contains, in lower case
+_KEYWORDS = (b"filament", b"time", b"material#")
+_DURATION_PART = re.compile(
+    r"([\d.]+)\s*(days?|d|hours?|h|minutes?|mins?|m|seconds?|secs?|s)\b", re.I
+)
+_DURATION_UNITS = {"d": 86400.0, "h": 3600.0, "m": 60.0, "s": 1.0}
+_WORD = re.compile(rb"([A-Za-z])\s*([-+]?(?:\d+\.?\d*|\.\d+))")
+
+
+class PrintFileError(ValueError):
+    """Raised when a file is not a readable sliced print file."""
+
+
+def parse_duration(text: str) -> float | None:
+    """Return the seconds of a slicer duration such as ``1d 2h 3m 4s``."""
+    parts = _DURATION_PART.findall(text)
+    if not parts:
+        return None
+    return sum(float(value) * _DURATION_UNITS[unit[0].lower()] for value, unit in parts)
+
+
+def _sum_numbers(raw: bytes) -> float:
+    """Return the sum of a comma separated list (one value per extruder)."""
+    return sum(float(value) for value in re.findall(rb"\d+\.?\d*|\.\d+", raw))
+
+
+class _CommentScanner:
+    """First values of the slicer estimates found in the comment lines."""
+
+    __slots__ = ("filament", "seconds", "_carry")
+
+    def __init__(self) -> None:
+        """Initialize without values."""
+        self.filament: float | None = None
+        self.seconds: float | None = None
+        self._carry = b""
+
+    @property
+    def complete(self) -> bool:
+        """Return if both values were found."""
+        return self.filament is not None and self.seconds is not None
+
+    def feed(self, chunk: bytes, final: bool = False) -> None:
+        """Search the complete lines of a chunk; a partial last line waits for the next."""
+        if self.complete:
+            return
+        data = self._carry + chunk
+        if final:
+            self._carry = b""
+        else:
+            cut = data.rfind(b"\n") + 1
+            data, self._carry = data[:cut], data[cut:]
+        # Most chunks are moves only, skip them at memchr speed
+        lowered = data.lower()
+        if not any(keyword in lowered for keyword in _KEYWORDS):
+            return
+        if self.filament is None:
+            for pattern, scale in _FILAMENT_PATTERNS:
+                match = pattern.search(data)
+                if match is not None:
+                    self.filament = _sum_numbers(match.group(1)) * scale
+                    break
+        if self.seconds is None:
+            for pattern in _TIME_SECONDS_PATTERNS:
+                match = pattern.search(data)
+                if match is not None:
+                    self.seconds = float(match.group(1))
+                    break
+            else:
+                for pattern in _TIME_TEXT_PATTERNS:
+                    match = pattern.search(data)
+                    if match is not None:
+                        self.seconds = parse_duration(match.group(1).decode("ascii", "replace"))
+                        if self.seconds is not None:
+                            break
+
+
+class _MoveScanner:
+    """Net extrusion and move time of the G-code commands."""
+
+    __slots__ = (
+        "position",
+        "extruder",
+        "feed_rate",
+        "relative",
+        "relative_extrusion",
+        "extruded",
+        "seconds",
+        "moves",
+    )
+
+    def __init__(self) -> None:
+        """Initialize at the origin with absolute positioning."""
+        self.position = [0.0, 0.0, 0.0]
+        self.extruder = 0.0
+        self.feed_rate = DEFAULT_FEED_RATE
+        self.relative = False
+        self.relative_extrusion = False
+        self.extruded = 0.0
+        self.seconds = 0.0
+        self.moves = 0
+
+    def feed(self, line: bytes) -> None:
+        """Apply one line of G-code."""
+        code = line.split(b";", 1)[0].strip()
+        if not code:
+            return
+        words = {letter.upper(): float(value) for letter, value in _WORD.findall(code)}
+        letter = code[:1].upper()
+        if letter == b"G":
+            command = words.get(b"G")
+            if command in (0.0, 1.0, 2.0, 3.0):
+                self._move(words, command)
+            elif command == 4.0:
+                self.seconds += words.get(b"P", 0.0) / 1000.0 + words.get(b"S", 0.0)
+            elif command == 90.0:
+                self.relative = False
+                self.relative_extrusion = False
+            elif command == 91.0:
+                self.relative = True
+                self.relative_extrusion = True
+            elif command == 92.0:
+                if b"E" in words:
+                    self.extruder = words[b"E"]
+                for axis, key in enumerate((b"X", b"Y", b"Z")):
+                    if key in words:
+                        self.position[axis] = words[key]
+        elif letter == b"M":
+            command = words.get(b"M")
+            if command == 82.0:
+                self.relative_extrusion = False
+            elif command == 83.0:
+                self.relative_extrusion = True
+
+    def _move(self, words: dict[bytes, float], command: float) -> None:
+        """Apply a linear (G0/G1) or arc (G2/G3) move."""
+        if b"F" in words and words[b"F"] > 0:
+            self.feed_rate = words[b"F"]
+        start = list(self.position)
+        for axis, key in enumerate((b"X", b"Y", b"Z")):
+            if key in words:
+                self.position[axis] = start[axis] + words[key] if self.relative else words[key]
+        extrusion = 0.0
+        if b"E" in words:
+            if self.relative_extrusion:
+                extrusion = words[b"E"]
+            else:
+                extrusion = words[b"E"] - self.extruder
+                self.extruder = words[b"E"]
+            self.extruded += extrusion
+
+        dx = self.position[0] - start[0]
+        dy = self.position[1] - start[1]
+        dz = self.position[2] - start[2]
+        if command >= 2.0 and (b"I" in words or b"J" in words):
+            length = _arc_length(dx, dy, words.get(b"I", 0.0), words.get(b"J", 0.0), command == 2.0)
+            length = math.hypot(length, dz)
+        else:
+            length = math.sqrt(dx * dx + dy * dy + dz * dz)
+        # Extrude or retract only moves take the time of the filament move
+        length = length or abs(extrusion)
+        if length > 0:
+            self.seconds += length / (self.feed_rate / 60.0)
+            self.moves += 1
+
+
+def _arc_length(dx: float, dy: float, i: float, j: float, clockwise: bool) -> float:
+    """Return the length of an arc from the start to (dx, dy) around the center (i, j)."""
+    radius = math.hypot(i, j)
+    start_angle = math.atan2(-j, -i)
+    end_angle = math.atan2(dy - j, dx - i)
+    sweep = start_angle - end_angle if clockwise else end_angle - start_angle
+    if sweep <= 1e-9:
+        # A full circle when start and end coincide
+        sweep += 2.0 * math.pi
+    return radius * sweep
+
+
+def _gcode_member(archive: zipfile.ZipFile) -> str:
+    """Return the name of the first sliced plate in a 3MF archive."""
+    members = sorted(
+        (name for name in archive.namelist() if name.lower().endswith(".gcode")),
+        key=lambda name: [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)],
+    )
+    if not members:
+        raise PrintFileError("The 3MF file has no sliced G-code, slice and export it as a 3MF with G-code")
+    return members[0]
+
+
+def _chunks(stream: BinaryIO, on_chunk: Callable[[bytes], None] | None = None):
+    """Yield the chunks of a stream."""
+    while chunk := stream.read(CHUNK_SIZE):
+        if on_chunk is not None:
+            on_chunk(chunk)
+        yield chunk
+
+
+def _lines(stream: BinaryIO):
+    """Yield the lines of a stream, reading it in chunks."""
+    carry = b""
+    for chunk in _chunks(stream):
+        lines = (carry + chunk).split(b"\n")
+        carry = lines.pop()
+        yield from lines
+    if carry:
+        yield carry
+
+
+def _open_gcode(path: str, archive: zipfile.ZipFile | None, member: str | None) -> BinaryIO:
+    """Open the G-code of a plain file or of a 3MF member for streaming."""
+    if archive is not None:
+        return archive.open(member)
+    return open(path, "rb")
+
+
+def _hash_file(path: str, comments: _CommentScanner | None) -> str:
+    """Return the SHA-256 of a file, searching its comments on the way."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as stream:
+        for chunk in _chunks(stream, digest.update):
+            if comments is not None:
+                comments.feed(chunk)
+    if comments is not None:
+        comments.feed(b"", final=True)
+    return digest.hexdigest()
+
+
+def _parse_file(path: str, digest: str, comments: _CommentScanner) -> dict[str, Any]:
+    """Parse what the hashing pass did not find (3MF members, moves)."""
+    archive = zipfile.ZipFile(path) if path.lower().endswith(".3mf") else None
+    member = None
+    moves = None
+    try:
+        if archive is not None:
+            member = _gcode_member(archive)
+            with archive.open(member) as stream:
+                for chunk in _chunks(stream):
+                    comments.feed(chunk)
+                    if comments.complete:
+                        break
+            comments.feed(b"", final=True)
+
+        if not comments.complete:
+            moves = _MoveScanner()
+            with _open_gcode(path, archive, member) as stream:
+                for line in _lines(stream):
+                    moves.feed(line)
+    finally:
+        if archive is not None:
+            archive.close()
+
+    if moves is not None and moves.moves == 0 and comments.filament is None and comments.seconds is None:
+        raise PrintFileError("No slicer estimates or moves found, is this a sliced G-code file?")
+    filament = comments.filament if comments.filament is not None else max(moves.extruded, 0.0)
+    seconds = comments.seconds if comments.seconds is not None else moves.seconds
+    return {
+        "sha256": digest,
+        "member": member,
+        "filament": filament,
+        "print_time": seconds,
+        "filament_source": SOURCE_HEADER if comments.filament is not None else SOURCE_MOVES,
+        "print_time_source": SOURCE_HEADER if comments.seconds is not None else SOURCE_MOVES,
+    }
+
+
+class PrintFileCache:
+    """Parsed print files keyed by content hash.
+
+    A file whose path, size and modification time are unchanged maps to the
+    digest it had, so a repeated request reads nothing. A changed or moved
+    file is hashed again and only parsed when its content is new. Safe to
+    use from several executor threads.
+    """
+
+    __slots__ = ("_results", "_digests", "_lock")
+
+    def __init__(self) -> None:
+        """Initialize an empty cache."""
+        self._results: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._digests: dict[tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> dict[str, Any]:
+        """Return the parsed file (blocking, run it in the executor).
+
+        The result holds the SHA-256 digest, filament length (mm), print
+        time (s), the source of each value (header or moves) and the 3MF
+        member that was read.
+        """
+        try:
+            stat = os.stat(path)
+            key = (path, stat.st_size, stat.st_mtime_ns)
+            with self._lock:
+                digest = self._digests.get(key)
+                result = self._lookup(digest)
+            if result is None:
+                # Plain G-code is searched for comments while it is hashed
+                comments = _CommentScanner()
+                digest = _hash_file(path, None if path.lower().endswith(".3mf") else comments)
+                with self._lock:
+                    result = self._lookup(digest)
+                if result is None:
+                    result = _parse_file(path, digest, comments)
+                    self._store(key, result)
+                    return {**result, "cached": False}
+                self._store(key, result)
+        except zipfile.BadZipFile as err:
+            raise PrintFileError(f"Not a valid 3MF file: {err}") from err
+        except OSError as err:
+            raise PrintFileError(f"Could not read {path}: {err}") from err
+        return {**result, "cached": True}
+
+    def _lookup(self, digest: str | None) -> dict[str, Any] | None:
+        """Return a cached result and mark it as recently used (lock held)."""
+        if digest is None or digest not in self._results:
+            return None
+        self._results.move_to_end(digest)
+        return self._results[digest]
+
+    def _store(self, key: tuple[str, int, int], result: dict[str, Any]) -> None:
+        """Cache a result and the digest of the file's current version."""
+        digest = result["sha256"]
+        with self._lock:
+            self._results[digest] = result
+            self._results.move_to_end(digest)
+            while len(self._results) > CACHE_SIZE:
+                self._results.popitem(last=False)
+            # Drop older versions of this path and digests whose result was evicted
+            self._digests = {
+                cached: value
+                for cached, value in self._digests.items()
+                if cached[0] != key[0] and value in self._results
+            }
+            self._digests[key] = digest
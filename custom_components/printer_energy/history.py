@@ -0,0 +1,185 @@
+"""Per-print history for Printer Energy integration."""
+
+from __future__ import annotations
+
+from itertools import count
+import os
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, HISTORY_SAVE_DELAY, HISTORY_STORAGE_VERSION
+from .retention import STRING_FIELDS, compact_history
+
+# Process-wide counter, so a version is never reused by a reloaded entry
+_VERSIONS = count(1)
+
+
+class PrintHistory:
+    """Store one record per finished print.
+
+    Records are kept in their own store so the totals store stays small and
+    cheap to write. Timestamps are stored as epoch seconds to keep records
+    compact. Repeated strings (job and file names, materials, spool ids) are
+    interned in a string table and records hold their index, so thousands of
+    prints of the same file share one copy. Writes are batched with a
+    delayed save. Old records can be compacted into per-day or per-month
+    aggregates in the executor.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize history with entry-specific key."""
+        self.hass = hass
+        storage_key = f"{DOMAIN}.{entry_id}.history"
+        self.store = Store(hass, HISTORY_STORAGE_VERSION, storage_key)
+        self.records: list[dict[str, Any]] = []
+        self.strings: list[str] = []
+        self._string_index: dict[str, int] = {}
+        self.aggregates: list[dict[str, Any]] = []
+        # Size of the history file in bytes, refreshed by async_update_disk_usage
+        self.disk_size: int | None = None
+        # Bumped by clear() so a compaction running meanwhile is discarded
+        self._generation = 0
+        # Bumped on every change so derived results (statistics) can be cached
+        self.version = next(_VERSIONS)
+
+    async def load(self) -> None:
+        """Load records from storage."""
+        data = await self.store.async_load()
+        if data:
+            self.records = data.get("records", [])
+            self.strings = data.get("strings", [])
+            self._string_index = {value: index for index, value in enumerate(self.strings)}
+            self.aggregates = data.get("aggregates", [])
+            self.version = next(_VERSIONS)
+
+    def append(self, record: dict[str, Any]) -> None:
+        """Append a finished print and schedule a save."""
+        self.records.append(record)
+        self.version = next(_VERSIONS)
+        self.store.async_delay_save(self._data_to_save, HISTORY_SAVE_DELAY)
+
+    def intern(self, value: str | None) -> int | None:
+        """Return the string table index for a value, adding it if new."""
+        if value is None:
+            return None
+        index = self._string_index.get(value)
+        if index is None:
+            index = len(self.strings)
+            self.strings.append(value)
+            self._string_index[value] = index
+        return index
+
+    def lookup(self, index: int | None) -> str | None:
+        """Return the string for a string table index."""
+        if index is None or not 0 <= index < len(self.strings):
+            return None
+        return self.strings[index]
+
+    def index_of(self, value: str) -> int | None:
+        """Return the string table index of a value, or None if no record uses it."""
+        return self._string_index.get(value)
+
+    async def async_update_costs(
+        self,
+        records: list[dict[str, Any]],
+        indexes: list[int],
+        energy_costs: list[float],
+        material_costs: list[float],
+    ) -> bool:
+        """Write repriced costs back in one step and save them at once.
+
+        ``records`` is the list the costs were computed from. Returns False
+        without changes when it was replaced meanwhile (compacted or cleared).
+        """
+        if records is not self.records:
+            return False
+        for index, energy_cost, material_cost in zip(indexes, energy_costs, material_costs):
+            self.records[index] = {
+                **self.records[index],
+                "energy_cost": energy_cost,
+                "material_cost": material_cost,
+                "total_cost": energy_cost + material_cost,
+            }
+        self.version = next(_VERSIONS)
+        await self.store.async_save(self._data_to_save())
+        return True
+
+    def needs_compaction(self, cutoff: float) -> bool:
+        """Return True if the oldest record ended before the cutoff."""
+        if not self.records:
+            return False
+        oldest = self.records[0]
+        end = oldest.get("end") or oldest.get("start")
+        return end is not None and end < cutoff
+
+    async def async_compact(self, cutoff: float, period: str) -> bool:
+        """Fold records older than the cutoff into aggregates (in the executor)."""
+        if not self.needs_compaction(cutoff):
+            return False
+        snapshot_count = len(self.records)
+        generation = self._generation
+        old_strings = self.strings
+        kept, aggregates, strings = await self.hass.async_add_executor_job(
+            compact_history,
+            self.records[:snapshot_count],
+            list(self.aggregates),
+            list(old_strings),
+            cutoff,
+            period,
+        )
+        if generation != self._generation:
+            return False
+
+        self.strings = strings
+        self._string_index = {value: index for index, value in enumerate(strings)}
+        # Prints appended while compacting still refer to the old string table
+        for record in self.records[snapshot_count:]:
+            kept.append(
+                {
+                    **record,
+                    **{
+                        field: self.intern(old_strings[record[field]])
+                        for field in STRING_FIELDS
+                        if isinstance(record.get(field), int)
+                    },
+                }
+            )
+        compacted = len(self.records) - len(kept)
+        self.records = kept
+        self.aggregates = aggregates
+        self.version = next(_VERSIONS)
+        await self.store.async_save(self._data_to_save())
+        return compacted > 0
+
+    async def async_update_disk_usage(self) -> None:
+        """Measure the history file size (in the executor)."""
+        self.disk_size = await self.hass.async_add_executor_job(_file_size, self.store.path)
+
+    @property
+    def last(self) -> dict[str, Any] | None:
+        """Return the most recent record."""
+        return self.records[-1] if self.records else None
+
+    async def clear(self) -> None:
+        """Remove all records."""
+        self.records = []
+        self.strings = []
+        self._string_index = {}
+        self.aggregates = []
+        self._generation += 1
+        self.version = next(_VERSIONS)
+        await self.store.async_save(self._data_to_save())
+
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return data to persist."""
+        return {"records": self.records, "strings": self.strings, "aggregates": self.aggregates}
+
+
+def _file_size(path: str) -> int:
+    """Return a file's size in bytes, 0 if it does not exist yet."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
@@ -0,0 +1,163 @@
+"""Prometheus metrics endpoint for Printer Energy."""
+
+from __future__ import annotations
+
+from functools import partial
+from typing import Any, Callable
+
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+
+from .const import METRICS_CONTENT_TYPE, METRICS_URL
+from .exposition import Fragment, perf_fragment, printer_fragment, render
+from .tracker import PrinterTracker
+
+# Fragment key: (entry id, printer id or None for the entry itself)
+_Key = tuple[str, "str | None"]
+
+
+def tracker_values(tracker: PrinterTracker) -> dict[str, Any]:
+    """Return a farm printer's readings with the keys of a coordinator data snapshot."""
+    return {
+        "is_printing": tracker.is_printing,
+        "print_count": tracker.print_count,
+        "total_energy": tracker.total_energy,
+        "total_material": tracker.total_material,
+        "total_energy_cost": tracker.total_energy_cost,
+        "total_material_cost": tracker.total_material_cost,
+        "total_cost": tracker.total_cost,
+        "current_session_energy": tracker.session_energy if tracker.is_printing else 0.0,
+        "current_session_material": tracker.session_material if tracker.is_printing else 0.0,
+        "current_session_energy_cost": tracker.session_energy_cost if tracker.is_printing else 0.0,
+        "current_session_material_cost": tracker.session_material_cost if tracker.is_printing else 0.0,
+        "current_session_total_cost": tracker.session_total_cost if tracker.is_printing else 0.0,
+        "state_counters": tracker.machine.counters(),
+    }
+
+
+class PrinterEnergyMetrics:
+    """Cached exposition text of every printer.
+
+    Coordinator listeners only mark their printer dirty. A scrape renders
+    the dirty printers again and joins the fragments once; scrapes with no
+    change in between are served from the cached bytes.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the cache."""
+        self._renderers: dict[_Key, Callable[[], Fragment]] = {}
+        self._fragments: dict[_Key, Fragment] = {}
+        self._dirty: set[_Key] = set()
+        self._body: bytes | None = None
+        self.rebuilds = 0
+        self.scrapes = 0
+
+    @callback
+    def async_track_coordinator(self, entry_id: str, name: str, coordinator: Any) -> Callable[[], None]:
+        """Export a single-printer coordinator and return the cleanup function."""
+        key: _Key = (entry_id, None)
+        labels = {"entry_id": entry_id, "printer": name}
+
+        def _render() -> Fragment:
+            fragment = printer_fragment(labels, coordinator.data or {}, coordinator._get_currency())
+            _merge(fragment, perf_fragment(labels, coordinator.perf))
+            return fragment
+
+        self._renderers[key] = _render
+        self._mark_dirty(key)
+        remove_listener = coordinator.async_add_listener(partial(self._mark_dirty, key))
+        return partial(self._untrack, [key], [remove_listener])
+
+    @callback
+    def async_track_farm(self, entry_id: str, coordinator: Any) -> Callable[[], None]:
+        """Export every printer of a farm coordinator and return the cleanup function."""
+        farm_key: _Key = (entry_id, None)
+        farm_labels = {"entry_id": entry_id, "printer": coordinator.farm_name}
+        self._renderers[farm_key] = lambda: perf_fragment(farm_labels, coordinator.perf)
+        keys = [farm_key]
+        removers = []
+        for printer_id, tracker in coordinator.trackers.items():
+            key: _Key = (entry_id, printer_id)
+            labels = {"entry_id": entry_id, "printer": tracker.name}
+            self._renderers[key] = partial(_render_farm_printer, coordinator, tracker, labels)
+            keys.append(key)
+            # Farm updates only notify the listeners of the printer that changed
+            removers.append(
+                coordinator.async_add_listener(partial(self._mark_dirty, key, farm_key), printer_id)
+            )
+        for key in keys:
+            self._mark_dirty(key)
+        return partial(self._untrack, keys, removers)
+
+    @callback
+    def _mark_dirty(self, *keys: _Key) -> None:
+        """Remember which printers to render again at the next scrape."""
+        self._dirty.update(keys)
+        self._body = None
+
+    @callback
+    def _untrack(self, keys: list[_Key], removers: list[Callable[[], None]]) -> None:
+        """Stop exporting an entry."""
+        for remove_listener in removers:
+            remove_listener()
+        for key in keys:
+            self._renderers.pop(key, None)
+            self._fragments.pop(key, None)
+            self._dirty.discard(key)
+        self._body = None
+
+    @callback
+    def async_body(self) -> bytes:
+        """Return the exposition text, rebuilding it only after a change."""
+        self.scrapes += 1
+        if self._body is None:
+            for key in self._dirty:
+                renderer = self._renderers.get(key)
+                if renderer is not None:
+                    self._fragments[key] = renderer()
+            self._dirty.clear()
+            self._body = render(self._fragments.values()).encode()
+            self.rebuilds += 1
+        # Exporter counters change with every scrape, so they are not cached
+        trailer = {
+            "printer_energy_metrics_rebuilds_total": [f"printer_energy_metrics_rebuilds_total {float(self.rebuilds)!r}"],
+            "printer_energy_metrics_scrapes_total": [f"printer_energy_metrics_scrapes_total {float(self.scrapes)!r}"],
+        }
+        return self._body + render([trailer]).encode()
+
+
+def _render_farm_printer(coordinator: Any, tracker: PrinterTracker, labels: dict[str, str]) -> Fragment:
+    """Render one printer of a farm."""
+    return printer_fragment(labels, tracker_values(tracker), coordinator.currency)
+
+
+def _merge(fragment: Fragment, other: Fragment) -> None:
+    """Add the samples of another fragment."""
+    for name, lines in other.items():
+        fragment.setdefault(name, []).extend(lines)
+
+
+class PrinterEnergyMetricsView(HomeAssistantView):
+    """Serve the cached metrics to Prometheus."""
+
+    url = METRICS_URL
+    name = "api:printer_energy:metrics"
+    requires_auth = True
+
+    def __init__(self, metrics: PrinterEnergyMetrics) -> None:
+        """Initialize the view."""
+        self.metrics = metrics
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Return the exposition text."""
+        return web.Response(body=self.metrics.async_body(), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+
+@callback
+def async_setup_metrics(hass: HomeAssistant) -> PrinterEnergyMetrics:
+    """Register the metrics view and return its cache."""
+    metrics = PrinterEnergyMetrics()
+    hass.http.register_view(PrinterEnergyMetricsView(metrics))
+    return metrics
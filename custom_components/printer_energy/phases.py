@@ -0,0 +1,208 @@
+"""Online print phase segmentation from the power stream."""
+
+from __future__ import annotations
+
+import math
+
+from .const import (
+    PHASE_COOL_DOWN,
+    PHASE_COOL_DOWN_RATIO,
+    PHASE_CUSUM_DRIFT,
+    PHASE_CUSUM_THRESHOLD,
+    PHASE_HEAT_UP,
+    PHASE_HEAT_UP_MAX_SECONDS,
+    PHASE_IDLE,
+    PHASE_IDLE_POWER,
+    PHASE_MIN_SEGMENT_SECONDS,
+    PHASE_PRINTING,
+    PHASE_SMOOTHING_SECONDS,
+    PHASES,
+)
+from .power import WS_PER_KWH
+
+_PHASE_INDEX = {phase: index for index, phase in enumerate(PHASES)}
+
+
+class PhaseDetector:
+    """Segment a print session into heat-up, printing, cool-down and idle.
+
+    Power is smoothed with a time-aware EWMA and fed to a two-sided CUSUM
+    change-point test relative to the current segment's mean level. Each
+    detected level shift moves the phase state machine on; energy and time
+    since the previous sample are attributed to the phase that was active.
+    When no power reading is available, power is derived from the energy
+    rate between samples. All state is scalar, so memory per session is O(1).
+    """
+
+    __slots__ = (
+        "phase",
+        "_energy",
+        "_duration",
+        "_session_start",
+        "_phase_start",
+        "_last_ts",
+        "_last_energy",
+        "_smoothed",
+        "_segment_mean",
+        "_segment_count",
+        "_segment_start",
+        "_g_up",
+        "_g_down",
+        "_print_level",
+    )
+
+    def __init__(self) -> None:
+        """Initialize the detector."""
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear all session state."""
+        self.phase = PHASE_IDLE
+        self._energy = [0.0] * len(PHASES)
+        self._duration = [0.0] * len(PHASES)
+        self._session_start: float | None = None
+        self._phase_start = 0.0
+        self._last_ts = 0.0
+        self._last_energy = 0.0
+        self._smoothed: float | None = None
+        self._segment_mean = 0.0
+        self._segment_count = 0
+        self._segment_start = 0.0
+        self._g_up = 0.0
+        self._g_down = 0.0
+        self._print_level = 0.0
+
+    @property
+    def active(self) -> bool:
+        """Return True while a session is being segmented."""
+        return self._session_start is not None
+
+    def start(self, timestamp: float) -> None:
+        """Start segmenting a new session (printers heat up first)."""
+        self.reset()
+        self.phase = PHASE_HEAT_UP
+        self._session_start = timestamp
+        self._phase_start = timestamp
+        self._last_ts = timestamp
+        self._segment_start = timestamp
+
+    def update(self, timestamp: float, session_energy: float, power: float | None = None) -> None:
+        """Add a sample of session energy (kWh) and optionally power (W)."""
+        if self._session_start is None:
+            return
+        elapsed = timestamp - self._last_ts
+        if elapsed <= 0:
+            return
+        delta = session_energy - self._last_energy
+        if power is None:
+            if delta == 0:
+                # Meter has not ticked yet - wait for the next step to measure the rate
+                return
+            power = max(delta, 0.0) * WS_PER_KWH / elapsed
+
+        self._attribute(timestamp, session_energy)
+        self._detect(timestamp, power, elapsed)
+
+    def finish(self, timestamp: float, session_energy: float) -> dict[str, dict[str, float]]:
+        """Close the session and return energy and duration per phase."""
+        if self._session_start is not None:
+            self._attribute(max(timestamp, self._last_ts), session_energy)
+        breakdown = self.breakdown()
+        self.reset()
+        return breakdown
+
+    def breakdown(self) -> dict[str, dict[str, float]]:
+        """Return energy (kWh) and duration (s) per phase seen so far."""
+        return {
+            phase: {
+                "energy": round(self._energy[index], 4),
+                "duration": round(self._duration[index], 1),
+            }
+            for index, phase in enumerate(PHASES)
+            if self._duration[index] > 0 or self._energy[index] > 0
+        }
+
+    def _attribute(self, timestamp: float, session_energy: float) -> None:
+        """Attribute energy and time since the last sample to the current phase."""
+        index = _PHASE_INDEX[self.phase]
+        self._energy[index] += session_energy - self._last_energy
+        self._duration[index] += timestamp - self._last_ts
+        self._last_ts = timestamp
+        self._last_energy = session_energy
+
+    def _detect(self, timestamp: float, power: float, elapsed: float) -> None:
+        """Run the change-point test on the smoothed power and advance the phase."""
+        if self._smoothed is None:
+            self._smoothed = power
+        else:
+            alpha = 1.0 - math.exp(-elapsed / PHASE_SMOOTHING_SECONDS)
+            self._smoothed += alpha * (power - self._smoothed)
+        level = self._smoothed
+
+        if self._segment_count == 0:
+            self._segment_mean = level
+            self._segment_count = 1
+            return
+
+        scale = max(self._segment_mean, PHASE_IDLE_POWER)
+        deviation = (level - self._segment_mean) / scale
+        self._g_up = max(0.0, self._g_up + deviation - PHASE_CUSUM_DRIFT)
+        self._g_down = max(0.0, self._g_down - deviation - PHASE_CUSUM_DRIFT)
+
+        direction = 0
+        if timestamp - self._segment_start >= PHASE_MIN_SEGMENT_SECONDS:
+            if self._g_up > PHASE_CUSUM_THRESHOLD:
+                direction = 1
+            elif self._g_down > PHASE_CUSUM_THRESHOLD:
+                direction = -1
+
+        if direction:
+            self._transition(timestamp, direction, level)
+            # New segment starts at the shifted level
+            self._segment_mean = level
+            self._segment_count = 1
+            self._segment_start = timestamp
+            self._g_up = 0.0
+            self._g_down = 0.0
+        else:
+            self._segment_count += 1
+            self._segment_mean += (level - self._segment_mean) / self._segment_count
+            if self.phase == PHASE_PRINTING:
+                self._print_level = self._segment_mean
+            elif (
+                self.phase == PHASE_HEAT_UP
+                and timestamp - self._phase_start >= PHASE_HEAT_UP_MAX_SECONDS
+            ):
+                # No clear drop after heating, assume the print is running
+                self._set_phase(timestamp, PHASE_PRINTING)
+                self._print_level = self._segment_mean
+
+    def _transition(self, timestamp: float, direction: int, level: float) -> None:
+        """Move the phase state machine on a detected level shift."""
+        phase = self.phase
+        if direction < 0:
+            if level < PHASE_IDLE_POWER:
+                new_phase = PHASE_IDLE if phase in (PHASE_COOL_DOWN, PHASE_IDLE) else PHASE_COOL_DOWN
+            elif phase == PHASE_HEAT_UP:
+                new_phase = PHASE_PRINTING
+            elif phase == PHASE_PRINTING and level < self._print_level * PHASE_COOL_DOWN_RATIO:
+                new_phase = PHASE_COOL_DOWN
+            elif phase == PHASE_COOL_DOWN:
+                new_phase = PHASE_IDLE
+            else:
+                new_phase = phase
+        elif phase in (PHASE_COOL_DOWN, PHASE_IDLE):
+            # Heaters came back on (next job, or reheat after a pause)
+            new_phase = PHASE_HEAT_UP
+        else:
+            new_phase = phase
+
+        if new_phase != phase:
+            self._set_phase(timestamp, new_phase)
+            if new_phase == PHASE_PRINTING:
+                self._print_level = level
+
+    def _set_phase(self, timestamp: float, phase: str) -> None:
+        """Switch to a new phase."""
+        self.phase = phase
+        self._phase_start = timestamp
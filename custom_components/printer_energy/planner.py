@@ -0,0 +1,189 @@
+"""Cheapest start time for a print from a price forecast."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Iterable
+
+# Attribute lists used by common dynamic price integrations
+# (Nordpool: raw_today/raw_tomorrow, ENTSO-E: prices, Tibber-style: today/tomorrow)
+_FORECAST_ATTRIBUTES = (
+    "raw_today",
+    "raw_tomorrow",
+    "prices_today",
+    "prices_tomorrow",
+    "prices",
+    "today",
+    "tomorrow",
+    "forecast",
+)
+_START_KEYS = ("start", "startsAt", "time", "hour", "start_time", "datetime")
+_END_KEYS = ("end", "endsAt", "end_time")
+_PRICE_KEYS = ("value", "price", "total", "price_ct_per_kwh")
+
+
+def forecast_attributes(attributes: dict[str, Any]) -> tuple:
+    """Return the raw forecast lists of a price entity, for change detection."""
+    return tuple(attributes.get(key) for key in _FORECAST_ATTRIBUTES)
+
+
+def parse_price_forecast(attributes: dict[str, Any]) -> list[tuple[float, float, float]]:
+    """Parse forecast price attributes into sorted (start, end, price) slots (epoch seconds).
+
+    Slots without an explicit end run until the next slot starts; the last
+    one gets the duration of the previous slot (one hour if it is alone).
+    """
+    points: dict[float, tuple[float | None, float]] = {}
+    for key in _FORECAST_ATTRIBUTES:
+        items = attributes.get(key)
+        if not isinstance(items, (list, tuple)):
+            continue
+        for item in items:
+            parsed = _parse_item(item)
+            if parsed is not None:
+                start, end, price = parsed
+                points[start] = (end, price)
+
+    starts = sorted(points)
+    slots: list[tuple[float, float, float]] = []
+    for index, start in enumerate(starts):
+        end, price = points[start]
+        if end is None or end <= start:
+            if index + 1 < len(starts):
+                end = starts[index + 1]
+            elif slots:
+                end = start + (slots[-1][1] - slots[-1][0])
+            else:
+                end = start + 3600.0
+        slots.append((start, end, price))
+    return slots
+
+
+def cheapest_start(
+    slots: Iterable[tuple[float, float, float]],
+    now: float,
+    duration: float,
+    power: float,
+    start_energy: float = 0.0,
+    horizon: float | None = None,
+) -> dict[str, float] | None:
+    """Return the cheapest start time for a job on the price slots.
+
+    The job draws ``power`` kW for ``duration`` seconds plus ``start_energy``
+    kWh in its first slot (heat-up). Candidate starts are now and every later
+    slot boundary within ``horizon`` seconds. A two-pointer sliding window
+    keeps the running sum of price x time over the job's span, so the search
+    is O(n) in the number of slots. Returns None if the forecast does not
+    cover the job from any start.
+    """
+    # Trim the slot in progress so the first candidate is "now"
+    series = [
+        (max(start, now), end, price) for start, end, price in slots if end > now
+    ]
+    if not series or duration <= 0:
+        return None
+    latest_start = now + horizon if horizon is not None else float("inf")
+
+    best: dict[str, float] | None = None
+    first: dict[str, float] | None = None
+    window_end = 0  # Index of the first slot not fully inside the window
+    window_sum = 0.0  # Sum of price x seconds over fully covered slots
+    window_seconds = 0.0
+
+    for index, (start, _end, price) in enumerate(series):
+        if start > latest_start:
+            break
+        if window_end <= index:
+            # Empty window (or a gap in the forecast) - restart it here
+            window_end, window_sum, window_seconds = index, 0.0, 0.0
+
+        # Grow the window until the next slot would overshoot the job end
+        while window_end < len(series):
+            slot_start, slot_end, slot_price = series[window_end]
+            if window_end > index and slot_start != series[window_end - 1][1]:
+                break
+            slot_seconds = slot_end - slot_start
+            if window_seconds + slot_seconds > duration:
+                break
+            window_sum += slot_price * slot_seconds
+            window_seconds += slot_seconds
+            window_end += 1
+
+        remaining = duration - window_seconds
+        tail: float | None = 0.0
+        if remaining > 1e-6:
+            # Partial last slot, if the forecast reaches that far without a gap
+            if window_end >= len(series):
+                break
+            if window_end > index and series[window_end][0] != series[window_end - 1][1]:
+                tail = None
+            else:
+                tail = series[window_end][2] * remaining
+
+        if tail is not None:
+            cost = power * (window_sum + tail) / 3600.0 + start_energy * price
+            candidate = {"start": start, "end": start + duration, "cost": cost}
+            if first is None:
+                first = candidate
+            if best is None or cost < best["cost"] - 1e-9:
+                best = candidate
+
+        # Slide: drop this slot from the window
+        if window_end > index:
+            slot_seconds = series[index][1] - series[index][0]
+            window_sum -= price * slot_seconds
+            window_seconds -= slot_seconds
+
+    if best is None:
+        return None
+    energy = power * duration / 3600.0 + start_energy
+    best["energy"] = energy
+    best["average_price"] = best["cost"] / energy if energy > 0 else 0.0
+    best["cost_now"] = first["cost"]
+    best["savings"] = first["cost"] - best["cost"]
+    return best
+
+
+def _parse_item(item: Any) -> tuple[float, float | None, float] | None:
+    """Parse one forecast entry into (start, end, price)."""
+    if not isinstance(item, dict):
+        return None
+    start = _first(item, _START_KEYS)
+    price = _first(item, _PRICE_KEYS)
+    if start is None or price is None:
+        return None
+    start_ts = _timestamp(start)
+    if start_ts is None:
+        return None
+    try:
+        price = float(price)
+    except (TypeError, ValueError):
+        return None
+    end = _first(item, _END_KEYS)
+    return start_ts, _timestamp(end) if end is not None else None, price
+
+
+def _first(item: dict[str, Any], keys: tuple[str, ...]) -> Any:
+    """Return the value of the first key present in a dict."""
+    for key in keys:
+        value = item.get(key)
+        if value is not None:
+            return value
+    return None
+
+
+def _timestamp(value: Any) -> float | None:
+    """Convert a datetime, ISO string or epoch number to epoch seconds."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            # Naive datetimes are treated as local time, like Python does
+            return value.astimezone().timestamp()
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return _timestamp(datetime.fromisoformat(value.replace("Z", "+00:00")))
+        except ValueError:
+            return None
+    return None
@@ -0,0 +1,67 @@
+"""Power sensor integration for printers without a cumulative energy meter."""
+
+from __future__ import annotations
+
+# Watt-seconds per kWh
+WS_PER_KWH = 3_600_000.0
+
+
+class PowerIntegrator:
+    """Integrate instantaneous power (W) into cumulative energy (kWh).
+
+    Uses the trapezoidal rule over state-change timestamps and only keeps the
+    last sample, so memory does not grow with session length. When the power
+    sensor drops out, the last known power is held for at most ``max_gap``
+    seconds and integration resumes from the next valid reading.
+    """
+
+    __slots__ = ("energy", "max_gap", "_last_ts", "_last_power")
+
+    def __init__(self, max_gap: float) -> None:
+        """Initialize the integrator."""
+        self.energy = 0.0
+        self.max_gap = max_gap
+        self._last_ts: float | None = None
+        self._last_power: float | None = None
+
+    @property
+    def has_sample(self) -> bool:
+        """Return True once at least one valid power reading was seen."""
+        return self._last_ts is not None
+
+    @property
+    def last_power(self) -> float | None:
+        """Return the last valid power reading in W (None while unavailable)."""
+        return self._last_power
+
+    def add_sample(self, timestamp: float, power: float | None) -> None:
+        """Add a power reading in W, or None when the sensor is unavailable."""
+        last_ts = self._last_ts
+        if last_ts is None:
+            if power is not None:
+                self._last_ts = timestamp
+                self._last_power = power
+            return
+
+        if timestamp <= last_ts:
+            # Already integrated up to this point, the new level applies from here on
+            self._last_power = power
+            return
+
+        if self._last_power is not None:
+            elapsed = timestamp - last_ts
+            if power is None:
+                # Sensor went unavailable - hold last power, but only for a bounded time
+                self.energy += self._last_power * min(elapsed, self.max_gap) / WS_PER_KWH
+            else:
+                self.energy += (self._last_power + power) / 2.0 * elapsed / WS_PER_KWH
+
+        self._last_ts = timestamp
+        self._last_power = power
+
+    def advance(self, timestamp: float) -> float:
+        """Integrate the last known power up to ``timestamp`` and return the total."""
+        if self._last_power is not None and self._last_ts is not None and timestamp > self._last_ts:
+            self.energy += self._last_power * (timestamp - self._last_ts) / WS_PER_KWH
+            self._last_ts = timestamp
+        return self.energy
@@ -0,0 +1,138 @@
+"""Retention and compaction of print history.
+
+Raw print records older than the retention window are folded into per-day
+or per-month aggregates. These functions are pure and run in the executor.
+"""
+
+from __future__ import annotations
+
+import calendar
+from datetime import datetime, timezone
+from typing import Any
+
+from .const import COMPACTION_DAY
+
+# Summed fields of an aggregate, and fields tracked with min/max
+_SUM_FIELDS = ("energy", "material", "energy_cost", "material_cost", "total_cost", "duration")
+_RANGE_FIELDS = ("energy", "total_cost")
+# Record fields holding string table indexes
+STRING_FIELDS = ("job", "file", "material_type", "spool")
+
+
+def months_before(timestamp: float, months: int) -> float:
+    """Return the epoch timestamp the given number of calendar months earlier (UTC)."""
+    moment = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    month_index = moment.year * 12 + moment.month - 1 - months
+    year, month = divmod(month_index, 12)
+    month += 1
+    # Clamp the day for shorter months (e.g. 31 March -> 28/29 February)
+    day = min(moment.day, calendar.monthrange(year, month)[1])
+    return moment.replace(year=year, month=month, day=day).timestamp()
+
+
+def period_bounds(timestamp: float, period: str) -> tuple[float, float]:
+    """Return the UTC day or month containing a timestamp as (start, end)."""
+    if period == COMPACTION_DAY:
+        start = timestamp - timestamp % 86400
+        return start, start + 86400
+    moment = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    start = datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+    if moment.month == 12:
+        end = datetime(moment.year + 1, 1, 1, tzinfo=timezone.utc)
+    else:
+        end = datetime(moment.year, moment.month + 1, 1, tzinfo=timezone.utc)
+    return start.timestamp(), end.timestamp()
+
+
+def compact_history(
+    records: list[dict[str, Any]],
+    aggregates: list[dict[str, Any]],
+    strings: list[str],
+    cutoff: float,
+    period: str,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]], list[str]]:
+    """Fold records that ended before the cutoff into period aggregates.
+
+    Returns the kept records, the merged aggregates (sorted by period start)
+    and a string table rebuilt for the kept records. Input lists and records
+    are not modified.
+    """
+    by_period: dict[tuple[str, float], dict[str, Any]] = {
+        (aggregate["period"], aggregate["start"]): {
+            **aggregate,
+            "phases": {phase: dict(total) for phase, total in aggregate.get("phases", {}).items()},
+        }
+        for aggregate in aggregates
+    }
+    kept: list[dict[str, Any]] = []
+
+    for record in records:
+        end = record.get("end") or record.get("start")
+        if end is None or end >= cutoff:
+            kept.append(record)
+            continue
+        start, period_end = period_bounds(end, period)
+        aggregate = by_period.get((period, start))
+        if aggregate is None:
+            aggregate = by_period[(period, start)] = _new_aggregate(period, start, period_end)
+        _add_record(aggregate, record)
+
+    kept, strings = _rebuild_strings(kept, strings)
+    merged = sorted(by_period.values(), key=lambda aggregate: aggregate["start"])
+    return kept, merged, strings
+
+
+def _new_aggregate(period: str, start: float, end: float) -> dict[str, Any]:
+    """Return an empty aggregate for a period."""
+    aggregate: dict[str, Any] = {"period": period, "start": start, "end": end, "count": 0}
+    for field in _SUM_FIELDS:
+        aggregate[field] = 0.0
+    for field in _RANGE_FIELDS:
+        aggregate[f"{field}_min"] = None
+        aggregate[f"{field}_max"] = None
+    aggregate["phases"] = {}
+    return aggregate
+
+
+def _add_record(aggregate: dict[str, Any], record: dict[str, Any]) -> None:
+    """Add one print record to an aggregate."""
+    aggregate["count"] += 1
+    for field in _SUM_FIELDS:
+        if field != "duration":
+            aggregate[field] += record.get(field) or 0.0
+    if record.get("start") is not None and record.get("end") is not None:
+        aggregate["duration"] += record["end"] - record["start"]
+    for field in _RANGE_FIELDS:
+        value = record.get(field) or 0.0
+        low = aggregate[f"{field}_min"]
+        high = aggregate[f"{field}_max"]
+        aggregate[f"{field}_min"] = value if low is None else min(low, value)
+        aggregate[f"{field}_max"] = value if high is None else max(high, value)
+    phases = aggregate["phases"]
+    for phase, breakdown in (record.get("phases") or {}).items():
+        total = phases.setdefault(phase, {"energy": 0.0, "duration": 0.0})
+        total["energy"] = round(total["energy"] + breakdown.get("energy", 0.0), 4)
+        total["duration"] = round(total["duration"] + breakdown.get("duration", 0.0), 1)
+
+
+def _rebuild_strings(
+    records: list[dict[str, Any]], strings: list[str]
+) -> tuple[list[dict[str, Any]], list[str]]:
+    """Drop strings only referenced by compacted records and renumber the rest."""
+    remap: dict[int, int] = {}
+    new_strings: list[str] = []
+    result: list[dict[str, Any]] = []
+    for record in records:
+        changes = {}
+        for field in STRING_FIELDS:
+            index = record.get(field)
+            if not isinstance(index, int) or not 0 <= index < len(strings):
+                continue
+            new_index = remap.get(index)
+            if new_index is None:
+                new_index = remap[index] = len(new_strings)
+                new_strings.append(strings[index])
+            if new_index != index:
+                changes[field] = new_index
+        result.append({**record, **changes} if changes else record)
+    return result, new_strings
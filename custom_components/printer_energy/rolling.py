@@ -0,0 +1,157 @@
+"""Rolling-window efficiency of finished prints in fixed-size ring buffers.
+
+Two windows are kept per printer: the last N prints, one ring slot per
+print, and the last days, one ring slot per hour bucket. Each slot holds
+the print hours, energy (kWh), material (m), energy of the prints that used
+material and cost, and the windows keep running sums of these fields. A
+finished print updates them in O(1), and memory is fixed by the window
+sizes. The sums are re-added exactly whenever a ring wraps, so floating
+point drift from subtracting old slots cannot build up.
+"""
+
+from __future__ import annotations
+
+from array import array
+import math
+from typing import Any, Mapping
+
+# Slot fields
+HOURS, ENERGY, MATERIAL, MATERIAL_ENERGY, COST = range(5)
+_FIELDS = 5
+
+
+def _averages(sums: list[float], prints: int) -> dict[str, Any]:
+    """Return the window's ratios, None where there is nothing to divide by."""
+    hours = sums[HOURS]
+    return {
+        "prints": prints,
+        "hours": round(hours, 3),
+        "energy_per_hour": round(sums[ENERGY] / hours, 4) if hours > 0 else None,
+        "energy_per_meter": (
+            round(sums[MATERIAL_ENERGY] / sums[MATERIAL], 5) if sums[MATERIAL] > 0 else None
+        ),
+        "cost_per_hour": round(sums[COST] / hours, 4) if hours > 0 else None,
+    }
+
+
+class _Ring:
+    """Ring buffer of slots with running sums per field."""
+
+    __slots__ = ("size", "slots", "counts", "prints", "sums")
+
+    def __init__(self, size: int) -> None:
+        """Initialize an empty ring."""
+        self.size = size
+        self.slots = array("d", bytes(8 * size * _FIELDS))
+        # Prints per slot
+        self.counts = array("l", bytes(array("l").itemsize * size))
+        self.prints = 0
+        self.sums = [0.0] * _FIELDS
+
+    def clear_slot(self, slot: int) -> None:
+        """Take a slot out of the sums and empty it."""
+        if not self.counts[slot]:
+            return
+        base = slot * _FIELDS
+        for field in range(_FIELDS):
+            self.sums[field] -= self.slots[base + field]
+            self.slots[base + field] = 0.0
+        self.prints -= self.counts[slot]
+        self.counts[slot] = 0
+
+    def add(self, slot: int, values: tuple[float, ...]) -> None:
+        """Add a print's values to a slot and the sums."""
+        base = slot * _FIELDS
+        for field, value in enumerate(values):
+            self.slots[base + field] += value
+            self.sums[field] += value
+        self.counts[slot] += 1
+        self.prints += 1
+
+    def resum(self) -> None:
+        """Recompute the sums exactly from the slots."""
+        self.sums = [math.fsum(self.slots[field::_FIELDS]) for field in range(_FIELDS)]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the slots for storage."""
+        return {"slots": self.slots.tolist(), "counts": self.counts.tolist()}
+
+    def restore(self, data: Mapping[str, Any]) -> None:
+        """Restore stored slots when they fit this ring's size."""
+        slots = data.get("slots") or []
+        counts = data.get("counts") or []
+        if len(slots) == self.size * _FIELDS and len(counts) == self.size:
+            self.slots = array("d", slots)
+            self.counts = array("l", counts)
+            self.prints = sum(counts)
+            self.resum()
+
+
+class RollingEfficiency:
+    """Energy per hour, energy per meter and cost per hour over recent prints."""
+
+    __slots__ = ("recent", "position", "hourly", "bucket_seconds", "bucket")
+
+    def __init__(self, prints: int, days: int, bucket_seconds: int = 3600) -> None:
+        """Initialize empty windows of the last prints and the last days."""
+        self.recent = _Ring(prints)
+        self.position = 0
+        self.bucket_seconds = bucket_seconds
+        self.hourly = _Ring(days * 86400 // bucket_seconds)
+        # Bucket number (epoch seconds // bucket_seconds) of the newest bucket
+        self.bucket: int | None = None
+
+    def add_print(self, end: float, hours: float, energy: float, material: float, cost: float) -> None:
+        """Add a finished print (material in mm)."""
+        meters = material / 1000.0
+        values = (hours, energy, meters, energy if meters > 0 else 0.0, cost)
+
+        self.recent.clear_slot(self.position)
+        self.recent.add(self.position, values)
+        self.position = (self.position + 1) % self.recent.size
+        if self.position == 0:
+            self.recent.resum()
+
+        bucket = int(end // self.bucket_seconds)
+        self.advance(end)
+        if bucket > self.bucket - self.hourly.size:
+            self.hourly.add(bucket % self.hourly.size, values)
+
+    def advance(self, now: float) -> None:
+        """Drop the hour buckets that left the window by now."""
+        bucket = int(now // self.bucket_seconds)
+        if self.bucket is None:
+            self.bucket = bucket
+            return
+        if bucket <= self.bucket:
+            return
+        # At most one full turn, however long nothing was printed
+        for expired in range(self.bucket + 1, min(bucket, self.bucket + self.hourly.size) + 1):
+            self.hourly.clear_slot(expired % self.hourly.size)
+        if bucket // self.hourly.size != self.bucket // self.hourly.size:
+            self.hourly.resum()
+        self.bucket = bucket
+
+    def values(self, now: float) -> dict[str, dict[str, Any]]:
+        """Return the averages of both windows at the given time."""
+        self.advance(now)
+        return {
+            "recent_prints": _averages(self.recent.sums, self.recent.prints),
+            "recent_days": _averages(self.hourly.sums, self.hourly.prints),
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return both windows for storage."""
+        return {
+            "recent": self.recent.as_dict(),
+            "position": self.position,
+            "hourly": self.hourly.as_dict(),
+            "bucket": self.bucket,
+        }
+
+    def restore(self, data: Mapping[str, Any]) -> None:
+        """Restore stored windows; a window whose size changed starts empty."""
+        self.recent.restore(data.get("recent") or {})
+        self.position = int(data.get("position", 0)) % self.recent.size
+        self.hourly.restore(data.get("hourly") or {})
+        self.bucket = data.get("bucket")
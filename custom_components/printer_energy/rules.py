@@ -0,0 +1,206 @@
+"""Printing detection rules over a sensor's state and attributes.
+
+A rule is a small expression compiled once into a predicate that takes the
+raw state string and the attributes of the printing sensor:
+
+    state in (running, prepare) and attr.progress < 100
+    attr.gcode_state == RUNNING or attr.print_status ~ "^print"
+
+Operands are ``state`` and ``attr.<name>``. Operators are ``==``, ``!=``,
+``<``, ``<=``, ``>``, ``>=`` (numeric), ``~`` (regex search), ``in (...)``,
+combined with ``and``, ``or``, ``not`` and parentheses. Values are bare
+words, numbers or quoted strings. String matching ignores case, like the
+printing state lists.
+"""
+
+from __future__ import annotations
+
+import operator
+import re
+from typing import Any, Callable, Mapping
+
+Predicate = Callable[[str, Mapping[str, Any]], bool]
+
+_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+        |(?P<op>==|!=|<=|>=|<|>|~|\(|\)|,)
+        |(?P<word>[A-Za-z0-9_.+\-:/]+)
+    )""",
+    re.VERBOSE,
+)
+_COMPARISONS: dict[str, Callable[[float, float], bool]] = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+_KEYWORDS = ("and", "or", "not", "in")
+
+
+class RuleError(ValueError):
+    """Raised when a rule does not parse."""
+
+
+def _tokenize(text: str) -> list[tuple[str, str]]:
+    """Split a rule into (kind, value) tokens; quoted strings lose their quotes."""
+    tokens: list[tuple[str, str]] = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise RuleError(f"Unexpected character at {position}: {text[position:position + 10]!r}")
+        position = match.end()
+        if match.group("string") is not None:
+            raw = match.group("string")[1:-1]
+            tokens.append(("value", re.sub(r"\\(.)", r"\1", raw)))
+        elif match.group("op") is not None:
+            tokens.append(("op", match.group("op")))
+        else:
+            word = match.group("word")
+            tokens.append(("keyword", word.lower()) if word.lower() in _KEYWORDS else ("value", word))
+    return tokens
+
+
+def _number(value: Any) -> float | None:
+    """Return a value as a float, or None when it is not numeric."""
+    if isinstance(value, bool):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _text(value: Any) -> str:
+    """Return a value as lower-case text for case-insensitive matching."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value).lower()
+
+
+class _Parser:
+    """Recursive descent parser producing closures."""
+
+    def __init__(self, tokens: list[tuple[str, str]]) -> None:
+        """Initialize the parser."""
+        self.tokens = tokens
+        self.index = 0
+
+    def peek(self) -> tuple[str, str] | None:
+        """Return the next token without consuming it."""
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def take(self, kind: str | None = None, value: str | None = None) -> tuple[str, str]:
+        """Consume the next token, checking its kind and value."""
+        token = self.peek()
+        if token is None or (kind and token[0] != kind) or (value and token[1] != value):
+            expected = value or kind or "a token"
+            found = token[1] if token else "end of rule"
+            raise RuleError(f"Expected {expected}, found {found}")
+        self.index += 1
+        return token
+
+    def parse(self) -> Predicate:
+        """Parse the whole rule."""
+        predicate = self.parse_or()
+        if self.peek() is not None:
+            raise RuleError(f"Unexpected {self.peek()[1]}")
+        return predicate
+
+    def parse_or(self) -> Predicate:
+        """Parse terms joined by ``or``."""
+        terms = [self.parse_and()]
+        while self.peek() == ("keyword", "or"):
+            self.take()
+            terms.append(self.parse_and())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda state, attributes: any(term(state, attributes) for term in terms)
+
+    def parse_and(self) -> Predicate:
+        """Parse terms joined by ``and``."""
+        terms = [self.parse_not()]
+        while self.peek() == ("keyword", "and"):
+            self.take()
+            terms.append(self.parse_not())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda state, attributes: all(term(state, attributes) for term in terms)
+
+    def parse_not(self) -> Predicate:
+        """Parse ``not``, a parenthesized rule or a comparison."""
+        if self.peek() == ("keyword", "not"):
+            self.take()
+            inner = self.parse_not()
+            return lambda state, attributes: not inner(state, attributes)
+        if self.peek() == ("op", "("):
+            self.take()
+            inner = self.parse_or()
+            self.take("op", ")")
+            return inner
+        return self.parse_comparison()
+
+    def parse_comparison(self) -> Predicate:
+        """Parse one comparison of an operand with a value."""
+        operand = self.take("value")[1]
+        if operand.lower() == "state":
+            get: Callable[[str, Mapping[str, Any]], Any] = lambda state, attributes: state
+        elif operand.lower().startswith(("attr.", "attributes.")):
+            name = operand.split(".", 1)[1]
+            if not name:
+                raise RuleError("Missing attribute name")
+            get = lambda state, attributes: attributes.get(name)
+        else:
+            raise RuleError(f"Unknown operand {operand}, use state or attr.<name>")
+
+        token = self.peek()
+        if token == ("keyword", "in"):
+            self.take()
+            self.take("op", "(")
+            values = {self.take("value")[1].lower()}
+            while self.peek() == ("op", ","):
+                self.take()
+                values.add(self.take("value")[1].lower())
+            self.take("op", ")")
+            members = frozenset(values)
+            return lambda state, attributes: _text(get(state, attributes)) in members
+
+        op = self.take("op")[1]
+        value = self.take("value")[1]
+        if op in ("==", "!="):
+            expected = value.lower()
+            equal = op == "=="
+            return lambda state, attributes: (_text(get(state, attributes)) == expected) == equal
+        if op == "~":
+            try:
+                pattern = re.compile(value, re.IGNORECASE)
+            except re.error as err:
+                raise RuleError(f"Invalid regex {value!r}: {err}") from err
+
+            def _search(state: str, attributes: Mapping[str, Any]) -> bool:
+                value = get(state, attributes)
+                return value is not None and pattern.search(str(value)) is not None
+
+            return _search
+        compare = _COMPARISONS.get(op)
+        limit = _number(value)
+        if compare is None or limit is None:
+            raise RuleError(f"Operator {op} needs a number, found {value}")
+
+        def _compare(state: str, attributes: Mapping[str, Any]) -> bool:
+            number = _number(get(state, attributes))
+            return number is not None and compare(number, limit)
+
+        return _compare
+
+
+def compile_rule(text: str | None) -> Predicate | None:
+    """Compile a rule into a predicate, or return None for an empty rule.
+
+    Raises ``RuleError`` when the rule does not parse.
+    """
+    if not text or not text.strip():
+        return None
+    return _Parser(_tokenize(text)).parse()
@@ -0,0 +1,74 @@
+"""Select platform for Printer Energy integration."""
+
+from __future__ import annotations
+
+from homeassistant.components.select import SelectEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_NAME
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN, SELECT_ACTIVE_SPOOL, SPOOL_NONE_OPTION
+from .coordinator import PrinterEnergyCoordinator
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the printer energy select entities."""
+    coordinator: PrinterEnergyCoordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    async_add_entities([ActiveSpoolSelect(coordinator, config_entry)])
+
+
+class ActiveSpoolSelect(CoordinatorEntity, SelectEntity):
+    """Select the spool loaded in the printer."""
+
+    _attr_has_entity_name = True
+    _attr_name = "Active Spool"
+    _attr_icon = "mdi:printer-3d-nozzle"
+    _attr_entity_category = EntityCategory.CONFIG
+
+    def __init__(
+        self,
+        coordinator: PrinterEnergyCoordinator,
+        config_entry: ConfigEntry,
+    ) -> None:
+        """Initialize the select entity."""
+        super().__init__(coordinator)
+        self.config_entry = config_entry
+        device_name = config_entry.data.get(CONF_NAME, config_entry.title or "3D Printer Cost Tracker")
+        self._attr_unique_id = f"{config_entry.entry_id}_{SELECT_ACTIVE_SPOOL}"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, config_entry.entry_id)},
+            "name": device_name,
+            "manufacturer": "Custom",
+            "model": "3D Printer Cost Tracker",
+        }
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return True
+
+    @property
+    def options(self) -> list[str]:
+        """Return spool names from the shared registry."""
+        return [SPOOL_NONE_OPTION] + [
+            spool.name for spool in self.coordinator.spool_registry.spools.values()
+        ]
+
+    @property
+    def current_option(self) -> str:
+        """Return the name of the active spool."""
+        spool = self.coordinator.get_active_spool()
+        return spool.name if spool else SPOOL_NONE_OPTION
+
+    async def async_select_option(self, option: str) -> None:
+        """Make a spool the active one for this printer."""
+        spool = self.coordinator.spool_registry.find_by_name(option)
+        await self.coordinator.async_set_active_spool(spool.spool_id if spool else None)
@@ -13,6 +13,7 @@ from homeassistant.components.sensor import (
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_NAME
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util import dt as dt_util
@@ -21,19 +22,54 @@ from .const import (
     ATTR_LAST_PRINT_ENERGY,
     ATTR_LAST_PRINT_ENERGY_COST,
     ATTR_LAST_PRINT_END,
+    ATTR_LAST_PRINT_INTEGRATED_ENERGY,
     ATTR_LAST_PRINT_MATERIAL,
     ATTR_LAST_PRINT_MATERIAL_COST,
     ATTR_LAST_PRINT_START,
     ATTR_LAST_PRINT_TOTAL_COST,
+    ATTR_COST_PER_METER,
+    ATTR_CURRENT_SESSION_ENERGY,
+    ATTR_ENERGY_SOURCES,
+    ATTR_FORECAST_BASIS,
+    ATTR_PHASE_BREAKDOWN,
     ATTR_PRINT_COUNT,
+    ATTR_PROJECTED_DURATION,
+    ATTR_PROJECTED_ENERGY_COST,
+    ATTR_PROJECTED_MATERIAL,
+    ATTR_PROJECTED_MATERIAL_COST,
+    ATTR_ROLLING_HOURS,
+    ATTR_ROLLING_PRINTS,
+    ATTR_SESSION_STATE,
+    ATTR_SPOOL_ID,
+    ATTR_SPOOL_LENGTH,
+    ATTR_SPOOL_LOW_REMAINING,
+    ATTR_SPOOL_MATERIAL,
+    ATTR_SPOOL_NAME,
+    ATTR_STATE_TRANSITIONS,
+    ATTR_SUPPRESSED_STARTS,
+    ATTR_SUPPRESSED_STOPS,
     ATTR_TOTAL_COST,
     ATTR_TOTAL_ENERGY,
     ATTR_TOTAL_ENERGY_COST,
     ATTR_TOTAL_MATERIAL,
     ATTR_TOTAL_MATERIAL_COST,
+    ATTRIBUTE_POLICY_MINIMAL,
+    ATTRIBUTE_POLICY_NONE,
     DOMAIN,
+    PHASE_IDLE,
+    PHASES,
+    ROLLING_DAYS,
+    ROLLING_PRINTS,
+    SENSOR_ACTIVE_SPOOL_REMAINING,
+    SENSOR_BEST_START,
+    SENSOR_HISTORY_SIZE,
+    SENSOR_ROLLING_COST_PER_HOUR,
+    SENSOR_ROLLING_ENERGY_PER_HOUR,
+    SENSOR_ROLLING_ENERGY_PER_METER,
 )
 from .coordinator import PrinterEnergyCoordinator
+from .farm import FarmCoordinator
+from .tracker import PrinterTracker
 
 
 async def async_setup_entry(
@@ -43,6 +79,13 @@ async def async_setup_entry(
 ) -> None:
     """Set up the printer energy sensors."""
     coordinator: PrinterEnergyCoordinator = hass.data[DOMAIN][config_entry.entry_id]
+    if isinstance(coordinator, FarmCoordinator):
+        async_add_entities(
+            sensor_class(coordinator, config_entry, tracker)
+            for tracker in coordinator.trackers.values()
+            for sensor_class in FARM_SENSORS
+        )
+        return
 
     entities = [
         TotalEnergySensor(coordinator, config_entry),
@@ -51,6 +94,16 @@ async def async_setup_entry(
         LastPrintEnergyCostSensor(coordinator, config_entry),
         LastPrintTotalCostSensor(coordinator, config_entry),
         TotalCostSensor(coordinator, config_entry),
+        PrintPhaseSensor(coordinator, config_entry),
+        ProjectedFinishEnergySensor(coordinator, config_entry),
+        ProjectedTotalCostSensor(coordinator, config_entry),
+        ActiveSpoolRemainingSensor(coordinator, config_entry),
+        HistorySizeSensor(coordinator, config_entry),
+        BestStartSensor(coordinator, config_entry),
+        RecentPrintsEnergyPerHourSensor(coordinator, config_entry),
+        RecentPrintsCostPerHourSensor(coordinator, config_entry),
+        RecentDaysEnergyPerHourSensor(coordinator, config_entry),
+        RecentDaysCostPerHourSensor(coordinator, config_entry),
     ]
     
     # Add material sensors only if material tracking is configured
@@ -58,6 +111,8 @@ async def async_setup_entry(
     if coordinator_instance.material_sensor:
         entities.append(LastPrintMaterialSensor(coordinator, config_entry))
         entities.append(LastPrintMaterialCostSensor(coordinator, config_entry))
+        entities.append(RecentPrintsEnergyPerMeterSensor(coordinator, config_entry))
+        entities.append(RecentDaysEnergyPerMeterSensor(coordinator, config_entry))
 
     async_add_entities(entities)
 
@@ -65,6 +120,33 @@ async def async_setup_entry(
 class PrinterEnergySensor(CoordinatorEntity, SensorEntity):
     """Base class for printer energy sensors."""
 
+    # Totals copied from other sensors' states and values that change on every
+    # refresh - keep them in the state machine but out of the recorder
+    _unrecorded_attributes = frozenset(
+        {
+            ATTR_TOTAL_ENERGY,
+            ATTR_PRINT_COUNT,
+            ATTR_TOTAL_COST,
+            ATTR_TOTAL_MATERIAL,
+            ATTR_TOTAL_ENERGY_COST,
+            ATTR_TOTAL_MATERIAL_COST,
+            ATTR_LAST_PRINT_ENERGY,
+            ATTR_LAST_PRINT_MATERIAL,
+            ATTR_LAST_PRINT_ENERGY_COST,
+            ATTR_LAST_PRINT_MATERIAL_COST,
+            ATTR_LAST_PRINT_TOTAL_COST,
+            ATTR_PHASE_BREAKDOWN,
+            ATTR_ENERGY_SOURCES,
+            ATTR_STATE_TRANSITIONS,
+            ATTR_PROJECTED_DURATION,
+            ATTR_PROJECTED_MATERIAL,
+            ATTR_PROJECTED_ENERGY_COST,
+            ATTR_PROJECTED_MATERIAL_COST,
+        }
+    )
+    # Attributes describing the sensor's own value, kept by the "minimal" policy
+    _minimal_attributes: frozenset[str] = frozenset()
+
     def __init__(
         self,
         coordinator: PrinterEnergyCoordinator,
@@ -98,6 +180,21 @@ class PrinterEnergySensor(CoordinatorEntity, SensorEntity):
         # This allows sensors to show last known values even when source sensors are unavailable
         return self.coordinator.data is not None
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return extra state attributes filtered by the attribute policy."""
+        policy = self.coordinator.attribute_policy
+        if policy == ATTRIBUTE_POLICY_NONE:
+            return None
+        attrs = self._build_attributes()
+        if policy == ATTRIBUTE_POLICY_MINIMAL:
+            return {key: value for key, value in attrs.items() if key in self._minimal_attributes}
+        return attrs
+
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return all extra state attributes."""
+        return {}
+
 
 class TotalEnergySensor(PrinterEnergySensor):
     """Sensor for total energy consumed during prints."""
@@ -120,9 +217,8 @@ class TotalEnergySensor(PrinterEnergySensor):
             return round(self.coordinator.data.get("total_energy", 0.0), 3)
         return 0.0
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return extra state attributes."""
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return all extra state attributes."""
         attrs = {}
         if self.coordinator.data:
             attrs[ATTR_PRINT_COUNT] = self.coordinator.data.get("print_count", 0)
@@ -164,6 +260,13 @@ class PrintCountSensor(PrinterEnergySensor):
     _attr_native_unit_of_measurement = "prints"
     _attr_icon = "mdi:counter"
     _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _minimal_attributes = frozenset(
+        {
+            ATTR_SESSION_STATE,
+            ATTR_SUPPRESSED_STARTS,
+            ATTR_SUPPRESSED_STOPS,
+        }
+    )
 
     @property
     def entity_key(self) -> str:
@@ -177,9 +280,8 @@ class PrintCountSensor(PrinterEnergySensor):
             return self.coordinator.data.get("print_count", 0)
         return 0
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return extra state attributes."""
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return all extra state attributes."""
         attrs = {}
         if self.coordinator.data:
             attrs[ATTR_TOTAL_ENERGY] = self.coordinator.data.get("total_energy", 0.0)
@@ -194,6 +296,12 @@ class PrintCountSensor(PrinterEnergySensor):
                 attrs[ATTR_TOTAL_MATERIAL] = self.coordinator.data.get(
                     "total_material", 0.0
                 )
+            # Debounced state machine - shows how many bogus sessions were avoided
+            attrs[ATTR_SESSION_STATE] = self.coordinator.data.get("session_state")
+            counters = self.coordinator.data.get("state_counters", {})
+            attrs[ATTR_SUPPRESSED_STARTS] = counters.get("suppressed_starts", 0)
+            attrs[ATTR_SUPPRESSED_STOPS] = counters.get("suppressed_stops", 0)
+            attrs[ATTR_STATE_TRANSITIONS] = counters.get("transitions", {})
         return attrs
 
 
@@ -205,6 +313,14 @@ class LastPrintEnergySensor(PrinterEnergySensor):
     _attr_device_class = SensorDeviceClass.ENERGY
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_icon = "mdi:flash-outline"
+    _minimal_attributes = frozenset(
+        {
+            ATTR_LAST_PRINT_START,
+            ATTR_LAST_PRINT_END,
+            ATTR_LAST_PRINT_INTEGRATED_ENERGY,
+            ATTR_ENERGY_SOURCES,
+        }
+    )
 
     @property
     def entity_key(self) -> str:
@@ -218,9 +334,8 @@ class LastPrintEnergySensor(PrinterEnergySensor):
             return round(self.coordinator.data.get("last_print_energy", 0.0), 3)
         return 0.0
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return extra state attributes."""
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return all extra state attributes."""
         attrs = {}
         if self.coordinator.data:
             if self.coordinator.data.get("last_print_start"):
@@ -229,6 +344,14 @@ class LastPrintEnergySensor(PrinterEnergySensor):
                 attrs[ATTR_LAST_PRINT_END] = self.coordinator.data["last_print_end"]
             attrs[ATTR_TOTAL_ENERGY] = self.coordinator.data.get("total_energy", 0.0)
             attrs[ATTR_PRINT_COUNT] = self.coordinator.data.get("print_count", 0)
+            if self.coordinator.energy_sensor and self.coordinator.power_sensor:
+                # Integrated power sensor reading for cross-checking the meter
+                attrs[ATTR_LAST_PRINT_INTEGRATED_ENERGY] = round(
+                    self.coordinator.data.get("last_print_integrated_energy", 0.0), 3
+                )
+            if self.coordinator.energy_sources:
+                # Energy per source of the running (or last) print
+                attrs[ATTR_ENERGY_SOURCES] = self.coordinator.data.get("energy_sources", {})
             if self.coordinator.data.get("last_print_material", 0.0) > 0:
                 attrs[ATTR_LAST_PRINT_MATERIAL] = self.coordinator.data.get(
                     "last_print_material", 0.0
@@ -259,6 +382,7 @@ class LastPrintMaterialSensor(PrinterEnergySensor):
     _attr_native_unit_of_measurement = "cm"
     _attr_icon = "mdi:counter"
     _attr_state_class = SensorStateClass.MEASUREMENT
+    _minimal_attributes = frozenset({ATTR_LAST_PRINT_START, ATTR_LAST_PRINT_END})
 
     @property
     def entity_key(self) -> str:
@@ -274,9 +398,8 @@ class LastPrintMaterialSensor(PrinterEnergySensor):
             return round(mm_value / 10.0, 2)
         return 0.0
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return extra state attributes."""
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return all extra state attributes."""
         attrs = {}
         if self.coordinator.data:
             if self.coordinator.data.get("last_print_start"):
@@ -310,6 +433,7 @@ class LastPrintEnergyCostSensor(PrinterEnergySensor):
     _attr_name = "Last Print Energy Cost"
     _attr_icon = "mdi:currency-usd"
     _attr_state_class = SensorStateClass.MEASUREMENT
+    _minimal_attributes = frozenset({ATTR_LAST_PRINT_START, ATTR_LAST_PRINT_END})
 
     @property
     def entity_key(self) -> str:
@@ -328,9 +452,8 @@ class LastPrintEnergyCostSensor(PrinterEnergySensor):
             return round(self.coordinator.data.get("last_print_energy_cost", 0.0), 2)
         return 0.0
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return extra state attributes."""
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return all extra state attributes."""
         attrs = {}
         if self.coordinator.data:
             if self.coordinator.data.get("last_print_start"):
@@ -359,6 +482,7 @@ class LastPrintMaterialCostSensor(PrinterEnergySensor):
     _attr_name = "Last Print Material Cost"
     _attr_icon = "mdi:currency-usd"
     _attr_state_class = SensorStateClass.MEASUREMENT
+    _minimal_attributes = frozenset({ATTR_LAST_PRINT_START, ATTR_LAST_PRINT_END})
 
     @property
     def entity_key(self) -> str:
@@ -377,9 +501,8 @@ class LastPrintMaterialCostSensor(PrinterEnergySensor):
             return round(self.coordinator.data.get("last_print_material_cost", 0.0), 2)
         return 0.0
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return extra state attributes."""
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return all extra state attributes."""
         attrs = {}
         if self.coordinator.data:
             if self.coordinator.data.get("last_print_start"):
@@ -408,6 +531,14 @@ class LastPrintTotalCostSensor(PrinterEnergySensor):
     _attr_name = "Last Print Total Cost"
     _attr_icon = "mdi:currency-usd"
     _attr_state_class = SensorStateClass.MEASUREMENT
+    _minimal_attributes = frozenset(
+        {
+            ATTR_LAST_PRINT_START,
+            ATTR_LAST_PRINT_END,
+            ATTR_LAST_PRINT_ENERGY_COST,
+            ATTR_LAST_PRINT_MATERIAL_COST,
+        }
+    )
 
     @property
     def entity_key(self) -> str:
@@ -426,9 +557,8 @@ class LastPrintTotalCostSensor(PrinterEnergySensor):
             return round(self.coordinator.data.get("last_print_total_cost", 0.0), 2)
         return 0.0
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return extra state attributes."""
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return all extra state attributes."""
         attrs = {}
         if self.coordinator.data:
             if self.coordinator.data.get("last_print_start"):
@@ -459,6 +589,7 @@ class TotalCostSensor(PrinterEnergySensor):
     _attr_name = "Total Cost"
     _attr_icon = "mdi:cash"
     _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _minimal_attributes = frozenset({ATTR_TOTAL_ENERGY_COST, ATTR_TOTAL_MATERIAL_COST})
 
     @property
     def entity_key(self) -> str:
@@ -477,9 +608,8 @@ class TotalCostSensor(PrinterEnergySensor):
             return round(self.coordinator.data.get("total_cost", 0.0), 2)
         return 0.0
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return extra state attributes."""
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return all extra state attributes."""
         attrs = {}
         if self.coordinator.data:
             attrs[ATTR_PRINT_COUNT] = self.coordinator.data.get("print_count", 0)
@@ -498,3 +628,480 @@ class TotalCostSensor(PrinterEnergySensor):
                 "last_print_total_cost", 0.0
             )
         return attrs
+
+
+class PrintPhaseSensor(PrinterEnergySensor):
+    """Sensor for the current phase of the running print."""
+
+    _attr_name = "Print Phase"
+    _attr_icon = "mdi:printer-3d-nozzle-heat"
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_options = PHASES
+    _minimal_attributes = frozenset({ATTR_PHASE_BREAKDOWN})
+
+    @property
+    def entity_key(self) -> str:
+        """Return the entity key."""
+        return "print_phase"
+
+    @property
+    def native_value(self) -> str:
+        """Return the current print phase."""
+        if self.coordinator.data:
+            return self.coordinator.data.get("current_phase", PHASE_IDLE)
+        return PHASE_IDLE
+
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return all extra state attributes."""
+        attrs = {}
+        if self.coordinator.data:
+            # Energy and duration per phase of the running (or last) print
+            attrs[ATTR_PHASE_BREAKDOWN] = self.coordinator.data.get("phase_breakdown", {})
+        return attrs
+
+
+class ProjectedFinishEnergySensor(PrinterEnergySensor):
+    """Sensor for the projected energy of the running print at its finish."""
+
+    _attr_name = "Projected Finish Energy"
+    _attr_native_unit_of_measurement = "kWh"
+    _attr_device_class = SensorDeviceClass.ENERGY
+    _attr_icon = "mdi:flash-triangle-outline"
+    _minimal_attributes = frozenset({ATTR_PROJECTED_DURATION, ATTR_FORECAST_BASIS})
+
+    @property
+    def entity_key(self) -> str:
+        """Return the entity key."""
+        return "projected_finish_energy"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the projected energy, or None when not printing."""
+        if self.coordinator.data and self.coordinator.data.get("projected_energy") is not None:
+            return round(self.coordinator.data["projected_energy"], 3)
+        return None
+
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return all extra state attributes."""
+        attrs = {}
+        if self.coordinator.data and self.coordinator.data.get("projected_duration") is not None:
+            attrs[ATTR_PROJECTED_DURATION] = round(self.coordinator.data["projected_duration"], 2)
+            attrs[ATTR_FORECAST_BASIS] = self.coordinator.data.get("forecast_basis")
+        return attrs
+
+
+class ProjectedTotalCostSensor(PrinterEnergySensor):
+    """Sensor for the projected total cost of the running print."""
+
+    _attr_name = "Projected Total Cost"
+    _attr_icon = "mdi:cash-clock"
+    _minimal_attributes = frozenset(
+        {
+            ATTR_PROJECTED_ENERGY_COST,
+            ATTR_PROJECTED_MATERIAL_COST,
+            ATTR_FORECAST_BASIS,
+        }
+    )
+
+    @property
+    def entity_key(self) -> str:
+        """Return the entity key."""
+        return "projected_total_cost"
+
+    @property
+    def native_unit_of_measurement(self) -> str | None:
+        """Return the currency unit from energy cost sensor."""
+        return self.coordinator._get_currency()
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the projected total cost, or None when not printing."""
+        if self.coordinator.data and self.coordinator.data.get("projected_total_cost") is not None:
+            return round(self.coordinator.data["projected_total_cost"], 2)
+        return None
+
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return all extra state attributes."""
+        attrs = {}
+        if self.coordinator.data and self.coordinator.data.get("projected_total_cost") is not None:
+            attrs[ATTR_PROJECTED_ENERGY_COST] = round(
+                self.coordinator.data.get("projected_energy_cost", 0.0), 2
+            )
+            attrs[ATTR_PROJECTED_MATERIAL_COST] = round(
+                self.coordinator.data.get("projected_material_cost", 0.0), 2
+            )
+            attrs[ATTR_PROJECTED_DURATION] = round(self.coordinator.data["projected_duration"], 2)
+            if self.coordinator.material_sensor:
+                attrs[ATTR_PROJECTED_MATERIAL] = round(
+                    self.coordinator.data.get("projected_material", 0.0), 1
+                )
+            attrs[ATTR_FORECAST_BASIS] = self.coordinator.data.get("forecast_basis")
+        return attrs
+
+
+class ActiveSpoolRemainingSensor(PrinterEnergySensor):
+    """Sensor for filament left on the printer's active spool."""
+
+    _attr_name = "Active Spool Remaining"
+    _attr_native_unit_of_measurement = "m"
+    _attr_device_class = SensorDeviceClass.DISTANCE
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:printer-3d-nozzle"
+    _minimal_attributes = frozenset({ATTR_SPOOL_ID, ATTR_SPOOL_NAME})
+
+    @property
+    def entity_key(self) -> str:
+        """Return the entity key."""
+        return SENSOR_ACTIVE_SPOOL_REMAINING
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the remaining length, or None without an active spool."""
+        spool = self.coordinator.data.get("active_spool") if self.coordinator.data else None
+        if spool is None:
+            return None
+        return round(spool["remaining"], 2)
+
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return all extra state attributes."""
+        attrs = {}
+        spool = self.coordinator.data.get("active_spool") if self.coordinator.data else None
+        if spool is not None:
+            attrs[ATTR_SPOOL_ID] = spool["id"]
+            attrs[ATTR_SPOOL_NAME] = spool["name"]
+            attrs[ATTR_SPOOL_MATERIAL] = spool["material"]
+            attrs[ATTR_SPOOL_LENGTH] = spool["length"]
+            attrs[ATTR_SPOOL_LOW_REMAINING] = spool["low_remaining"]
+            if spool["length"] > 0:
+                attrs[ATTR_COST_PER_METER] = round(spool["price"] / spool["length"], 4)
+        return attrs
+
+
+class HistorySizeSensor(PrinterEnergySensor):
+    """Diagnostic sensor for the disk usage of the print history."""
+
+    _attr_name = "History Size"
+    _attr_native_unit_of_measurement = "kB"
+    _attr_device_class = SensorDeviceClass.DATA_SIZE
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_icon = "mdi:database"
+
+    @property
+    def entity_key(self) -> str:
+        """Return the entity key."""
+        return SENSOR_HISTORY_SIZE
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the size of the history file in kB."""
+        if self.coordinator.data and self.coordinator.data.get("history_size") is not None:
+            return round(self.coordinator.data["history_size"] / 1024.0, 1)
+        return None
+
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return all extra state attributes."""
+        attrs = {}
+        if self.coordinator.data:
+            attrs["records"] = self.coordinator.data.get("history_records", 0)
+            attrs["aggregates"] = self.coordinator.data.get("history_aggregates", 0)
+            attrs["strings"] = self.coordinator.data.get("history_strings", 0)
+        return attrs
+
+
+class BestStartSensor(PrinterEnergySensor):
+    """Sensor for the cheapest time to start a typical print in the next 24 hours."""
+
+    _attr_name = "Best Start Next 24h"
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+    _attr_icon = "mdi:clock-star-four-points"
+    _minimal_attributes = frozenset({"savings"})
+
+    @property
+    def entity_key(self) -> str:
+        """Return the entity key."""
+        return SENSOR_BEST_START
+
+    @property
+    def native_value(self) -> datetime | None:
+        """Return the best start time, or None without a forecast or print profile."""
+        plan = self.coordinator.data.get("best_start") if self.coordinator.data else None
+        if plan is None:
+            return None
+        return dt_util.utc_from_timestamp(plan["start"])
+
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return all extra state attributes."""
+        attrs = {}
+        plan = self.coordinator.data.get("best_start") if self.coordinator.data else None
+        if plan is not None:
+            attrs["end"] = dt_util.utc_from_timestamp(plan["end"])
+            attrs["energy"] = round(plan["energy"], 3)
+            attrs["cost"] = round(plan["cost"], 2)
+            attrs["cost_now"] = round(plan["cost_now"], 2)
+            attrs["savings"] = round(plan["savings"], 2)
+        return attrs
+
+
+class RollingEfficiencySensor(PrinterEnergySensor):
+    """Base class for averages over the last prints or the last days."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _minimal_attributes = frozenset({ATTR_ROLLING_PRINTS, ATTR_ROLLING_HOURS})
+    # Window ("recent_prints" or "recent_days") and metric of the coordinator data
+    _window: str
+    _metric: str
+
+    @property
+    def entity_key(self) -> str:
+        """Return the entity key."""
+        return f"{self._window}_{self._metric}"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the average, or None before a print with time (or material) in the window."""
+        window = self.coordinator.data.get("rolling") if self.coordinator.data else None
+        if window is None:
+            return None
+        return window[self._window][self._metric]
+
+    def _build_attributes(self) -> dict[str, Any]:
+        """Return all extra state attributes."""
+        attrs = {}
+        window = self.coordinator.data.get("rolling") if self.coordinator.data else None
+        if window is not None:
+            attrs[ATTR_ROLLING_PRINTS] = window[self._window]["prints"]
+            attrs[ATTR_ROLLING_HOURS] = window[self._window]["hours"]
+        return attrs
+
+
+class RecentPrintsEnergyPerHourSensor(RollingEfficiencySensor):
+    """Sensor for the energy per print hour of the last prints."""
+
+    _attr_name = f"Energy per Hour Last {ROLLING_PRINTS} Prints"
+    _attr_native_unit_of_measurement = "kWh/h"
+    _attr_icon = "mdi:lightning-bolt-outline"
+    _window = "recent_prints"
+    _metric = SENSOR_ROLLING_ENERGY_PER_HOUR
+
+
+class RecentPrintsEnergyPerMeterSensor(RollingEfficiencySensor):
+    """Sensor for the energy per meter of filament of the last prints."""
+
+    _attr_name = f"Energy per Meter Last {ROLLING_PRINTS} Prints"
+    _attr_native_unit_of_measurement = "kWh/m"
+    _attr_icon = "mdi:printer-3d-nozzle-outline"
+    _window = "recent_prints"
+    _metric = SENSOR_ROLLING_ENERGY_PER_METER
+
+
+class RecentPrintsCostPerHourSensor(RollingEfficiencySensor):
+    """Sensor for the cost per print hour of the last prints."""
+
+    _attr_name = f"Cost per Hour Last {ROLLING_PRINTS} Prints"
+    _attr_icon = "mdi:cash-clock"
+    _window = "recent_prints"
+    _metric = SENSOR_ROLLING_COST_PER_HOUR
+
+    @property
+    def native_unit_of_measurement(self) -> str | None:
+        """Return the currency per hour."""
+        return f"{self.coordinator._get_currency()}/h"
+
+
+class RecentDaysEnergyPerHourSensor(RollingEfficiencySensor):
+    """Sensor for the energy per print hour of the last days."""
+
+    _attr_name = f"Energy per Hour Last {ROLLING_DAYS} Days"
+    _attr_native_unit_of_measurement = "kWh/h"
+    _attr_icon = "mdi:lightning-bolt-outline"
+    _window = "recent_days"
+    _metric = SENSOR_ROLLING_ENERGY_PER_HOUR
+
+
+class RecentDaysEnergyPerMeterSensor(RollingEfficiencySensor):
+    """Sensor for the energy per meter of filament of the last days."""
+
+    _attr_name = f"Energy per Meter Last {ROLLING_DAYS} Days"
+    _attr_native_unit_of_measurement = "kWh/m"
+    _attr_icon = "mdi:printer-3d-nozzle-outline"
+    _window = "recent_days"
+    _metric = SENSOR_ROLLING_ENERGY_PER_METER
+
+
+class RecentDaysCostPerHourSensor(RollingEfficiencySensor):
+    """Sensor for the cost per print hour of the last days."""
+
+    _attr_name = f"Cost per Hour Last {ROLLING_DAYS} Days"
+    _attr_icon = "mdi:cash-clock"
+    _window = "recent_days"
+    _metric = SENSOR_ROLLING_COST_PER_HOUR
+
+    @property
+    def native_unit_of_measurement(self) -> str | None:
+        """Return the currency per hour."""
+        return f"{self.coordinator._get_currency()}/h"
+
+
+class FarmPrinterSensor(CoordinatorEntity, SensorEntity):
+    """Base class for the sensors of one printer in a farm entry.
+
+    Values are read straight from the printer's tracker. The entity
+    subscribes with the printer id as context, so the farm coordinator only
+    updates the entities of printers whose sources changed.
+    """
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: FarmCoordinator,
+        config_entry: ConfigEntry,
+        tracker: PrinterTracker,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, context=tracker.printer_id)
+        self.tracker = tracker
+        self._attr_unique_id = f"{config_entry.entry_id}_{tracker.printer_id}_{self.entity_key}"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, f"{config_entry.entry_id}_{tracker.printer_id}")},
+            "name": tracker.name,
+            "manufacturer": "Custom",
+            "model": "3D Printer Cost Tracker",
+        }
+
+    @property
+    def entity_key(self) -> str:
+        """Return the entity key for unique_id."""
+        raise NotImplementedError
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available (last known values are kept)."""
+        return self.coordinator.data is not None
+
+
+class FarmTotalEnergySensor(FarmPrinterSensor):
+    """Sensor for a farm printer's total print energy."""
+
+    _attr_name = "Total Energy"
+    _attr_native_unit_of_measurement = "kWh"
+    _attr_device_class = SensorDeviceClass.ENERGY
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_icon = "mdi:flash"
+
+    @property
+    def entity_key(self) -> str:
+        """Return the entity key."""
+        return "total_energy"
+
+    @property
+    def native_value(self) -> float:
+        """Return the total energy consumed."""
+        return round(self.tracker.total_energy, 3)
+
+
+class FarmPrintCountSensor(FarmPrinterSensor):
+    """Sensor for a farm printer's print count."""
+
+    _attr_name = "Print Count"
+    _attr_native_unit_of_measurement = "prints"
+    _attr_icon = "mdi:counter"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def entity_key(self) -> str:
+        """Return the entity key."""
+        return "print_count"
+
+    @property
+    def native_value(self) -> int:
+        """Return the number of completed prints."""
+        return self.tracker.print_count
+
+
+class FarmCurrentSessionCostSensor(FarmPrinterSensor):
+    """Sensor for the running cost of a farm printer's current print."""
+
+    _attr_name = "Current Session Cost"
+    _attr_icon = "mdi:cash-clock"
+
+    @property
+    def entity_key(self) -> str:
+        """Return the entity key."""
+        return "current_session_cost"
+
+    @property
+    def native_unit_of_measurement(self) -> str | None:
+        """Return the currency unit from the energy cost sensor."""
+        return self.coordinator.currency
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the running cost, or None while idle."""
+        if not self.tracker.is_printing:
+            return None
+        return round(self.tracker.session_total_cost, 2)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the running session's energy and debounced state."""
+        return {
+            ATTR_CURRENT_SESSION_ENERGY: round(self.tracker.session_energy, 3),
+            ATTR_SESSION_STATE: self.tracker.machine.state,
+        }
+
+
+class FarmLastPrintTotalCostSensor(FarmPrinterSensor):
+    """Sensor for the total cost of a farm printer's last print."""
+
+    _attr_name = "Last Print Total Cost"
+    _attr_icon = "mdi:currency-usd"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def entity_key(self) -> str:
+        """Return the entity key."""
+        return "last_print_total_cost"
+
+    @property
+    def native_unit_of_measurement(self) -> str | None:
+        """Return the currency unit from the energy cost sensor."""
+        return self.coordinator.currency
+
+    @property
+    def native_value(self) -> float:
+        """Return the last print's total cost."""
+        return round(self.tracker.last_print_total_cost, 2)
+
+
+class FarmTotalCostSensor(FarmPrinterSensor):
+    """Sensor for a farm printer's total cost across all prints."""
+
+    _attr_name = "Total Cost"
+    _attr_icon = "mdi:cash"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def entity_key(self) -> str:
+        """Return the entity key."""
+        return "total_cost"
+
+    @property
+    def native_unit_of_measurement(self) -> str | None:
+        """Return the currency unit from the energy cost sensor."""
+        return self.coordinator.currency
+
+    @property
+    def native_value(self) -> float:
+        """Return the total cost."""
+        return round(self.tracker.total_cost, 2)
+
+
+FARM_SENSORS = (
+    FarmTotalEnergySensor,
+    FarmPrintCountSensor,
+    FarmCurrentSessionCostSensor,
+    FarmLastPrintTotalCostSensor,
+    FarmTotalCostSensor,
+)
@@ -0,0 +1,452 @@
+"""Services for Printer Energy integration."""
+
+from __future__ import annotations
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .analytics import compute_statistics, records_to_columns
+from .const import (
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_DRY_RUN,
+    ATTR_DURATION,
+    ATTR_ENERGY_PRICE,
+    ATTR_FILE_NAME,
+    ATTR_FILE_PATH,
+    ATTR_HORIZON,
+    ATTR_MATERIAL_COST_PER_METER,
+    ATTR_PERIOD_END,
+    ATTR_PERIOD_START,
+    ATTR_POWER,
+    ATTR_PRICE_ENTITY,
+    ATTR_SPOOL_ID,
+    ATTR_SPOOL_LENGTH,
+    ATTR_SPOOL_LOW_REMAINING,
+    ATTR_SPOOL_MATERIAL,
+    ATTR_SPOOL_NAME,
+    ATTR_SPOOL_PRICE,
+    ATTR_SPOOL_REMAINING,
+    ATTR_START_ENERGY,
+    ATTR_TARIFF,
+    DATA_PRINT_FILE_CACHE,
+    DATA_SPOOL_REGISTRY,
+    DATA_STATISTICS_CACHE,
+    DEFAULT_SPOOL_LOW_REMAINING,
+    DOMAIN,
+    SERVICE_ADD_SPOOL,
+    SERVICE_ESTIMATE_PRINT,
+    SERVICE_FIND_CHEAPEST_START,
+    SERVICE_GET_FILE_COSTS,
+    SERVICE_GET_STATISTICS,
+    SERVICE_LIST_SPOOLS,
+    SERVICE_REMOVE_SPOOL,
+    SERVICE_REPRICE,
+    SERVICE_UPDATE_SPOOL,
+)
+from .coordinator import PrinterEnergyCoordinator
+from .farm import FarmCoordinator
+from .gcode import EXTENSIONS, PrintFileCache, PrintFileError
+from .planner import parse_price_forecast
+from .spools import SpoolRegistry
+
+STATISTICS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    }
+)
+
+FILE_COSTS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_FILE_NAME): cv.string,
+    }
+)
+
+_POSITIVE_FLOAT = vol.All(vol.Coerce(float), vol.Range(min=0))
+
+CHEAPEST_START_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_DURATION): cv.positive_time_period,
+        vol.Optional(ATTR_POWER): _POSITIVE_FLOAT,
+        vol.Optional(ATTR_START_ENERGY): _POSITIVE_FLOAT,
+        vol.Optional(ATTR_PRICE_ENTITY): cv.entity_id,
+        vol.Optional(ATTR_HORIZON): cv.positive_time_period,
+    }
+)
+
+ADD_SPOOL_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_SPOOL_NAME): cv.string,
+        vol.Optional(ATTR_SPOOL_MATERIAL, default=""): cv.string,
+        vol.Required(ATTR_SPOOL_PRICE): _POSITIVE_FLOAT,
+        vol.Required(ATTR_SPOOL_LENGTH): _POSITIVE_FLOAT,
+        vol.Optional(ATTR_SPOOL_REMAINING): _POSITIVE_FLOAT,
+        vol.Optional(ATTR_SPOOL_LOW_REMAINING, default=DEFAULT_SPOOL_LOW_REMAINING): _POSITIVE_FLOAT,
+    }
+)
+
+UPDATE_SPOOL_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_SPOOL_ID): cv.string,
+        vol.Optional(ATTR_SPOOL_NAME): cv.string,
+        vol.Optional(ATTR_SPOOL_MATERIAL): cv.string,
+        vol.Optional(ATTR_SPOOL_PRICE): _POSITIVE_FLOAT,
+        vol.Optional(ATTR_SPOOL_LENGTH): _POSITIVE_FLOAT,
+        vol.Optional(ATTR_SPOOL_REMAINING): _POSITIVE_FLOAT,
+        vol.Optional(ATTR_SPOOL_LOW_REMAINING): _POSITIVE_FLOAT,
+    }
+)
+
+REMOVE_SPOOL_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_SPOOL_ID): cv.string,
+    }
+)
+
+REPRICE_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+            vol.Optional(ATTR_PERIOD_START): cv.datetime,
+            vol.Optional(ATTR_PERIOD_END): cv.datetime,
+            vol.Optional(ATTR_ENERGY_PRICE): _POSITIVE_FLOAT,
+            vol.Optional(ATTR_TARIFF): vol.All(cv.ensure_list, [dict]),
+            vol.Optional(ATTR_MATERIAL_COST_PER_METER): _POSITIVE_FLOAT,
+            vol.Optional(ATTR_SPOOL_ID): cv.string,
+            vol.Optional(ATTR_DRY_RUN, default=False): cv.boolean,
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_ENERGY_PRICE, ATTR_TARIFF, ATTR_MATERIAL_COST_PER_METER, ATTR_SPOOL_ID),
+)
+
+ESTIMATE_PRINT_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_FILE_PATH): cv.string,
+        vol.Optional(ATTR_SPOOL_ID): cv.string,
+    }
+)
+
+
+def _get_coordinators(hass: HomeAssistant, entry_id: str | None) -> list[PrinterEnergyCoordinator]:
+    """Return the coordinator for one entry, or all single-printer coordinators (fleet).
+
+    Farm entries keep no per-print history, learned energy rate or print
+    profile, so they are left out of the fleet and rejected by entry id.
+    """
+    entries = hass.data.get(DOMAIN, {})
+    coordinators = {
+        key: value for key, value in entries.items() if isinstance(value, PrinterEnergyCoordinator)
+    }
+    if entry_id is None:
+        return list(coordinators.values())
+    if isinstance(entries.get(entry_id), FarmCoordinator):
+        raise ServiceValidationError(
+            f"Config entry {entry_id} is a printer farm. Farm printers keep no per-print history, "
+            "learned energy rate or print profile, use a single-printer entry"
+        )
+    if entry_id not in coordinators:
+        raise ServiceValidationError(f"No printer energy tracker with config entry id {entry_id}")
+    return [coordinators[entry_id]]
+
+
+def _farm_entry_ids(hass: HomeAssistant, entry_id: str | None) -> list[str]:
+    """Return the farm entries a fleet-wide call leaves out."""
+    if entry_id is not None:
+        return []
+    return [key for key, value in hass.data.get(DOMAIN, {}).items() if isinstance(value, FarmCoordinator)]
+
+
+def _file_costs(coordinators: list[PrinterEnergyCoordinator], file_name: str | None) -> list[dict]:
+    """Aggregate print count, cost, energy and material per file name."""
+    totals: dict[str, list[float]] = {}
+    for coordinator in coordinators:
+        history = coordinator.history
+        # Aggregate on interned indexes, resolve to names once per file
+        by_index: dict[int, list[float]] = {}
+        for record in history.records:
+            index = record.get("file")
+            if index is None:
+                continue
+            entry = by_index.get(index)
+            if entry is None:
+                entry = by_index[index] = [0, 0.0, 0.0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += record.get("total_cost") or 0.0
+            entry[2] += record.get("energy") or 0.0
+            entry[3] += record.get("material") or 0.0
+            entry[4] = max(entry[4], record.get("end") or 0.0)
+        for index, entry in by_index.items():
+            name = history.lookup(index)
+            if name is None or (file_name is not None and name != file_name):
+                continue
+            total = totals.setdefault(name, [0, 0.0, 0.0, 0.0, 0.0])
+            for position in range(4):
+                total[position] += entry[position]
+            total[4] = max(total[4], entry[4])
+
+    return [
+        {
+            "file": name,
+            "prints": int(prints),
+            "total_cost": round(cost, 2),
+            "mean_cost": round(cost / prints, 2),
+            "energy": round(energy, 3),
+            "material": round(material, 1),
+            "last_print": dt_util.utc_from_timestamp(last).isoformat() if last else None,
+        }
+        for name, (prints, cost, energy, material, last) in sorted(
+            totals.items(), key=lambda item: item[1][1], reverse=True
+        )
+    ]
+
+
+def _statistics_job(record_lists: list[list[dict]]) -> dict:
+    """Build columns and compute statistics (runs in the executor)."""
+    records = [record for record_list in record_lists for record in record_list]
+    return compute_statistics(records_to_columns(records))
+
+
+async def async_setup_services(hass: HomeAssistant) -> None:
+    """Register integration services."""
+
+    async def async_handle_get_statistics(call: ServiceCall) -> ServiceResponse:
+        """Return distribution statistics over print history."""
+        entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+        coordinators = _get_coordinators(hass, entry_id)
+
+        # Results are cached until a print is appended to any included history
+        cache: dict = hass.data.setdefault(DATA_STATISTICS_CACHE, {})
+        cache_key = entry_id or "fleet"
+        versions = tuple(coordinator.history.version for coordinator in coordinators)
+        cached = cache.get(cache_key)
+        if cached and cached[0] == versions:
+            return {**cached[1], "excluded_farm_entries": _farm_entry_ids(hass, entry_id)}
+
+        # Shallow copies taken on the loop, so appends cannot race the executor
+        record_lists = [list(coordinator.history.records) for coordinator in coordinators]
+        result = await hass.async_add_executor_job(_statistics_job, record_lists)
+        result["config_entry_ids"] = [coordinator.entry_id for coordinator in coordinators]
+        cache[cache_key] = (versions, result)
+        # Farm entries come and go without touching the cached histories
+        return {**result, "excluded_farm_entries": _farm_entry_ids(hass, entry_id)}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_STATISTICS,
+        async_handle_get_statistics,
+        schema=STATISTICS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_handle_get_file_costs(call: ServiceCall) -> ServiceResponse:
+        """Return print count and cost per file name, most expensive first."""
+        coordinators = _get_coordinators(hass, call.data.get(ATTR_CONFIG_ENTRY_ID))
+        return {"files": _file_costs(coordinators, call.data.get(ATTR_FILE_NAME))}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_FILE_COSTS,
+        async_handle_get_file_costs,
+        schema=FILE_COSTS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_handle_find_cheapest_start(call: ServiceCall) -> ServiceResponse:
+        """Return the cheapest start time for a print on the price forecast."""
+        coordinator = _get_coordinators(hass, call.data[ATTR_CONFIG_ENTRY_ID])[0]
+        duration = call.data.get(ATTR_DURATION)
+        horizon = call.data.get(ATTR_HORIZON)
+        power = call.data.get(ATTR_POWER)
+        plan = coordinator.plan_cheapest_start(
+            duration=duration.total_seconds() if duration else None,
+            power=power / 1000.0 if power is not None else None,
+            start_energy=call.data.get(ATTR_START_ENERGY),
+            price_entity=call.data.get(ATTR_PRICE_ENTITY),
+            horizon=horizon.total_seconds() if horizon else None,
+        )
+        if plan is None:
+            raise ServiceValidationError(
+                "No start found: the price entity has no forecast covering the job, "
+                "or there are not enough past prints to learn its duration and power"
+            )
+        return {
+            "start": dt_util.utc_from_timestamp(plan["start"]).isoformat(),
+            "end": dt_util.utc_from_timestamp(plan["end"]).isoformat(),
+            "energy": round(plan["energy"], 3),
+            "cost": round(plan["cost"], 4),
+            "cost_now": round(plan["cost_now"], 4),
+            "savings": round(plan["savings"], 4),
+            "average_price": round(plan["average_price"], 4),
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_FIND_CHEAPEST_START,
+        async_handle_find_cheapest_start,
+        schema=CHEAPEST_START_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    spool_registry: SpoolRegistry = hass.data[DATA_SPOOL_REGISTRY]
+
+    async def async_handle_add_spool(call: ServiceCall) -> ServiceResponse:
+        """Add a spool to the shared inventory."""
+        spool = spool_registry.async_add_spool(
+            call.data[ATTR_SPOOL_NAME],
+            call.data[ATTR_SPOOL_MATERIAL],
+            call.data[ATTR_SPOOL_PRICE],
+            call.data[ATTR_SPOOL_LENGTH],
+            call.data.get(ATTR_SPOOL_REMAINING),
+            call.data[ATTR_SPOOL_LOW_REMAINING],
+        )
+        return spool.as_dict()
+
+    async def async_handle_update_spool(call: ServiceCall) -> ServiceResponse:
+        """Edit a spool, e.g. its price or the remaining length after weighing it."""
+        changes = {key: value for key, value in call.data.items() if key != ATTR_SPOOL_ID}
+        spool = spool_registry.async_update_spool(call.data[ATTR_SPOOL_ID], **changes)
+        return spool.as_dict()
+
+    async def async_handle_remove_spool(call: ServiceCall) -> None:
+        """Remove a spool from the inventory."""
+        spool_registry.async_remove_spool(call.data[ATTR_SPOOL_ID])
+
+    async def async_handle_list_spools(call: ServiceCall) -> ServiceResponse:
+        """Return all spools and the printers they are loaded in."""
+        coordinators = _get_coordinators(hass, None)
+        return {
+            "spools": [
+                {
+                    **spool.as_dict(),
+                    "cost_per_meter": round(spool.cost_per_meter, 4),
+                    "active_on": [
+                        coordinator.entry_id
+                        for coordinator in coordinators
+                        if coordinator.active_spool_id == spool.spool_id
+                    ],
+                }
+                for spool in spool_registry.spools.values()
+            ]
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_ADD_SPOOL,
+        async_handle_add_spool,
+        schema=ADD_SPOOL_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_UPDATE_SPOOL,
+        async_handle_update_spool,
+        schema=UPDATE_SPOOL_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REMOVE_SPOOL,
+        async_handle_remove_spool,
+        schema=REMOVE_SPOOL_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_LIST_SPOOLS,
+        async_handle_list_spools,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_handle_reprice(call: ServiceCall) -> ServiceResponse:
+        """Recompute past print costs under a corrected tariff or spool price."""
+        coordinators = _get_coordinators(hass, call.data.get(ATTR_CONFIG_ENTRY_ID))
+        slots = parse_price_forecast({"prices": call.data.get(ATTR_TARIFF, [])})
+        if call.data.get(ATTR_TARIFF) and not slots:
+            raise ServiceValidationError("The tariff has no valid slots, each needs a start and a price")
+        cost_per_meter = call.data.get(ATTR_MATERIAL_COST_PER_METER)
+        spool_id = call.data.get(ATTR_SPOOL_ID)
+        if spool_id is not None and cost_per_meter is None:
+            # Reprice with the spool's corrected price and length
+            spool = spool_registry.spools.get(spool_id)
+            if spool is None:
+                raise ServiceValidationError(f"No spool with id {spool_id}")
+            cost_per_meter = spool.cost_per_meter
+        start = call.data.get(ATTR_PERIOD_START)
+        end = call.data.get(ATTR_PERIOD_END)
+        dry_run = call.data[ATTR_DRY_RUN]
+
+        printers = [
+            await coordinator.async_reprice(
+                dt_util.as_timestamp(start) if start else None,
+                dt_util.as_timestamp(end) if end else None,
+                call.data.get(ATTR_ENERGY_PRICE),
+                slots,
+                cost_per_meter,
+                spool_id,
+                dry_run,
+            )
+            for coordinator in coordinators
+        ]
+        return {
+            "printers": printers,
+            "repriced": sum(printer["repriced"] for printer in printers),
+            "delta": {
+                key: round(sum(printer["delta"][key] for printer in printers), 4)
+                for key in ("energy_cost", "material_cost", "total_cost")
+            },
+            "dry_run": dry_run,
+            "excluded_farm_entries": _farm_entry_ids(hass, call.data.get(ATTR_CONFIG_ENTRY_ID)),
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REPRICE,
+        async_handle_reprice,
+        schema=REPRICE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def async_handle_estimate_print(call: ServiceCall) -> ServiceResponse:
+        """Estimate the filament, time, energy and cost of a sliced file before printing it."""
+        coordinator = _get_coordinators(hass, call.data[ATTR_CONFIG_ENTRY_ID])[0]
+        path = call.data[ATTR_FILE_PATH]
+        if not path.lower().endswith(EXTENSIONS):
+            raise ServiceValidationError(f"Unsupported file type, expected one of {', '.join(EXTENSIONS)}")
+        if not hass.config.is_allowed_path(path):
+            raise ServiceValidationError(f"{path} is not in allowlist_external_dirs")
+        cost_per_meter = None
+        spool_id = call.data.get(ATTR_SPOOL_ID)
+        if spool_id is not None:
+            spool = spool_registry.spools.get(spool_id)
+            if spool is None:
+                raise ServiceValidationError(f"No spool with id {spool_id}")
+            cost_per_meter = spool.cost_per_meter
+
+        # Shared by all printers, a file's content is parsed once
+        cache: PrintFileCache = hass.data.setdefault(DATA_PRINT_FILE_CACHE, PrintFileCache())
+        try:
+            parsed = await hass.async_add_executor_job(cache.get, path)
+        except PrintFileError as err:
+            raise ServiceValidationError(str(err)) from err
+
+        return {
+            **coordinator.estimate_print(parsed["filament"], parsed["print_time"], cost_per_meter),
+            "filament_source": parsed["filament_source"],
+            "print_time_source": parsed["print_time_source"],
+            "member": parsed["member"],
+            "sha256": parsed["sha256"],
+            "cached": parsed["cached"],
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_ESTIMATE_PRINT,
+        async_handle_estimate_print,
+        schema=ESTIMATE_PRINT_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
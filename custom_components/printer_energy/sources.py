@@ -0,0 +1,90 @@
+"""Additional energy sources of a printer (enclosure heater, dryer, exhaust fan)."""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Iterable, Mapping
+
+
+class SessionSources:
+    """Per-source baselines and a running sum of a session's additional energy.
+
+    Each source keeps the reading it had when the session started. A new
+    reading only changes that source's delta, and the session total moves by
+    the change, so a tick costs O(1) whatever the number of sources. A
+    reading below the previous one (meter reset) moves the baseline, keeping
+    what was counted so far. A source unavailable at the start counts from
+    its first reading.
+    """
+
+    __slots__ = ("baselines", "last", "deltas", "total")
+
+    def __init__(self) -> None:
+        """Initialize with no session."""
+        self.baselines: dict[str, float] = {}
+        self.last: dict[str, float] = {}
+        self.deltas: dict[str, float] = {}
+        self.total = 0.0
+
+    def start(self, readings: Mapping[str, float | None]) -> None:
+        """Open a session at the given readings (None for unavailable sources)."""
+        self.baselines = {entity_id: value for entity_id, value in readings.items() if value is not None}
+        self.last = dict(self.baselines)
+        self.deltas = {entity_id: 0.0 for entity_id in readings}
+        self.total = 0.0
+
+    def update(self, entity_id: str, reading: float | None) -> None:
+        """Apply a new reading of one source."""
+        if reading is None or entity_id not in self.deltas:
+            return
+        baseline = self.baselines.get(entity_id)
+        if baseline is None:
+            self.baselines[entity_id] = reading
+            self.last[entity_id] = reading
+            return
+        if reading < self.last[entity_id]:
+            baseline = self.baselines[entity_id] = reading - self.deltas[entity_id]
+        self.last[entity_id] = reading
+        delta = reading - baseline
+        self.total += delta - self.deltas[entity_id]
+        self.deltas[entity_id] = delta
+
+    def rewind(self, readings: Mapping[str, float]) -> None:
+        """Set the sources back to earlier readings, e.g. at a print end found in the recorder."""
+        for entity_id, reading in readings.items():
+            baseline = self.baselines.get(entity_id)
+            if baseline is None or entity_id not in self.deltas:
+                continue
+            self.last[entity_id] = reading
+            self.deltas[entity_id] = max(reading - baseline, 0.0)
+        self.total = self.session_total()
+
+    def session_total(self) -> float:
+        """Return the exact sum of the deltas, for closing a session."""
+        return math.fsum(self.deltas.values())
+
+    def breakdown(self) -> dict[str, float]:
+        """Return the energy of each source so far, in kWh."""
+        return {entity_id: round(delta, 4) for entity_id, delta in self.deltas.items()}
+
+    def clear(self) -> None:
+        """Forget the session."""
+        self.baselines = {}
+        self.last = {}
+        self.deltas = {}
+        self.total = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the session baselines for storage."""
+        return {"baselines": self.baselines, "last": self.last, "deltas": self.deltas}
+
+    def restore(self, data: Mapping[str, Any], entity_ids: Iterable[str]) -> None:
+        """Restore a stored session; sources added since count from their first reading."""
+        entity_ids = list(entity_ids)
+        baselines = data.get("baselines", {})
+        last = data.get("last", {})
+        deltas = data.get("deltas", {})
+        self.baselines = {entity_id: baselines[entity_id] for entity_id in entity_ids if entity_id in baselines}
+        self.last = {entity_id: last.get(entity_id, baselines[entity_id]) for entity_id in self.baselines}
+        self.deltas = {entity_id: deltas.get(entity_id, 0.0) for entity_id in entity_ids}
+        self.total = self.session_total()
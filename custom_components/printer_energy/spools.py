@@ -0,0 +1,216 @@
+"""Spool inventory shared by all printers."""
+
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers.storage import Store
+from homeassistant.util import slugify
+
+from .const import (
+    DEFAULT_SPOOL_LOW_REMAINING,
+    SPOOL_SAVE_DELAY,
+    SPOOL_STORAGE_KEY,
+    SPOOL_NONE_OPTION,
+    SPOOL_STORAGE_VERSION,
+)
+
+
+class Spool:
+    """A filament spool with its price and remaining length (meters)."""
+
+    __slots__ = (
+        "spool_id",
+        "name",
+        "material",
+        "price",
+        "length",
+        "remaining",
+        "low_remaining",
+        "cost_per_meter",
+    )
+
+    def __init__(
+        self,
+        spool_id: str,
+        name: str,
+        material: str,
+        price: float,
+        length: float,
+        remaining: float | None = None,
+        low_remaining: float = DEFAULT_SPOOL_LOW_REMAINING,
+    ) -> None:
+        """Initialize the spool."""
+        self.spool_id = spool_id
+        self.name = name
+        self.material = material
+        self.price = price
+        self.length = length
+        self.remaining = length if remaining is None else remaining
+        self.low_remaining = low_remaining
+        self.cost_per_meter = 0.0
+        self.update_cost()
+
+    @property
+    def is_low(self) -> bool:
+        """Return True when the spool is running out."""
+        return self.remaining <= self.low_remaining
+
+    def update_cost(self) -> None:
+        """Recalculate the cached cost per meter after price or length change."""
+        self.cost_per_meter = self.price / self.length if self.length > 0 else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the spool as a dict for storage and service responses."""
+        return {
+            "id": self.spool_id,
+            "name": self.name,
+            "material": self.material,
+            "price": self.price,
+            "length": self.length,
+            "remaining": round(self.remaining, 3),
+            "low_remaining": self.low_remaining,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Spool:
+        """Restore a spool from storage."""
+        return cls(
+            data["id"],
+            data.get("name", data["id"]),
+            data.get("material", ""),
+            float(data.get("price", 0.0)),
+            float(data.get("length", 0.0)),
+            data.get("remaining"),
+            float(data.get("low_remaining", DEFAULT_SPOOL_LOW_REMAINING)),
+        )
+
+
+class SpoolRegistry:
+    """Registry of spools, persisted in one store and shared across printers.
+
+    Spools are kept in a dict keyed by id, so looking up the active spool and
+    deducting a print's material are O(1). Listeners (one per printer) are
+    notified when spools change so entities can update.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the registry."""
+        self.hass = hass
+        self.store = Store(hass, SPOOL_STORAGE_VERSION, SPOOL_STORAGE_KEY)
+        self.spools: dict[str, Spool] = {}
+        self._listeners: list[Callable[[], None]] = []
+
+    async def load(self) -> None:
+        """Load spools from storage."""
+        data = await self.store.async_load()
+        if data:
+            self.spools = {
+                spool.spool_id: spool
+                for spool in (Spool.from_dict(item) for item in data.get("spools", []))
+            }
+
+    def get(self, spool_id: str | None) -> Spool | None:
+        """Return a spool by id."""
+        if spool_id is None:
+            return None
+        return self.spools.get(spool_id)
+
+    def find_by_name(self, name: str) -> Spool | None:
+        """Return a spool by its display name."""
+        for spool in self.spools.values():
+            if spool.name == name:
+                return spool
+        return None
+
+    @callback
+    def async_add_spool(
+        self,
+        name: str,
+        material: str,
+        price: float,
+        length: float,
+        remaining: float | None = None,
+        low_remaining: float = DEFAULT_SPOOL_LOW_REMAINING,
+    ) -> Spool:
+        """Add a spool; names must be unique so they can be used as select options."""
+        self._check_name(name)
+        base_id = slugify(name) or "spool"
+        spool_id = base_id
+        suffix = 2
+        while spool_id in self.spools:
+            spool_id = f"{base_id}_{suffix}"
+            suffix += 1
+        spool = Spool(spool_id, name, material, price, length, remaining, low_remaining)
+        self.spools[spool_id] = spool
+        self._async_changed()
+        return spool
+
+    @callback
+    def async_update_spool(self, spool_id: str, **changes: Any) -> Spool:
+        """Update spool fields (name, material, price, length, remaining, low_remaining)."""
+        spool = self._require(spool_id)
+        name = changes.get("name")
+        if name is not None and name != spool.name:
+            self._check_name(name)
+        for key, value in changes.items():
+            if value is not None:
+                setattr(spool, key, value)
+        spool.update_cost()
+        self._async_changed()
+        return spool
+
+    @callback
+    def async_remove_spool(self, spool_id: str) -> None:
+        """Remove a spool."""
+        self._require(spool_id)
+        del self.spools[spool_id]
+        self._async_changed()
+
+    @callback
+    def async_deduct(self, spool_id: str | None, meters: float) -> float | None:
+        """Deduct used material from a spool and return the material cost."""
+        spool = self.get(spool_id)
+        if spool is None:
+            return None
+        spool.remaining = max(spool.remaining - meters, 0.0)
+        self._async_changed()
+        return meters * spool.cost_per_meter
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """Listen for spool changes."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    def _check_name(self, name: str) -> None:
+        """Raise a validation error if a name cannot be a select option of its own."""
+        if name == SPOOL_NONE_OPTION:
+            raise ServiceValidationError(f"{name} is reserved for printers without a spool")
+        if self.find_by_name(name) is not None:
+            raise ServiceValidationError(f"A spool named {name} already exists")
+
+    def _require(self, spool_id: str) -> Spool:
+        """Return a spool or raise a validation error."""
+        spool = self.spools.get(spool_id)
+        if spool is None:
+            raise ServiceValidationError(f"No spool with id {spool_id}")
+        return spool
+
+    @callback
+    def _async_changed(self) -> None:
+        """Schedule a save and notify listeners."""
+        self.store.async_delay_save(self._data_to_save, SPOOL_SAVE_DELAY)
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return data to persist."""
+        return {"spools": [spool.as_dict() for spool in self.spools.values()]}
@@ -0,0 +1,172 @@
+"""Debounced printing-state machine for flapping printers."""
+
+from __future__ import annotations
+
+import logging
+from typing import Iterable
+
+_LOGGER = logging.getLogger(__name__)
+
+# Classification of a raw printing sensor state
+CLASS_PRINTING = "printing"
+CLASS_PAUSED = "paused"
+CLASS_IDLE = "idle"
+CLASS_UNAVAILABLE = "unavailable"
+
+# Machine states
+MACHINE_IDLE = "idle"
+MACHINE_STARTING = "starting"
+MACHINE_PRINTING = "printing"
+MACHINE_PAUSED = "paused"
+MACHINE_STOPPING = "stopping"
+
+# States in which a session is open
+SESSION_STATES = (MACHINE_PRINTING, MACHINE_PAUSED, MACHINE_STOPPING)
+
+
+class PrintingStateMachine:
+    """Turn raw printing sensor states into debounced session start/stop.
+
+    A session only starts once the printer has reported printing for
+    ``start_dwell`` seconds, and only stops once it has been idle for
+    ``stop_dwell`` seconds or unavailable for ``unavailable_grace`` seconds.
+    Paused states keep the session open. Every transition is logged and
+    counted, including starts and stops that were suppressed by debouncing.
+    """
+
+    __slots__ = (
+        "state",
+        "start_dwell",
+        "stop_dwell",
+        "unavailable_grace",
+        "transitions",
+        "suppressed_starts",
+        "suppressed_stops",
+        "_pending_since",
+        "_stop_reason",
+    )
+
+    def __init__(self, start_dwell: float, stop_dwell: float, unavailable_grace: float) -> None:
+        """Initialize the state machine."""
+        self.state = MACHINE_IDLE
+        self.start_dwell = start_dwell
+        self.stop_dwell = stop_dwell
+        self.unavailable_grace = unavailable_grace
+        self.transitions: dict[str, int] = {}
+        self.suppressed_starts = 0
+        self.suppressed_stops = 0
+        self._pending_since: float | None = None
+        self._stop_reason = CLASS_IDLE
+
+    @property
+    def session_open(self) -> bool:
+        """Return True while a print session should be open."""
+        return self.state in SESSION_STATES
+
+    @property
+    def pending_since(self) -> float | None:
+        """Return when the pending start or stop was first seen."""
+        return self._pending_since
+
+    def next_deadline(self) -> float | None:
+        """Return when a pending transition becomes due, if any."""
+        if self._pending_since is None:
+            return None
+        if self.state == MACHINE_STARTING:
+            return self._pending_since + self.start_dwell
+        if self.state == MACHINE_STOPPING:
+            if self._stop_reason == CLASS_UNAVAILABLE:
+                return self._pending_since + self.unavailable_grace
+            return self._pending_since + self.stop_dwell
+        return None
+
+    def update(self, classification: str, timestamp: float) -> bool:
+        """Feed a classified printing state and return whether a session is open."""
+        state = self.state
+
+        if state == MACHINE_IDLE:
+            if classification == CLASS_PRINTING:
+                self._set_state(MACHINE_STARTING, timestamp)
+                self._pending_since = timestamp
+
+        elif state == MACHINE_STARTING:
+            if classification not in (CLASS_PRINTING, CLASS_PAUSED):
+                self.suppressed_starts += 1
+                self._set_state(MACHINE_IDLE, timestamp)
+                self._pending_since = None
+
+        elif state in (MACHINE_PRINTING, MACHINE_PAUSED):
+            if classification == CLASS_PAUSED:
+                self._set_state(MACHINE_PAUSED, timestamp)
+            elif classification == CLASS_PRINTING:
+                self._set_state(MACHINE_PRINTING, timestamp)
+            else:
+                self._stop_reason = classification
+                self._pending_since = timestamp
+                self._set_state(MACHINE_STOPPING, timestamp)
+
+        elif state == MACHINE_STOPPING:
+            if classification in (CLASS_PRINTING, CLASS_PAUSED):
+                self.suppressed_stops += 1
+                self._pending_since = None
+                self._set_state(
+                    MACHINE_PRINTING if classification == CLASS_PRINTING else MACHINE_PAUSED,
+                    timestamp,
+                )
+            elif classification == CLASS_IDLE and self._stop_reason == CLASS_UNAVAILABLE:
+                # Came back idle after a dropout - the print ended, apply the idle dwell
+                self._stop_reason = CLASS_IDLE
+
+        # Pending transitions whose dwell time has passed
+        deadline = self.next_deadline()
+        if deadline is not None and timestamp >= deadline:
+            if self.state == MACHINE_STARTING:
+                self._set_state(MACHINE_PRINTING, timestamp)
+            else:
+                self._set_state(MACHINE_IDLE, timestamp)
+            self._pending_since = None
+
+        return self.session_open
+
+    def resume(self, timestamp: float) -> None:
+        """Reopen a session that was running before a restart."""
+        self._pending_since = None
+        self._set_state(MACHINE_PRINTING, timestamp)
+
+    def counters(self) -> dict[str, object]:
+        """Return transition counters."""
+        return {
+            "transitions": dict(self.transitions),
+            "suppressed_starts": self.suppressed_starts,
+            "suppressed_stops": self.suppressed_stops,
+        }
+
+    def _set_state(self, new_state: str, timestamp: float) -> None:
+        """Switch state, logging and counting the transition."""
+        if new_state == self.state:
+            return
+        key = f"{self.state}->{new_state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        _LOGGER.debug("Printing state %s at %.0f", key, timestamp)
+        self.state = new_state
+
+
+def find_session_end(
+    history: Iterable[tuple[float, str]], gap_start: float, stop_dwell: float
+) -> float | None:
+    """Return when a session ended in recorded (timestamp, classification) history.
+
+    The first idle state that outlasts the stop dwell ends the session; it
+    is clamped to ``gap_start``. Returns None when the session is still
+    open at the end of the history.
+    """
+    end: float | None = None
+    for timestamp, classification in history:
+        if classification in (CLASS_PRINTING, CLASS_PAUSED):
+            if end is not None:
+                if timestamp - end >= stop_dwell:
+                    break
+                end = None
+        elif classification == CLASS_IDLE and end is None:
+            end = max(timestamp, gap_start)
+    return end
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from typing import Callable
+
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.storage import Store
 
@@ -30,18 +32,22 @@ class PrinterEnergyStorage:
                 "last_print_end": None,
                 "total_material": 0.0,
                 "last_print_material": 0.0,
+                "last_print_integrated_energy": 0.0,
                 "total_energy_cost": 0.0,
                 "total_material_cost": 0.0,
                 "total_cost": 0.0,
                 "last_print_energy_cost": 0.0,
                 "last_print_material_cost": 0.0,
                 "last_print_total_cost": 0.0,
+                "active_spool": None,
             }
         # Ensure material fields exist for backward compatibility
         if "total_material" not in data:
             data["total_material"] = 0.0
         if "last_print_material" not in data:
             data["last_print_material"] = 0.0
+        if "last_print_integrated_energy" not in data:
+            data["last_print_integrated_energy"] = 0.0
         # Ensure cost fields exist for backward compatibility
         if "total_energy_cost" not in data:
             data["total_energy_cost"] = 0.0
@@ -60,3 +66,7 @@ class PrinterEnergyStorage:
     async def save(self, data: dict) -> None:
         """Save data to storage."""
         await self.store.async_save(data)
+
+    def delay_save(self, data_func: Callable[[], dict], delay: float) -> None:
+        """Save the data returned by data_func after a delay."""
+        self.store.async_delay_save(data_func, delay)
@@ -0,0 +1,484 @@
+"""Session and cost tracking for one printer, without Home Assistant.
+
+Farm mode keeps one tracker per printer inside a single coordinator. The
+tracker follows the same start, stop and cost rules as
+``PrinterEnergyCoordinator``: sessions are debounced by the printing state
+machine, a print only counts when it used energy, and material (mm) is
+priced per meter. Energy and material readings go through the same counter
+filter, so a plug reboot or spool change does not lose the print.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Mapping
+
+from .const import (
+    CONF_ENERGY_SENSOR,
+    CONF_MATERIAL_SENSOR,
+    CONF_NAMEPLATE_POWER,
+    CONF_PAUSE_RULE,
+    CONF_PAUSE_STATE,
+    CONF_POWER_SENSOR,
+    CONF_PRINTER_ID,
+    CONF_PRINTERS,
+    CONF_PRINTING_RULE,
+    CONF_PRINTING_SENSOR,
+    CONF_PRINTING_STATE,
+    CONF_START_DWELL,
+    CONF_STOP_DWELL,
+    CONF_UNAVAILABLE_GRACE,
+    DEFAULT_PAUSE_STATE,
+    DEFAULT_PRINTING_STATE,
+    DEFAULT_START_DWELL,
+    DEFAULT_STOP_DWELL,
+    DEFAULT_UNAVAILABLE_GRACE,
+    ENERGY_ATTRIBUTE,
+)
+from .counters import CounterFilter
+from .rules import Predicate, compile_rule
+from .state_machine import (
+    CLASS_IDLE,
+    CLASS_PAUSED,
+    CLASS_PRINTING,
+    CLASS_UNAVAILABLE,
+    MACHINE_IDLE,
+    MACHINE_STARTING,
+    MACHINE_STOPPING,
+    PrintingStateMachine,
+)
+
+# Raw states that mean the source entity has no reading
+UNAVAILABLE_STATES = ("unavailable", "unknown")
+
+
+def parse_energy(state: str | None, attributes: Mapping[str, Any] | None = None) -> float | None:
+    """Return an energy reading in kWh from a raw state, or None if unavailable."""
+    if state is None or state in UNAVAILABLE_STATES:
+        return None
+    # Always prefer the "total_increased" attribute, like the coordinator does
+    if attributes and ENERGY_ATTRIBUTE in attributes:
+        try:
+            return float(attributes[ENERGY_ATTRIBUTE])
+        except (ValueError, TypeError):
+            pass
+    try:
+        return float(state)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def parse_material(state: str | None) -> float | None:
+    """Return a material reading in mm from a raw state, or None if unavailable."""
+    if state is None or state in UNAVAILABLE_STATES:
+        return None
+    try:
+        return float(state)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def parse_power(state: str | None, attributes: Mapping[str, Any] | None = None) -> float | None:
+    """Return a power reading in W from a raw state, or None if unavailable."""
+    if state is None or state in UNAVAILABLE_STATES:
+        return None
+    try:
+        power = float(state)
+    except (ValueError, TypeError):
+        return None
+    if attributes and attributes.get("unit_of_measurement") == "kW":
+        power *= 1000.0
+    return power
+
+
+def parse_states(value: Any, default: str = "") -> tuple[str, ...]:
+    """Split a comma-separated state list into lower-cased states."""
+    if value is None:
+        value = default
+    return tuple(state.strip().lower() for state in str(value).split(",") if state.strip())
+
+
+class PrinterTracker:
+    """Compact session, total and last-print state of one printer.
+
+    Readings are pushed in as they change (``energy``, ``material``,
+    ``power`` and the classified printing state), so a step never looks up
+    other entities. ``step`` advances the state machine and returns the
+    finished print record when a session closes. Behind a shared meter,
+    ``energy`` is the printer's attributed share of the meter.
+    """
+
+    __slots__ = (
+        "printer_id",
+        "name",
+        "printing_sensor",
+        "energy_sensor",
+        "material_sensor",
+        "power_sensor",
+        "nameplate_power",
+        "printing_states",
+        "pause_states",
+        "printing_rule",
+        "pause_rule",
+        "machine",
+        "classification",
+        "energy",
+        "material",
+        "power",
+        "energy_filter",
+        "material_filter",
+        "is_printing",
+        "session_start",
+        "session_start_energy",
+        "session_start_material",
+        "session_energy",
+        "session_material",
+        "session_energy_cost",
+        "session_material_cost",
+        "print_count",
+        "total_energy",
+        "total_material",
+        "total_energy_cost",
+        "total_material_cost",
+        "total_cost",
+        "last_print_start",
+        "last_print_end",
+        "last_print_energy",
+        "last_print_material",
+        "last_print_energy_cost",
+        "last_print_material_cost",
+        "last_print_total_cost",
+        "_start_candidate",
+        "_stop_candidate",
+    )
+
+    def __init__(
+        self,
+        printer_id: str,
+        name: str,
+        printing_sensor: str,
+        energy_sensor: str | None,
+        material_sensor: str | None,
+        printing_states: tuple[str, ...],
+        pause_states: tuple[str, ...],
+        machine: PrintingStateMachine,
+        power_sensor: str | None = None,
+        nameplate_power: float | None = None,
+        printing_rule: Predicate | None = None,
+        pause_rule: Predicate | None = None,
+    ) -> None:
+        """Initialize the tracker."""
+        self.printer_id = printer_id
+        self.name = name
+        self.printing_sensor = printing_sensor
+        self.energy_sensor = energy_sensor
+        self.material_sensor = material_sensor
+        # Only used to split a shared meter (W)
+        self.power_sensor = power_sensor
+        self.nameplate_power = nameplate_power
+        self.printing_states = printing_states or ("on",)
+        self.pause_states = tuple(state for state in pause_states if state not in self.printing_states)
+        # Compiled rules over state and attributes replace the state lists when set
+        self.printing_rule = printing_rule
+        self.pause_rule = pause_rule
+        self.machine = machine
+        self.classification = CLASS_UNAVAILABLE
+        self.energy: float | None = None
+        self.material: float | None = None
+        self.power: float | None = None
+        # Reset, rollover and glitch filters of the cumulative counters
+        self.energy_filter = CounterFilter(energy_sensor) if energy_sensor else None
+        self.material_filter = CounterFilter(material_sensor) if material_sensor else None
+        self.is_printing = False
+        self.session_start: float | None = None
+        self.session_start_energy: float | None = None
+        self.session_start_material: float | None = None
+        self.session_energy = 0.0
+        self.session_material = 0.0
+        self.session_energy_cost = 0.0
+        self.session_material_cost = 0.0
+        self.print_count = 0
+        self.total_energy = 0.0
+        self.total_material = 0.0
+        self.total_energy_cost = 0.0
+        self.total_material_cost = 0.0
+        self.total_cost = 0.0
+        self.last_print_start: float | None = None
+        self.last_print_end: float | None = None
+        self.last_print_energy = 0.0
+        self.last_print_material = 0.0
+        self.last_print_energy_cost = 0.0
+        self.last_print_material_cost = 0.0
+        self.last_print_total_cost = 0.0
+        self._start_candidate: tuple[float, float | None, float] | None = None
+        self._stop_candidate: tuple[float, float | None, float] | None = None
+
+    @property
+    def session_total_cost(self) -> float:
+        """Return the running session's total cost."""
+        return self.session_energy_cost + self.session_material_cost
+
+    def classify(self, state: str | None, attributes: Mapping[str, Any] | None = None) -> str:
+        """Classify and remember a raw printing sensor state."""
+        if state is None or state in UNAVAILABLE_STATES:
+            self.classification = CLASS_UNAVAILABLE
+            return self.classification
+        value = state.lower()
+        attributes = attributes or {}
+        if self.printing_rule is not None:
+            printing = self.printing_rule(state, attributes)
+        else:
+            printing = value in self.printing_states
+        if printing:
+            self.classification = CLASS_PRINTING
+        elif (
+            self.pause_rule(state, attributes)
+            if self.pause_rule is not None
+            else value in self.pause_states
+        ):
+            self.classification = CLASS_PAUSED
+        else:
+            self.classification = CLASS_IDLE
+        return self.classification
+
+    def read_energy(self, value: float | None, timestamp: float) -> None:
+        """Store an energy reading, with resets carried over and glitches dropped."""
+        self.energy = _filtered(self.energy_filter, value, timestamp)
+
+    def read_material(self, value: float | None, timestamp: float) -> None:
+        """Store a material reading, with resets carried over and glitches dropped."""
+        self.material = _filtered(self.material_filter, value, timestamp)
+
+    def step(
+        self, timestamp: float, energy_price: float, cost_per_meter: float
+    ) -> dict[str, Any] | None:
+        """Advance the session with the latest readings.
+
+        Returns the print record when a session with energy use closes.
+        Transitions wait while the energy reading is unavailable.
+        """
+        printing = self.machine.update(self.classification, timestamp)
+
+        # Remember the readings at the first printing state, so the session
+        # includes the start dwell once it is confirmed, and at the first
+        # non-printing state, so it leaves the stop dwell out
+        if self.machine.state == MACHINE_STARTING:
+            if self._start_candidate is None and self.energy is not None:
+                self._start_candidate = (self.energy, self.material, timestamp)
+        elif self.machine.state == MACHINE_STOPPING:
+            if self._stop_candidate is None and self.energy is not None:
+                self._stop_candidate = (self.energy, self.material, timestamp)
+        elif self.machine.state == MACHINE_IDLE:
+            self._start_candidate = None
+        else:
+            # Printing again, the stop was suppressed
+            self._stop_candidate = None
+
+        if self.energy is None:
+            return None
+        if printing and not self.is_printing:
+            candidate = self._start_candidate or (self.energy, self.material, timestamp)
+            self._start_candidate = None
+            start_energy, start_material, start_time = candidate
+            self.start(
+                start_time,
+                start_energy,
+                start_material if start_material is not None else self.material,
+            )
+        elif not printing and self.is_printing:
+            candidate = self._stop_candidate or (self.energy, self.material, timestamp)
+            self._stop_candidate = None
+            end_energy, end_material, end_time = candidate
+            return self.stop(
+                end_time,
+                end_energy,
+                end_material if end_material is not None else self.material,
+                energy_price,
+                cost_per_meter,
+            )
+        elif printing and self._stop_candidate is None:
+            # While the stop is pending the session holds at its first non-printing readings
+            self.update_session(energy_price, cost_per_meter)
+        return None
+
+    def start(self, timestamp: float, energy: float, material: float | None) -> None:
+        """Open a session at the given readings."""
+        self.is_printing = True
+        self._stop_candidate = None
+        self.session_start = timestamp
+        self.session_start_energy = energy
+        self.session_start_material = material
+        self.session_energy = 0.0
+        self.session_material = 0.0
+        self.session_energy_cost = 0.0
+        self.session_material_cost = 0.0
+        self.last_print_start = timestamp
+        for counter in self._filters():
+            counter.begin_session()
+
+    def update_session(self, energy_price: float, cost_per_meter: float) -> None:
+        """Update the running session's energy, material and cost."""
+        if self.session_start_energy is not None and self.energy is not None:
+            self.session_energy = self.energy - self.session_start_energy
+            self.session_energy_cost = self.session_energy * energy_price
+        if self.material is not None and self.session_start_material is not None:
+            self.session_material = self.material - self.session_start_material
+            self.session_material_cost = self.session_material / 1000.0 * cost_per_meter
+        else:
+            self.session_material_cost = 0.0
+
+    def stop(
+        self,
+        timestamp: float,
+        energy: float,
+        material: float | None,
+        energy_price: float,
+        cost_per_meter: float,
+    ) -> dict[str, Any] | None:
+        """Close the session and return its print record, if it used energy."""
+        record = None
+        session_energy = (
+            energy - self.session_start_energy if self.session_start_energy is not None else 0.0
+        )
+        if session_energy > 0:
+            session_material = 0.0
+            if material is not None and self.session_start_material is not None:
+                session_material = max(material - self.session_start_material, 0.0)
+            energy_cost = session_energy * energy_price
+            material_cost = session_material / 1000.0 * cost_per_meter
+
+            self.print_count += 1
+            self.total_energy += session_energy
+            self.total_energy_cost += energy_cost
+            if session_material > 0:
+                self.total_material += session_material
+                self.total_material_cost += material_cost
+                self.last_print_material = session_material
+            self.total_cost += energy_cost + material_cost
+            self.last_print_end = timestamp
+            self.last_print_energy = session_energy
+            self.last_print_energy_cost = energy_cost
+            self.last_print_material_cost = material_cost
+            self.last_print_total_cost = energy_cost + material_cost
+            self.session_energy = session_energy
+            self.session_material = session_material
+            self.session_energy_cost = energy_cost
+            self.session_material_cost = material_cost
+            record = {
+                "start": self.session_start,
+                "end": timestamp,
+                "energy": session_energy,
+                "material": session_material,
+                "energy_cost": energy_cost,
+                "material_cost": material_cost,
+                "total_cost": energy_cost + material_cost,
+            }
+            corrections = sorted(
+                (correction for counter in self._filters() for correction in counter.corrections),
+                key=lambda correction: correction["time"],
+            )
+            if corrections:
+                record["corrections"] = corrections
+
+        self.is_printing = False
+        self.session_start = None
+        self.session_start_energy = None
+        self.session_start_material = None
+        return record
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return totals, last print and the open session for storage."""
+        return {
+            "print_count": self.print_count,
+            "total_energy": self.total_energy,
+            "total_material": self.total_material,
+            "total_energy_cost": self.total_energy_cost,
+            "total_material_cost": self.total_material_cost,
+            "total_cost": self.total_cost,
+            "last_print_start": self.last_print_start,
+            "last_print_end": self.last_print_end,
+            "last_print_energy": self.last_print_energy,
+            "last_print_material": self.last_print_material,
+            "last_print_energy_cost": self.last_print_energy_cost,
+            "last_print_material_cost": self.last_print_material_cost,
+            "last_print_total_cost": self.last_print_total_cost,
+            "open_session": (
+                [
+                    self.session_start,
+                    self.session_start_energy,
+                    self.session_start_material,
+                    # Counter offsets keep the baselines on the same scale as new readings
+                    {counter.entity_id: counter.as_dict() for counter in self._filters()},
+                ]
+                if self.is_printing
+                else None
+            ),
+        }
+
+    def restore(self, data: dict[str, Any], timestamp: float) -> None:
+        """Restore stored state, reopening a session that was running at shutdown."""
+        for key in (
+            "print_count",
+            "total_energy",
+            "total_material",
+            "total_energy_cost",
+            "total_material_cost",
+            "total_cost",
+            "last_print_start",
+            "last_print_end",
+            "last_print_energy",
+            "last_print_material",
+            "last_print_energy_cost",
+            "last_print_material_cost",
+            "last_print_total_cost",
+        ):
+            if key in data:
+                setattr(self, key, data[key])
+        session = data.get("open_session")
+        if session and session[1] is not None:
+            self.start(session[0], session[1], session[2])
+            counters = session[3] if len(session) > 3 else {}
+            for counter in self._filters():
+                if counter.entity_id in counters:
+                    counter.restore(counters[counter.entity_id])
+            self.machine.resume(timestamp)
+
+    def _filters(self) -> list[CounterFilter]:
+        """Return the counter filters in use."""
+        return [counter for counter in (self.energy_filter, self.material_filter) if counter is not None]
+
+
+def _filtered(counter: CounterFilter | None, value: float | None, timestamp: float) -> float | None:
+    """Return a reading passed through a counter filter, if there is one."""
+    if value is None or counter is None:
+        return value
+    return counter.update(value, timestamp)
+
+
+def build_trackers(config: Mapping[str, Any]) -> dict[str, PrinterTracker]:
+    """Create the trackers of a farm config (entry data or a batch config file)."""
+    printing_states = parse_states(config.get(CONF_PRINTING_STATE), DEFAULT_PRINTING_STATE)
+    pause_states = parse_states(config.get(CONF_PAUSE_STATE), DEFAULT_PAUSE_STATE)
+    printing_rule = compile_rule(config.get(CONF_PRINTING_RULE))
+    pause_rule = compile_rule(config.get(CONF_PAUSE_RULE))
+    start_dwell = float(config.get(CONF_START_DWELL, DEFAULT_START_DWELL))
+    stop_dwell = float(config.get(CONF_STOP_DWELL, DEFAULT_STOP_DWELL))
+    unavailable_grace = float(config.get(CONF_UNAVAILABLE_GRACE, DEFAULT_UNAVAILABLE_GRACE))
+
+    trackers: dict[str, PrinterTracker] = {}
+    for printer in config.get(CONF_PRINTERS, []):
+        printer_id = printer.get(CONF_PRINTER_ID) or printer[CONF_PRINTING_SENSOR]
+        trackers[printer_id] = PrinterTracker(
+            printer_id,
+            printer.get("name") or printer_id,
+            printer[CONF_PRINTING_SENSOR],
+            printer.get(CONF_ENERGY_SENSOR) or None,
+            printer.get(CONF_MATERIAL_SENSOR) or None,
+            printing_states,
+            pause_states,
+            PrintingStateMachine(start_dwell, stop_dwell, unavailable_grace),
+            printer.get(CONF_POWER_SENSOR) or None,
+            printer.get(CONF_NAMEPLATE_POWER) or None,
+            printing_rule,
+            pause_rule,
+        )
+    return trackers
@@ -0,0 +1,255 @@
+"""Websocket commands for Printer Energy integration."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from functools import partial
+import time
+from typing import Any, Callable
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_PRINT_INDEX,
+    ATTR_SUBSCRIBE_INTERVAL,
+    CONF_PRINTER_ID,
+    DEFAULT_SUBSCRIBE_INTERVAL,
+    DOMAIN,
+    WS_TYPE_PRINT_CURVE,
+    WS_TYPE_SUBSCRIBE,
+)
+from .coordinator import PrinterEnergyCoordinator
+from .curve import decode_curve
+from .farm import FarmCoordinator
+from .tracker import PrinterTracker
+
+# Decimals kept in pushed values; smaller changes are not sent
+_PUSH_DECIMALS = 4
+
+
+@callback
+def async_setup_websocket_api(hass: HomeAssistant) -> None:
+    """Register websocket commands."""
+    websocket_api.async_register_command(hass, websocket_print_curve)
+    websocket_api.async_register_command(hass, websocket_subscribe)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): WS_TYPE_PRINT_CURVE,
+        vol.Required(ATTR_CONFIG_ENTRY_ID): str,
+        vol.Optional(ATTR_PRINT_INDEX, default=-1): int,
+    }
+)
+@callback
+def websocket_print_curve(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return the power curve of a recorded print (default: the last one)."""
+    coordinator = hass.data.get(DOMAIN, {}).get(msg[ATTR_CONFIG_ENTRY_ID])
+    if not isinstance(coordinator, PrinterEnergyCoordinator):
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Config entry not found")
+        return
+
+    records = coordinator.history.records
+    try:
+        record = records[msg[ATTR_PRINT_INDEX]]
+    except IndexError:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Print not found")
+        return
+
+    curve = record.get("curve")
+    connection.send_result(
+        msg["id"],
+        {
+            "start": record.get("start"),
+            "end": record.get("end"),
+            "energy": record.get("energy"),
+            # [epoch seconds, watts] pairs; empty for prints recorded without a curve
+            "points": decode_curve(curve) if curve else [],
+        },
+    )
+
+
+def _round(value: Any) -> Any:
+    """Round a pushed number so sub-display noise does not produce diffs."""
+    return round(value, _PUSH_DECIMALS) if isinstance(value, float) else value
+
+
+def _coordinator_session(coordinator: PrinterEnergyCoordinator) -> dict[str, Any]:
+    """Return the session values of a single-printer entry."""
+    data = coordinator.data or {}
+    return {
+        "printing": bool(data.get("is_printing")),
+        "energy": _round(data.get("current_session_energy")),
+        "material": _round(data.get("current_session_material")),
+        "cost": _round(data.get("current_session_total_cost")),
+        "phase": data.get("current_phase"),
+        "projected_cost": _round(data.get("projected_total_cost")),
+    }
+
+
+def _tracker_session(tracker: PrinterTracker) -> dict[str, Any]:
+    """Return the session values of a farm printer (farms have no phases or projections)."""
+    printing = tracker.is_printing
+    return {
+        "printing": printing,
+        "energy": _round(tracker.session_energy if printing else 0.0),
+        "material": _round(tracker.session_material if printing else 0.0),
+        "cost": _round(tracker.session_total_cost if printing else 0.0),
+        "phase": None,
+        "projected_cost": None,
+    }
+
+
+class _SessionSubscription:
+    """Push throttled session diffs to one websocket subscriber.
+
+    Coordinator updates only mark a printer as pending. At most one message
+    is sent per interval, built from the values at send time, so a slow
+    client always gets the latest state and nothing piles up for it.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        connection: websocket_api.ActiveConnection,
+        msg_id: int,
+        interval: float,
+        sources: dict[str, Callable[[], dict[str, Any]]],
+    ) -> None:
+        """Initialize the subscription."""
+        self.hass = hass
+        self.connection = connection
+        self.msg_id = msg_id
+        self.interval = interval
+        self.sources = sources
+        self.sent: dict[str, dict[str, Any]] = {}
+        self.pending: set[str] = set()
+        self.last_send = 0.0
+        self.unsub_timer: Callable[[], None] | None = None
+        self.unsub_listeners: list[Callable[[], None]] = []
+
+    @callback
+    def async_send_snapshot(self) -> None:
+        """Send the full state of every subscribed printer."""
+        self.sent = {key: source() for key, source in self.sources.items()}
+        self.last_send = time.monotonic()
+        self.connection.send_message(websocket_api.event_message(self.msg_id, {"full": self.sent}))
+
+    @callback
+    def async_mark(self, key: str) -> None:
+        """Mark a printer as changed and send now or when the interval allows."""
+        self.pending.add(key)
+        if self.unsub_timer is not None:
+            return
+        wait = self.last_send + self.interval - time.monotonic()
+        if wait <= 0:
+            self._async_flush()
+        else:
+            self.unsub_timer = async_call_later(self.hass, wait, self._async_timer_fired)
+
+    @callback
+    def _async_timer_fired(self, _now: datetime) -> None:
+        """Send the changes collected while throttled."""
+        self.unsub_timer = None
+        self._async_flush()
+
+    @callback
+    def _async_flush(self) -> None:
+        """Send the fields that changed since the last message, if any."""
+        diff: dict[str, Any] = {}
+        for key in self.pending:
+            source = self.sources.get(key)
+            if source is None:
+                continue
+            values = source()
+            previous = self.sent.get(key, {})
+            changed = {field: value for field, value in values.items() if previous.get(field) != value}
+            if changed:
+                diff[key] = changed
+                self.sent[key] = values
+        self.pending.clear()
+        if diff:
+            self.last_send = time.monotonic()
+            self.connection.send_message(websocket_api.event_message(self.msg_id, {"diff": diff}))
+
+    @callback
+    def async_unsubscribe(self) -> None:
+        """Remove the coordinator listeners and the pending timer."""
+        for remove_listener in self.unsub_listeners:
+            remove_listener()
+        self.unsub_listeners.clear()
+        if self.unsub_timer is not None:
+            self.unsub_timer()
+            self.unsub_timer = None
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): WS_TYPE_SUBSCRIBE,
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): str,
+        vol.Optional(CONF_PRINTER_ID): str,
+        vol.Optional(ATTR_SUBSCRIBE_INTERVAL, default=DEFAULT_SUBSCRIBE_INTERVAL): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1, max=60)
+        ),
+    }
+)
+@callback
+def websocket_subscribe(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Subscribe to live session values of one printer, one entry or all printers.
+
+    Printers are keyed by config entry id, and farm printers by
+    ``<entry id>/<printer id>``. The first event holds the full state
+    (``full``); later events only the changed fields (``diff``).
+    """
+    entry_filter = msg.get(ATTR_CONFIG_ENTRY_ID)
+    printer_filter = msg.get(CONF_PRINTER_ID)
+    coordinators = {
+        entry_id: coordinator
+        for entry_id, coordinator in hass.data.get(DOMAIN, {}).items()
+        if isinstance(coordinator, (PrinterEnergyCoordinator, FarmCoordinator))
+        and entry_filter in (None, entry_id)
+    }
+    if entry_filter is not None and not coordinators:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Config entry not found")
+        return
+
+    sources: dict[str, Callable[[], dict[str, Any]]] = {}
+    # (coordinator, listener context, source key) of every subscribed printer
+    listens: list[tuple[Any, str | None, str]] = []
+    for entry_id, coordinator in coordinators.items():
+        if isinstance(coordinator, PrinterEnergyCoordinator):
+            if printer_filter is None:
+                sources[entry_id] = partial(_coordinator_session, coordinator)
+                listens.append((coordinator, None, entry_id))
+            continue
+        for printer_id, tracker in coordinator.trackers.items():
+            if printer_filter in (None, printer_id):
+                key = f"{entry_id}/{printer_id}"
+                sources[key] = partial(_tracker_session, tracker)
+                # Farm updates only notify the listeners of the printer that changed
+                listens.append((coordinator, printer_id, key))
+    if printer_filter is not None and not sources:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Printer not found")
+        return
+
+    subscription = _SessionSubscription(hass, connection, msg["id"], msg[ATTR_SUBSCRIBE_INTERVAL], sources)
+    for coordinator, context, key in listens:
+        subscription.unsub_listeners.append(
+            coordinator.async_add_listener(partial(subscription.async_mark, key), context)
+        )
+    connection.subscriptions[msg["id"]] = subscription.async_unsubscribe
+    connection.send_result(msg["id"])
+    subscription.async_send_snapshot()
@@ -0,0 +1 @@
+"""Tests for the Printer Energy integration."""
@@ -0,0 +1,25 @@
+"""Make the integration importable as ``custom_components.printer_energy``.
+
+The package ``__init__`` sets the integration up in Home Assistant. When
+Home Assistant is not installed, the package is registered without running
+it, so the modules that do not import Home Assistant can still be tested.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+import sys
+import types
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+if importlib.util.find_spec("homeassistant") is None:
+    for name, path in (
+        ("custom_components", ROOT / "custom_components"),
+        ("custom_components.printer_energy", ROOT / "custom_components" / "printer_energy"),
+    ):
+        package = types.ModuleType(name)
+        package.__path__ = [str(path)]
+        sys.modules.setdefault(name, package)
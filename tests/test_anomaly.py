@@ -0,0 +1,39 @@
+"""Tests for the running print's anomaly checks."""
+
+from __future__ import annotations
+
+from custom_components.printer_energy.anomaly import AnomalyDetector
+from custom_components.printer_energy.const import (
+    ANOMALY_NO_MATERIAL,
+    ANOMALY_STALL_SECONDS,
+    ANOMALY_WARMUP_SECONDS,
+)
+
+
+def _stalled(detector: AnomalyDetector, start: float, end: float) -> list[str]:
+    """Tick a print whose material counter never moves; return the kinds raised."""
+    kinds = []
+    for timestamp in range(int(start), int(end) + 1, 60):
+        kinds.extend(anomaly["kind"] for anomaly in detector.tick(float(timestamp), 0.0, 100.0, True))
+    return kinds
+
+
+def test_no_material_arms_after_warmup_without_movement() -> None:
+    detector = AnomalyDetector()
+    detector.start(0.0, None)
+
+    # A counter that never moves is not flagged during the warm-up
+    assert _stalled(detector, 0.0, ANOMALY_WARMUP_SECONDS - 60.0) == []
+    kinds = _stalled(detector, ANOMALY_WARMUP_SECONDS, ANOMALY_WARMUP_SECONDS + ANOMALY_STALL_SECONDS)
+    assert kinds == [ANOMALY_NO_MATERIAL]
+
+
+def test_no_material_arms_early_after_movement() -> None:
+    detector = AnomalyDetector()
+    detector.start(0.0, None)
+    detector.tick(0.0, 0.0, 50.0, True)
+    detector.tick(60.0, 0.0, 100.0, True)
+
+    kinds = _stalled(detector, 120.0, 120.0 + ANOMALY_STALL_SECONDS)
+    assert kinds == [ANOMALY_NO_MATERIAL]
+    assert detector.active[ANOMALY_NO_MATERIAL]["time"] < ANOMALY_WARMUP_SECONDS
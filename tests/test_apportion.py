@@ -0,0 +1,64 @@
+"""Tests for splitting a shared energy meter among printers."""
+
+from __future__ import annotations
+
+from custom_components.printer_energy.apportion import SharedMeter
+from custom_components.printer_energy.const import SPLIT_EQUAL
+from custom_components.printer_energy.state_machine import MACHINE_PRINTING, PrintingStateMachine
+from custom_components.printer_energy.tracker import PrinterTracker
+
+
+def _meter(count: int) -> SharedMeter:
+    """Return a shared meter behind count idle printers."""
+    trackers = [
+        PrinterTracker(
+            f"printer_{index}",
+            f"Printer {index}",
+            f"sensor.printer_{index}",
+            "sensor.shared_energy",
+            None,
+            ("printing",),
+            ("paused",),
+            PrintingStateMachine(30.0, 120.0, 300.0),
+        )
+        for index in range(count)
+    ]
+    return SharedMeter("sensor.shared_energy", SPLIT_EQUAL, trackers)
+
+
+def test_unavailable_meter_round_trip() -> None:
+    meter = _meter(3)
+    assert meter.unavailable == 3
+
+    assert len(meter.add_reading(10.0)) == 3
+    assert meter.unavailable == 0
+    assert [tracker.energy for tracker in meter.trackers] == [0.0, 0.0, 0.0]
+
+    assert len(meter.add_reading(None)) == 3
+    assert meter.unavailable == 3
+    assert all(tracker.energy is None for tracker in meter.trackers)
+
+    # Back from unavailable, every printer gets its reading again
+    assert len(meter.add_reading(10.0)) == 3
+    assert meter.unavailable == 0
+    assert all(tracker.energy == 0.0 for tracker in meter.trackers)
+
+
+def test_tick_only_changes_active_printers() -> None:
+    meter = _meter(3)
+    meter.add_reading(10.0)
+    active = meter.trackers[1]
+    active.machine.state = MACHINE_PRINTING
+    meter.update_active(active)
+
+    assert meter.add_reading(10.5) == [active]
+    assert active.energy == 0.5
+    assert meter.trackers[0].energy == 0.0
+
+
+def test_restored_meter_sets_every_reading() -> None:
+    meter = _meter(2)
+    meter.restore({"last": 0, "attributed": {"printer_0": 0, "printer_1": 0}})
+
+    assert len(meter.add_reading(0.0)) == 2
+    assert meter.unavailable == 0
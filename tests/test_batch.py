@@ -0,0 +1,83 @@
+"""Tests for replaying exported history without Home Assistant."""
+
+from __future__ import annotations
+
+import csv
+
+import pytest
+
+from custom_components.printer_energy import batch
+
+CONFIG = {
+    "printers": [
+        {
+            "printer_id": "mk4",
+            "name": "MK4",
+            "printing_sensor": "sensor.mk4_state",
+            "energy_sensor": "sensor.mk4_energy",
+            "material_sensor": "sensor.mk4_filament",
+        },
+        {
+            "printer_id": "mini",
+            "name": "Mini",
+            "printing_sensor": "sensor.mini_state",
+            "energy_sensor": "sensor.mini_energy",
+        },
+    ],
+    "material_cost_per_spool": 330.0,
+    "material_spool_length": 330,
+    "energy_price": 0.3,
+}
+
+# Grouped by entity like a history download, not in time order
+ROWS = [
+    ("sensor.mk4_state", "idle", 0),
+    ("sensor.mk4_state", "printing", 100),
+    ("sensor.mk4_state", "idle", 3600),
+    ("sensor.mk4_energy", "10.0", 0),
+    ("sensor.mk4_energy", "11.0", 1000),
+    ("sensor.mk4_energy", "12.0", 3000),
+    # Cool-down inside the stop dwell is not part of the print
+    ("sensor.mk4_energy", "12.5", 3610),
+    ("sensor.mk4_energy", "12.6", 4000),
+    ("sensor.mk4_filament", "0", 0),
+    ("sensor.mk4_filament", "5000", 3000),
+    ("sensor.mini_state", "idle", 0),
+    ("sensor.mini_state", "printing", 500),
+    ("sensor.mini_energy", "1.0", 0),
+    ("sensor.mini_energy", "1.5", 900),
+]
+
+
+def _history(tmp_path) -> str:
+    """Write the history rows as a CSV download and return its path."""
+    path = tmp_path / "history.csv"
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(("entity_id", "state", "last_changed"))
+        writer.writerows(ROWS)
+    return str(path)
+
+
+def test_replay_matches_session_rules(tmp_path) -> None:
+    records, periods, still_printing = batch.process_history(CONFIG, [_history(tmp_path)], workers=1)
+
+    assert len(records) == 1
+    record = records[0]
+    assert record["printer_id"] == "mk4"
+    assert record["start"] == 100
+    assert record["end"] == 3600
+    assert record["energy"] == pytest.approx(2.0)
+    assert record["material"] == pytest.approx(5000.0)
+    assert record["energy_cost"] == pytest.approx(0.6)
+    assert record["material_cost"] == pytest.approx(5.0)
+    assert [period["count"] for period in periods] == [1]
+    assert still_printing == ["mini"]
+
+
+def test_merged_runs_match_in_memory_sort(tmp_path, monkeypatch) -> None:
+    path = _history(tmp_path)
+    expected = batch.process_history(CONFIG, [path], workers=1)
+
+    monkeypatch.setattr(batch, "SORT_RUN_ROWS", 2)
+    assert batch.process_history(CONFIG, [path], workers=1) == expected
@@ -0,0 +1,101 @@
+"""Tests for the cumulative counter filter."""
+
+from __future__ import annotations
+
+from custom_components.printer_energy.counters import CORRECTION_RESET, CounterFilter
+from custom_components.printer_energy.state_machine import PrintingStateMachine
+from custom_components.printer_energy.tracker import PrinterTracker
+
+
+def _learned(last: float, step: float = 0.005, ticks: int = 10) -> CounterFilter:
+    """Return a filter that saw a counter rise by step every 10 s up to last."""
+    counter = CounterFilter("sensor.plug_energy")
+    for tick in range(ticks + 1):
+        counter.update(last - (ticks - tick) * step, tick * 10.0)
+    return counter
+
+
+def test_reset_above_half_of_the_last_reading() -> None:
+    counter = _learned(1.0)
+    # The plug rebooted during a gap and counted 0.6 kWh since
+    assert counter.update(0.6, 200.0) == 1.0
+    assert counter.update(0.605, 210.0) == 1.605
+    assert [correction["kind"] for correction in counter.corrections] == [CORRECTION_RESET]
+
+
+def test_small_drop_is_jitter() -> None:
+    counter = _learned(1.0)
+    assert counter.update(0.998, 110.0) == 1.0
+    assert counter.update(1.005, 120.0) == 1.005
+    assert counter.corrections == []
+
+
+def test_drop_below_half_before_rates_are_known() -> None:
+    counter = _learned(1.0, ticks=2)
+    assert counter.update(0.6, 30.0) == 1.0
+    assert counter.update(0.605, 40.0) == 1.0
+    assert counter.update(0.1, 50.0) == 1.0
+    assert counter.update(0.105, 60.0) == 1.105
+
+
+def test_tracker_session_survives_reset() -> None:
+    tracker = PrinterTracker(
+        "printer",
+        "Printer",
+        "sensor.printer",
+        "sensor.plug_energy",
+        None,
+        ("printing",),
+        ("paused",),
+        PrintingStateMachine(0.0, 0.0, 300.0),
+    )
+    tracker.read_energy(5.0, 0.0)
+    tracker.classify("printing")
+    tracker.step(0.0, 1.0, 0.0)
+    for tick in range(1, 11):
+        tracker.read_energy(5.0 + tick * 0.01, tick * 10.0)
+        tracker.step(tick * 10.0, 1.0, 0.0)
+
+    # The plug rebooted mid-print and counts from zero again
+    tracker.read_energy(0.0, 110.0)
+    tracker.step(110.0, 1.0, 0.0)
+    tracker.read_energy(0.01, 120.0)
+    tracker.step(120.0, 1.0, 0.0)
+    tracker.classify("idle")
+    record = tracker.step(130.0, 1.0, 0.0)
+
+    assert record is not None
+    assert abs(record["energy"] - 0.11) < 1e-9
+    assert [correction["kind"] for correction in record["corrections"]] == [CORRECTION_RESET]
+
+
+def test_tracker_restores_counter_offset() -> None:
+    tracker = PrinterTracker(
+        "printer",
+        "Printer",
+        "sensor.printer",
+        "sensor.plug_energy",
+        None,
+        ("printing",),
+        ("paused",),
+        PrintingStateMachine(0.0, 0.0, 300.0),
+    )
+    tracker.energy_filter.offset = 5.0
+    tracker.read_energy(0.5, 0.0)
+    tracker.start(0.0, tracker.energy, None)
+    stored = tracker.as_dict()
+
+    restored = PrinterTracker(
+        "printer",
+        "Printer",
+        "sensor.printer",
+        "sensor.plug_energy",
+        None,
+        ("printing",),
+        ("paused",),
+        PrintingStateMachine(0.0, 0.0, 300.0),
+    )
+    restored.restore(stored, 60.0)
+    restored.read_energy(0.7, 60.0)
+    restored.update_session(1.0, 0.0)
+    assert abs(restored.session_energy - 0.2) < 1e-9
@@ -0,0 +1,30 @@
+"""Tests for the Prometheus text exposition."""
+
+from __future__ import annotations
+
+from custom_components.printer_energy.exposition import printer_fragment
+
+
+def _samples(values: dict) -> dict[str, list[str]]:
+    """Return the fragment of one printer labelled printer="p"."""
+    return printer_fragment({"printer": "p"}, values, "EUR")
+
+
+def test_special_values_use_text_format_spelling() -> None:
+    fragment = _samples(
+        {
+            "total_energy": float("inf"),
+            "total_material": float("-inf"),
+            "current_session_energy": float("nan"),
+        }
+    )
+    assert fragment["printer_energy_energy_kwh_total"] == ['printer_energy_energy_kwh_total{printer="p"} +Inf']
+    assert fragment["printer_energy_material_mm_total"] == ['printer_energy_material_mm_total{printer="p"} -Inf']
+    assert fragment["printer_energy_session_energy_kwh"] == ['printer_energy_session_energy_kwh{printer="p"} NaN']
+
+
+def test_numbers_and_missing_values() -> None:
+    fragment = _samples({"print_count": 3, "total_energy": 1.25})
+    assert fragment["printer_energy_prints_total"] == ['printer_energy_prints_total{printer="p"} 3.0']
+    assert fragment["printer_energy_energy_kwh_total"] == ['printer_energy_energy_kwh_total{printer="p"} 1.25']
+    assert "printer_energy_material_mm_total" not in fragment
@@ -0,0 +1,140 @@
+"""Measure the sensor attributes the recorder writes for one print.
+
+Run with ``pytest -s`` to print the figures. The recorder writes a new
+attributes row whenever an entity's recorded attributes change, so the
+bytes of every distinct attributes JSON per entity are counted, from the
+idle state before the print to the idle state after it. Before the
+attribute policy, every attribute was recorded.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+import json
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.printer_energy import sensor  # noqa: E402
+from custom_components.printer_energy.const import (  # noqa: E402
+    ATTRIBUTE_POLICY_FULL,
+    ATTRIBUTE_POLICY_MINIMAL,
+    ATTRIBUTE_POLICY_NONE,
+    DOMAIN,
+)
+
+# One 3 h print with the coordinator refreshing every minute
+PRINT_MINUTES = 180
+
+
+def _data(minute: int | None) -> dict[str, Any]:
+    """Return coordinator data during a print minute, or after the print for None."""
+    data: dict[str, Any] = {
+        "total_energy": 12.3,
+        "print_count": 40,
+        "last_print_energy": 0.5,
+        "last_print_start": datetime(2026, 1, 1, tzinfo=timezone.utc),
+        "last_print_end": datetime(2026, 1, 1, 3, tzinfo=timezone.utc),
+        "total_material": 500000.0,
+        "last_print_material": 12000.0,
+        "total_energy_cost": 120.0,
+        "total_material_cost": 900.0,
+        "total_cost": 1020.0,
+        "last_print_energy_cost": 5.0,
+        "last_print_material_cost": 30.0,
+        "last_print_total_cost": 35.0,
+        "last_print_integrated_energy": 0.5,
+        "current_phase": "printing",
+        "session_state": "printing",
+        "state_counters": {
+            "transitions": {"idle->starting": 40},
+            "suppressed_starts": 3,
+            "suppressed_stops": 1,
+        },
+        "forecast_basis": "progress",
+        "phase_breakdown": {},
+    }
+    if minute is None:
+        data.update(
+            total_energy=12.8,
+            print_count=41,
+            total_energy_cost=125.0,
+            total_material_cost=930.0,
+            total_cost=1055.0,
+            current_phase="idle",
+            session_state="idle",
+        )
+        data["state_counters"]["transitions"] = {"idle->starting": 41}
+        return data
+    data.update(
+        phase_breakdown={
+            "heat_up": {"energy": 0.05, "duration": 600.0},
+            "printing": {"energy": 0.001 * minute, "duration": 60.0 * minute},
+        },
+        projected_duration=3.0 + minute * 0.001,
+        projected_energy=0.5 + minute * 0.001,
+        projected_energy_cost=4.0 + minute * 0.01,
+        projected_material_cost=26.0 + minute * 0.01,
+        projected_material=12000.0,
+        projected_total_cost=30.0 + minute * 0.02,
+    )
+    return data
+
+
+def _recorded_bytes(policy: str, honor_unrecorded: bool = True) -> int:
+    """Return the attribute bytes the recorder writes for one print."""
+    coordinator = SimpleNamespace(
+        data=_data(None),
+        attribute_policy=policy,
+        energy_sensor="sensor.printer_energy",
+        material_sensor="sensor.printer_material",
+        power_sensor=None,
+        energy_sources=None,
+        currency="EUR",
+        _get_currency=lambda: "EUR",
+    )
+    entry = SimpleNamespace(entry_id="entry", data={}, title="Printer")
+    hass = SimpleNamespace(data={DOMAIN: {entry.entry_id: coordinator}})
+    entities: list[Any] = []
+    asyncio.run(sensor.async_setup_entry(hass, entry, entities.extend))
+
+    written: set[tuple[str, str]] = set()
+
+    def refresh(minute: int | None) -> int:
+        """Return the bytes of the attribute rows one refresh adds."""
+        coordinator.data = _data(minute)
+        added = 0
+        for entity in entities:
+            attributes = dict(entity.extra_state_attributes or {})
+            if honor_unrecorded:
+                for key in type(entity)._unrecorded_attributes:
+                    attributes.pop(key, None)
+            attributes.update(friendly_name=f"Printer {entity.name}", icon=entity.icon)
+            blob = json.dumps(attributes, default=str, sort_keys=True)
+            if (entity.entity_key, blob) not in written:
+                written.add((entity.entity_key, blob))
+                added += len(blob)
+        return added
+
+    # Rows of the idle state before the print already exist
+    refresh(None)
+    return sum(refresh(minute) for minute in [*range(PRINT_MINUTES), None])
+
+
+def test_unrecorded_attributes_shrink_recorder_writes() -> None:
+    before = _recorded_bytes(ATTRIBUTE_POLICY_FULL, honor_unrecorded=False)
+    full = _recorded_bytes(ATTRIBUTE_POLICY_FULL)
+    minimal = _recorded_bytes(ATTRIBUTE_POLICY_MINIMAL)
+    none = _recorded_bytes(ATTRIBUTE_POLICY_NONE)
+    print(
+        f"\nRecorder attribute bytes for one {PRINT_MINUTES} minute print: "
+        f"{before} before, {full} full, {minimal} minimal, {none} none"
+    )
+
+    assert full * 10 < before
+    assert minimal <= full
+    assert none == 0
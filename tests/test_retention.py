@@ -0,0 +1,30 @@
+"""Tests for print history retention."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from custom_components.printer_energy.retention import months_before
+
+
+def _months_before(moment: datetime, months: int) -> datetime:
+    """Return months_before for a UTC datetime as a UTC datetime."""
+    return datetime.fromtimestamp(months_before(moment.timestamp(), months), tz=timezone.utc)
+
+
+def test_keeps_day_when_target_month_has_it() -> None:
+    moment = datetime(2025, 7, 31, 12, 30, tzinfo=timezone.utc)
+    assert _months_before(moment, 2) == datetime(2025, 5, 31, 12, 30, tzinfo=timezone.utc)
+    moment = datetime(2025, 3, 30, tzinfo=timezone.utc)
+    assert _months_before(moment, 12) == datetime(2024, 3, 30, tzinfo=timezone.utc)
+
+
+def test_clamps_to_end_of_shorter_month() -> None:
+    moment = datetime(2025, 5, 31, tzinfo=timezone.utc)
+    assert _months_before(moment, 1) == datetime(2025, 4, 30, tzinfo=timezone.utc)
+    moment = datetime(2025, 3, 31, tzinfo=timezone.utc)
+    assert _months_before(moment, 1) == datetime(2025, 2, 28, tzinfo=timezone.utc)
+    moment = datetime(2024, 3, 31, tzinfo=timezone.utc)
+    assert _months_before(moment, 1) == datetime(2024, 2, 29, tzinfo=timezone.utc)
+    moment = datetime(2025, 1, 31, tzinfo=timezone.utc)
+    assert _months_before(moment, 2) == datetime(2024, 11, 30, tzinfo=timezone.utc)
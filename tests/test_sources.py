@@ -0,0 +1,22 @@
+"""Tests for the additional energy sources of a session."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.printer_energy.sources import SessionSources
+
+
+def test_rewind_to_recorded_end() -> None:
+    """Closing at a recorded end counts the sources' energy up to that end."""
+    sources = SessionSources()
+    sources.start({"sensor.heater": 10.0, "sensor.dryer": 5.0})
+    sources.update("sensor.heater", 12.0)
+    sources.update("sensor.dryer", 6.0)
+    # Read again after the restart, long after the print ended
+    sources.update("sensor.heater", 15.0)
+    assert sources.total == pytest.approx(6.0)
+
+    sources.rewind({"sensor.heater": 11.5})
+    assert sources.breakdown() == {"sensor.heater": 1.5, "sensor.dryer": 1.0}
+    assert sources.session_total() == pytest.approx(2.5)
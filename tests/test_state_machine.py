@@ -0,0 +1,102 @@
+"""Tests for the printing state machine and downtime reconciliation."""
+
+from __future__ import annotations
+
+from custom_components.printer_energy.rules import compile_rule
+from custom_components.printer_energy.state_machine import PrintingStateMachine, find_session_end
+from custom_components.printer_energy.tracker import PrinterTracker
+
+GAP_START = 1_000_000.0
+STOP_DWELL = 120.0
+
+
+def _tracker(states: tuple[str, ...] = ("printing",), rule: str | None = None) -> PrinterTracker:
+    """Return a tracker to classify recorded states with."""
+    return PrinterTracker(
+        "printer",
+        "Printer",
+        "sensor.printer",
+        "sensor.printer_energy",
+        None,
+        states,
+        ("paused",),
+        PrintingStateMachine(30.0, STOP_DWELL, 300.0),
+        printing_rule=compile_rule(rule),
+    )
+
+
+def _recorded(tracker: PrinterTracker, states: list[tuple[float, str, dict]]) -> list[tuple[float, str]]:
+    """Classify recorded (offset, state, attributes) like the coordinator does."""
+    return [(GAP_START + offset, tracker.classify(state, attributes)) for offset, state, attributes in states]
+
+
+def test_gap_end_with_attribute_rule() -> None:
+    """A print that ended during downtime is found by an attribute-only rule."""
+    tracker = _tracker(rule='attr.print_status ~ "^print"')
+    # The state stays "on" the whole time, only the attributes tell the print apart
+    states = [
+        (-600.0, "on", {"print_status": "printing"}),
+        (1200.0, "on", {"print_status": "printing_layer"}),
+        (3000.0, "on", {"print_status": "finished"}),
+        (3010.0, "on", {"print_status": "printing"}),  # Blip shorter than the stop dwell
+        (3020.0, "on", {"print_status": "finished"}),
+        (9000.0, "on", {"print_status": "standby"}),
+    ]
+    assert find_session_end(_recorded(tracker, states), GAP_START, STOP_DWELL) == GAP_START + 3020.0
+
+    # Recorded states without attributes all look idle: the session would end at the gap start
+    stripped = [(offset, state, {}) for offset, state, _attributes in states]
+    assert find_session_end(_recorded(tracker, stripped), GAP_START, STOP_DWELL) == GAP_START
+
+
+def test_gap_end_still_printing() -> None:
+    """No end is found while the recorded history is still printing or paused."""
+    tracker = _tracker()
+    states = [(0.0, "printing", {}), (100.0, "paused", {}), (200.0, "printing", {})]
+    assert find_session_end(_recorded(tracker, states), GAP_START, STOP_DWELL) is None
+
+
+def test_stop_closes_at_first_non_printing_state() -> None:
+    tracker = _tracker()
+    tracker.energy = 10.0
+    tracker.classify("printing")
+    tracker.step(0.0, 1.0, 0.0)
+    tracker.step(30.0, 1.0, 0.0)
+    assert tracker.is_printing
+    tracker.energy = 11.0
+    tracker.step(3590.0, 1.0, 0.0)
+
+    tracker.classify("idle")
+    assert tracker.step(3600.0, 1.0, 0.0) is None
+    # Idle energy used during the stop dwell is not billed
+    tracker.energy = 11.2
+    assert tracker.step(3600.0 + STOP_DWELL / 2, 1.0, 0.0) is None
+    assert tracker.session_energy == 1.0
+    record = tracker.step(3600.0 + STOP_DWELL, 1.0, 0.0)
+    assert record is not None
+    assert record["start"] == 0.0
+    assert record["end"] == 3600.0
+    assert record["energy"] == 1.0
+
+
+def test_suppressed_stop_keeps_counting() -> None:
+    tracker = _tracker()
+    tracker.energy = 10.0
+    tracker.classify("printing")
+    tracker.step(0.0, 1.0, 0.0)
+    tracker.step(30.0, 1.0, 0.0)
+
+    tracker.energy = 11.0
+    tracker.classify("idle")
+    tracker.step(3600.0, 1.0, 0.0)
+    tracker.energy = 11.5
+    tracker.classify("printing")
+    tracker.step(3630.0, 1.0, 0.0)
+    tracker.energy = 12.0
+    tracker.classify("idle")
+    tracker.step(7200.0, 1.0, 0.0)
+    tracker.energy = 12.1
+    record = tracker.step(7200.0 + STOP_DWELL, 1.0, 0.0)
+    assert record is not None
+    assert record["end"] == 7200.0
+    assert record["energy"] == 2.0